@@ -0,0 +1,3 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""Benchmarks for power_systems_data_api_demonstrator."""
@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+p50/p99 latency of the capacity endpoints by the size of a PSR.
+
+One PSR is seeded per size, with that many fuel sources, each with
+``--periods`` capacity periods, and that many interconnections. Both
+endpoints are asked for each PSR; the endpoint functions are called
+directly, so the numbers leave out HTTP but include building the
+response. Run with ``python -m benchmarks.capacity_latency``.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Awaitable, Callable
+
+import numpy as np
+from fastapi import Request
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from power_systems_data_api_demonstrator.src.api.psr_metadata.views import (
+    CapacityTable,
+    PSRInterconnectionTable,
+    get_psr_capacity,
+    get_psr_transmission_capacity,
+)
+
+START = date(2015, 1, 1)
+TECHNOLOGIES = 8
+
+
+def psr_id(size: int) -> str:
+    return f"BENCH-{size}"
+
+
+def seed(db_file: str, sizes: list[int], periods: int) -> None:
+    engine = create_engine(f"sqlite:///{db_file}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for size in sizes:
+            session.connection().execute(
+                insert(CapacityTable),
+                [
+                    {
+                        "id": psr_id(size),
+                        "type": f"FUEL_{fuel}",
+                        "technology": f"TECH_{fuel % TECHNOLOGIES}",
+                        "unit": "MW",
+                        "value": float(fuel + period),
+                        "startDatetime": str(START + timedelta(days=365 * period)),
+                    }
+                    for fuel in range(size)
+                    for period in range(periods)
+                ],
+            )
+            session.connection().execute(
+                insert(PSRInterconnectionTable),
+                [
+                    {
+                        "id": psr_id(size),
+                        "connectedPSR": f"BENCH-NEIGHBOUR-{neighbour}",
+                        "unit": "MW",
+                        "value": float(neighbour),
+                    }
+                    for neighbour in range(size)
+                ],
+            )
+        session.commit()
+    engine.dispose()
+
+
+async def timed(function: Callable[[], Awaitable], queries: int) -> np.ndarray:
+    """Milliseconds of ``queries`` calls of ``function``, after one warm-up."""
+    await function()
+    timings = []
+    for _ in range(queries):
+        start = time.perf_counter()
+        await function()
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+async def run(db_file: str, sizes: list[int], periods: int, queries: int) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}")
+    request = Request({"type": "http", "headers": []})
+    print(f"{queries} queries per PSR, {periods} capacity periods per fuel source")
+    print(f"{'size':>6} {'endpoint':>22} {'p50 ms':>9} {'p99 ms':>9}")
+    async with AsyncSession(engine) as session:
+        for size in sizes:
+            for name, endpoint in [
+                ("capacity", get_psr_capacity),
+                ("transmission-capacity", get_psr_transmission_capacity),
+            ]:
+                timings = await timed(
+                    lambda: endpoint(request, psr_id(size), None, session=session),
+                    queries,
+                )
+                p50, p99 = np.percentile(timings, [50, 99])
+                print(f"{size:>6} {name:>22} {p50:>9.2f} {p99:>9.2f}")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 500],
+        help="fuel sources and interconnections of each PSR",
+    )
+    parser.add_argument("--periods", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_file = os.path.join(temp_dir, "bench.sqlite3")
+        seed(db_file, args.sizes, args.periods)
+        asyncio.run(run(db_file, args.sizes, args.periods, args.queries))
+
+
+if __name__ == "__main__":
+    main()
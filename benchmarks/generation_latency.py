@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+p50/p99 latency of the generation endpoint on each generation backend.
+
+Every query asks for a random PSR over a random window; the endpoint
+function is called directly, so the numbers leave out HTTP but include
+building the response. Run with ``python -m benchmarks.generation_latency``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from fastapi import Request
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+
+from power_systems_data_api_demonstrator.settings import GenerationBackend, settings
+from power_systems_data_api_demonstrator.src.api.memory_store import generation_store
+from power_systems_data_api_demonstrator.src.api.parquet_store import parquet_dataset
+from power_systems_data_api_demonstrator.src.api.psr_metadata.views import PSRList
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    GenerationByFuelSourceTable,
+    Resolution,
+    get_generation,
+)
+from power_systems_data_api_demonstrator.src.api.seed import (
+    export_parquet,
+    refresh_closure,
+)
+
+START = datetime(2021, 1, 1)
+PARENT = "BENCH"
+FUEL_TYPES = 12
+
+
+def seed(db_file: str, psrs: int, days: int) -> None:
+    engine = create_engine(f"sqlite:///{db_file}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        # The PSRs are the children of BENCH, whose generation is their sum
+        session.add(PSRList(id=PARENT, level=0))
+        session.add_all(
+            [PSRList(id=f"BENCH-{psr}", level=1, parent=PARENT) for psr in range(psrs)]
+        )
+        session.flush()
+        for psr in range(psrs):
+            session.connection().execute(
+                insert(GenerationByFuelSourceTable),
+                [
+                    {
+                        "id": f"BENCH-{psr}",
+                        "type": f"FUEL_{fuel}",
+                        "technology": None,
+                        "value": float(hour * fuel),
+                        "start_datetime": START + timedelta(hours=hour),
+                        "end_datetime": START + timedelta(hours=hour + 1),
+                        "timezone": "UTC",
+                        "unit": "MWh",
+                    }
+                    for hour in range(days * 24)
+                    for fuel in range(FUEL_TYPES)
+                ],
+            )
+        refresh_closure(session)
+        session.commit()
+        export_parquet(session, "benchmark")
+    engine.dispose()
+
+
+async def run(
+    db_file: str,
+    psrs: int,
+    days: int,
+    window: int,
+    queries: int,
+    resolution: Resolution | None,
+) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}")
+    request = Request({"type": "http", "headers": []})
+    rng = random.Random(0)
+    windows = [
+        (f"BENCH-{rng.randrange(psrs)}", rng.randrange(days - window + 1))
+        for _ in range(queries)
+    ]
+    print(f"{queries} queries of {window} day(s), resolution {resolution}")
+    for backend in GenerationBackend:
+        settings.generation_backend = backend
+        generation_store.clear()
+        parquet_dataset.clear()
+        timings = []
+        async with AsyncSession(engine) as session:
+            for psr_id, day in windows:
+                start_datetime = START + timedelta(days=day)
+                start = time.perf_counter()
+                await get_generation(
+                    request,
+                    psr_id,
+                    start_datetime.replace(tzinfo=timezone.utc),
+                    (start_datetime + timedelta(days=window)).replace(
+                        tzinfo=timezone.utc
+                    ),
+                    resolution,
+                    stream=False,
+                    session=session,
+                )
+                timings.append(time.perf_counter() - start)
+        # The first memory query loads the store, the first parquet one lists
+        # the files
+        p50, p99 = np.percentile(np.array(timings[1:]) * 1000, [50, 99])
+        print(
+            f"{backend.value:>7}: p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  "
+            f"first {timings[0] * 1000:8.2f} ms"
+        )
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--psrs", type=int, default=10)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--window", type=int, default=1, help="days per query")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--resolution", type=Resolution, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_file = os.path.join(temp_dir, "bench.sqlite3")
+        settings.parquet_dir = Path(temp_dir) / "parquet"
+        seed(db_file, args.psrs, args.days)
+        asyncio.run(
+            run(
+                db_file,
+                args.psrs,
+                args.days,
+                args.window,
+                args.queries,
+                args.resolution,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
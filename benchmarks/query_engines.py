@@ -0,0 +1,117 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Latency of the SQLite and DuckDB query engines by the number of rows a query
+sums, to find where DuckDB starts to win.
+
+The queries ask for the monthly generation of the parent of every benchmark
+PSR, over windows of growing length. The windows start an hour into a day,
+so no rollup applies and every stored row in them is read and summed. Run
+with ``python -m benchmarks.query_engines``.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import Session, create_engine
+
+from benchmarks.generation_latency import FUEL_TYPES, PARENT, START, seed
+from power_systems_data_api_demonstrator.settings import QueryEngine, settings
+from power_systems_data_api_demonstrator.src.api.analytics_db import (
+    analytics_db,
+    copy_tables,
+)
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    Resolution,
+    get_generation,
+)
+
+
+async def time_query(
+    session: AsyncSession, days: int, resolution: Resolution, repeat: int
+) -> float:
+    """Median milliseconds of the generation query over ``days``."""
+    request = Request({"type": "http", "headers": []})
+    start_datetime = (START + timedelta(hours=1)).replace(tzinfo=timezone.utc)
+    timings = []
+    for _ in range(repeat + 1):
+        start = time.perf_counter()
+        await get_generation(
+            request,
+            PARENT,
+            start_datetime,
+            start_datetime + timedelta(days=days),
+            resolution,
+            stream=False,
+            session=session,
+        )
+        timings.append(time.perf_counter() - start)
+    # The first run warms the caches and connections
+    return float(np.median(timings[1:])) * 1000
+
+
+async def run(
+    db_file: str, psrs: int, windows: list[int], resolution: Resolution, repeat: int
+) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}")
+    print(f"{'rows':>10} {'days':>5} {'sqlite ms':>10} {'duckdb ms':>10}")
+    crossover = None
+    async with AsyncSession(engine) as session:
+        for days in windows:
+            rows = psrs * FUEL_TYPES * (days * 24 - 1)
+            timings = {}
+            for query_engine in QueryEngine:
+                settings.query_engine = query_engine
+                timings[query_engine] = await time_query(
+                    session, days, resolution, repeat
+                )
+            print(
+                f"{rows:>10} {days:>5} {timings[QueryEngine.sqlite]:>10.2f} "
+                f"{timings[QueryEngine.duckdb]:>10.2f}"
+            )
+            if crossover is None and (
+                timings[QueryEngine.duckdb] < timings[QueryEngine.sqlite]
+            ):
+                crossover = rows
+    await engine.dispose()
+    if crossover is None:
+        print("SQLite was faster at every size")
+    else:
+        print(f"DuckDB is faster from about {crossover} rows summed")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--psrs", type=int, default=10)
+    parser.add_argument(
+        "--windows",
+        type=int,
+        nargs="+",
+        default=[1, 3, 7, 14, 30, 90, 180, 365],
+        help="days per query",
+    )
+    parser.add_argument("--resolution", type=Resolution, default=Resolution.month)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_file = os.path.join(temp_dir, "bench.sqlite3")
+        settings.parquet_dir = Path(temp_dir) / "parquet"
+        settings.duckdb_file = Path(temp_dir) / "bench.duckdb"
+        seed(db_file, args.psrs, max(args.windows) + 1)
+        engine = create_engine(f"sqlite:///{db_file}")
+        with Session(engine) as session:
+            copy_tables(session.connection(), settings.duckdb_file, None)
+        engine.dispose()
+        analytics_db.clear()
+        asyncio.run(run(db_file, args.psrs, args.windows, args.resolution, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Rows/sec of the generation read path: ORM entities vs projected columns.
+
+Run with ``python -m benchmarks.read_path --rows 100000``.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import SQLModel, create_engine, select
+
+from power_systems_data_api_demonstrator.src.api.db import fetch_frame
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    GENERATION_COLUMNS,
+    GenerationByFuelSourceTable,
+)
+
+PSR_ID = "BENCH-AREA"
+FUEL_TYPES = 12
+
+
+def seed(db_file: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{db_file}")
+    SQLModel.metadata.create_all(engine)
+    start = datetime(2021, 1, 1)
+    records = [
+        {
+            "id": PSR_ID,
+            "type": f"FUEL_{i % FUEL_TYPES}",
+            "technology": None,
+            "value": float(i),
+            "start_datetime": start + timedelta(hours=i // FUEL_TYPES),
+            "end_datetime": start + timedelta(hours=i // FUEL_TYPES + 1),
+            "timezone": "UTC",
+            "unit": "MWh",
+        }
+        for i in range(rows)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(GenerationByFuelSourceTable), records)
+    engine.dispose()
+
+
+async def read_entities(session: AsyncSession) -> pd.DataFrame:
+    result = await session.execute(
+        select(GenerationByFuelSourceTable).filter_by(id=PSR_ID)
+    )
+    return pd.DataFrame([g.dict() for g in result.scalars().all()])
+
+
+async def read_columns(session: AsyncSession) -> pd.DataFrame:
+    return await fetch_frame(
+        session,
+        select(*GENERATION_COLUMNS).filter(GenerationByFuelSourceTable.id == PSR_ID),
+    )
+
+
+async def run(db_file: str, repeat: int) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}")
+    for name, read in [("orm entities", read_entities), ("core columns", read_columns)]:
+        timings = []
+        for _ in range(repeat):
+            async with AsyncSession(engine) as session:
+                start = time.perf_counter()
+                df = await read(session)
+                timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{name:>14}: {len(df) / best:>12,.0f} rows/sec ({best:.3f}s)")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_file = os.path.join(temp_dir, "bench.sqlite3")
+        seed(db_file, args.rows)
+        asyncio.run(run(db_file, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
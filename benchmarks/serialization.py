@@ -0,0 +1,147 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Cost of turning generation rows into a JSON response, per 10k intervals.
+
+The rows of one PSR, as the generation query returns them, are answered
+two ways:
+
+- ``models``: grouped into GenerationResponse models, which FastAPI
+  validates again against the response model, converts with
+  ``jsonable_encoder`` and encodes with ujson,
+- ``fast path``: grouped into dicts of the same shape, encoded once by
+  orjson in FastJSONResponse, as the generation endpoints do.
+
+Both bodies are checked to be the same bytes. Run with
+``python -m benchmarks.serialization --intervals 10000 --fuel-types 8``.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import UJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    ElectricityUnit,
+    Generation,
+    GenerationByFuelSource,
+    GenerationResponse,
+    Payload,
+    generation_from_frame,
+    generation_response,
+)
+from power_systems_data_api_demonstrator.src.api.responses import FastJSONResponse
+from power_systems_data_api_demonstrator.src.application import get_app
+
+PSR_ID = "BENCH-AREA"
+GENERATION_ROUTE = "/power-systems-resource/{id}/timeseries/generation"
+PER_INTERVALS = 10_000
+
+
+def generation_frame(intervals: int, fuel_types: int) -> pd.DataFrame:
+    """Rows of the generation query, one per interval and fuel type."""
+    starts = pd.date_range(datetime(2021, 1, 1), periods=intervals, freq="h")
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "id": PSR_ID,
+            "type": np.tile([f"FUEL_{fuel}" for fuel in range(fuel_types)], intervals),
+            "technology": None,
+            "value": np.round(rng.uniform(0, 2_000, intervals * fuel_types), 1),
+            "start_datetime": np.repeat(starts, fuel_types),
+            "end_datetime": np.repeat(starts + timedelta(hours=1), fuel_types),
+            "timezone": "UTC",
+            "unit": ElectricityUnit.mwh,
+        }
+    )
+
+
+def model_response(df: pd.DataFrame) -> GenerationResponse:
+    """The response built as models, from the intervals grouped as before."""
+    return GenerationResponse(
+        id=PSR_ID,
+        unit=ElectricityUnit.mwh,
+        generation=[
+            Generation(
+                start_datetime=pd.Timestamp(generation["start_datetime"]),
+                end_datetime=pd.Timestamp(generation["end_datetime"]),
+                value=generation["value"],
+                value_by_fuel_source=[
+                    GenerationByFuelSource(**source)
+                    for source in generation["value_by_fuel_source"]
+                ],
+            )
+            for generation in generation_from_frame(df)
+        ],
+    )
+
+
+def encode_models(model: GenerationResponse, route: APIRoute) -> bytes:
+    content = asyncio.run(
+        serialize_response(field=route.response_field, response_content=model)
+    )
+    return UJSONResponse(content).body
+
+
+def fast_payload(df: pd.DataFrame) -> Payload:
+    return generation_response(PSR_ID, ElectricityUnit.mwh, generation_from_frame(df))
+
+
+def timed(function: Callable, repeat: int) -> tuple[float, object]:
+    """The median seconds of ``function`` over ``repeat`` runs, and its result."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--intervals", type=int, default=PER_INTERVALS)
+    parser.add_argument("--fuel-types", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = generation_frame(args.intervals, args.fuel_types)
+    route = next(
+        route
+        for route in get_app().routes
+        if isinstance(route, APIRoute) and route.path == GENERATION_ROUTE
+    )
+    build_models, model = timed(lambda: model_response(df), args.repeat)
+    encode_model, model_body = timed(lambda: encode_models(model, route), args.repeat)
+    build_payload, payload = timed(lambda: fast_payload(df), args.repeat)
+    encode_payload, payload_body = timed(
+        lambda: FastJSONResponse(payload).body, args.repeat
+    )
+    if model_body != payload_body:
+        raise SystemExit("The fast path does not write the same JSON as the models")
+
+    scale = 1000 * PER_INTERVALS / args.intervals
+    print(
+        f"{args.intervals} intervals of {args.fuel_types} fuel types, "
+        f"{len(payload_body) / 1e6:.1f} MB, in ms per {PER_INTERVALS} intervals"
+    )
+    print(f"{'':>10} {'build':>9} {'encode':>9} {'total':>9}")
+    for name, build, encode in [
+        ("models", build_models, encode_model),
+        ("fast path", build_payload, encode_payload),
+    ]:
+        print(
+            f"{name:>10} {build * scale:>9.2f} {encode * scale:>9.2f} "
+            f"{(build + encode) * scale:>9.2f}"
+        )
+    speedup = (build_models + encode_model) / (build_payload + encode_payload)
+    print(f"The fast path is {speedup:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
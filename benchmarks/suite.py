@@ -0,0 +1,343 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+The benchmark suite: seeds a synthetic dataset and measures every endpoint.
+
+A data directory of the given scale is generated (see
+``benchmarks.synthetic_data``) and seeded into a new database, recording
+the seed time, the time of a second, up to date, seed and the database
+size. Then every endpoint of the API is requested ``--requests`` times,
+``--concurrency`` at a time, through the ASGI app, for random PSRs and
+windows drawn from a fixed seed: the p50/p90/p99 latency and the
+throughput of each are recorded. The results are written as JSON, with the
+commit and settings they were measured on, so runs can be compared. The
+generation backend and query engine are taken from the settings, e.g.
+``POWER_SYSTEMS_DATA_API_DEMONSTRATOR_QUERY_ENGINE=duckdb``.
+
+Run with ``python -m benchmarks.suite --psrs 20 --output results.json``.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlmodel import Session
+
+from benchmarks.synthetic_data import (
+    START,
+    Scale,
+    add_scale_arguments,
+    generate,
+    parent_id,
+    psr_id,
+    scale_from_args,
+)
+from power_systems_data_api_demonstrator.settings import settings
+from power_systems_data_api_demonstrator.src.api.db import get_engine
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    GenerationByFuelSourceTable,
+)
+from power_systems_data_api_demonstrator.src.api.seed import seed
+from power_systems_data_api_demonstrator.src.api.sources import SOURCES
+from power_systems_data_api_demonstrator.src.application import get_app
+
+# A request of a case: the URL and its query parameters
+Request = tuple[str, dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Case:
+    """Requests of one endpoint, drawn at random for the dataset's scale."""
+
+    name: str
+    # Path of the route benchmarked, as declared
+    route: str
+    request: Callable[[random.Random, Scale], Request]
+    headers: dict[str, str] | None = None
+
+
+def random_psr(rng: random.Random, scale: Scale) -> str:
+    return psr_id(rng.choice(list(SOURCES)), rng.randrange(scale.psrs))
+
+
+def random_window(rng: random.Random, scale: Scale, days: int) -> dict[str, str]:
+    """A window of ``days`` starting at a random hour of the dataset."""
+    hours = max(1, (scale.days - days) * 24)
+    start = START.to_pydatetime() + timedelta(hours=rng.randrange(hours))
+    end = start + timedelta(days=days)
+    return {
+        "startDatetime": start.replace(tzinfo=timezone.utc).isoformat(),
+        "endDatetime": end.replace(tzinfo=timezone.utc).isoformat(),
+    }
+
+
+def generation(days: int, **params: Any) -> Callable[[random.Random, Scale], Request]:
+    def request(rng: random.Random, scale: Scale) -> Request:
+        url = f"/power-systems-resource/{random_psr(rng, scale)}/timeseries/generation"
+        return url, {**random_window(rng, scale, days), **params}
+
+    return request
+
+
+def parent_generation(days: int, **params: Any) -> Callable:
+    def request(rng: random.Random, scale: Scale) -> Request:
+        psr = parent_id(rng.choice(list(SOURCES)))
+        url = f"/power-systems-resource/{psr}/timeseries/generation"
+        return url, {**random_window(rng, scale, days), **params}
+
+    return request
+
+
+def batch_generation(psrs: int, days: int) -> Callable:
+    def request(rng: random.Random, scale: Scale) -> Request:
+        ids = [random_psr(rng, scale) for _ in range(psrs)]
+        url = "/power-systems-resource/timeseries/generation"
+        return url, {"id": ids, **random_window(rng, scale, days)}
+
+    return request
+
+
+def by_psr(url: str) -> Callable[[random.Random, Scale], Request]:
+    def request(rng: random.Random, scale: Scale) -> Request:
+        return url, {"id": random_psr(rng, scale)}
+
+    return request
+
+
+def fixed(url: str, **params: Any) -> Callable[[random.Random, Scale], Request]:
+    return lambda rng, scale: (url, params)
+
+
+GENERATION_ROUTE = "/power-systems-resource/{id}/timeseries/generation"
+CASES = [
+    Case(
+        "topology_levels",
+        "/metadata/topology-levels",
+        fixed("/metadata/topology-levels"),
+    ),
+    Case(
+        "fuel_source_types",
+        "/metadata/fuel-source/types",
+        fixed("/metadata/fuel-source/types"),
+    ),
+    Case(
+        "fuel_source_technologies",
+        "/metadata/fuel-source/technologies",
+        fixed("/metadata/fuel-source/technologies"),
+    ),
+    Case(
+        "psr_list",
+        "/power-systems-resource/power-system-resource",
+        fixed("/power-systems-resource/power-system-resource"),
+    ),
+    Case(
+        "capacity",
+        "/power-systems-resource/power-system-resource/capacity",
+        by_psr("/power-systems-resource/power-system-resource/capacity"),
+    ),
+    Case(
+        "transmission_capacity",
+        "/power-systems-resource/power-system-resource/transmission-capacity",
+        by_psr("/power-systems-resource/power-system-resource/transmission-capacity"),
+    ),
+    Case("generation_day", GENERATION_ROUTE, generation(1)),
+    Case("generation_month_daily", GENERATION_ROUTE, generation(30, resolution="P1D")),
+    Case(
+        "generation_year_monthly", GENERATION_ROUTE, generation(365, resolution="P1M")
+    ),
+    Case("generation_parent_week", GENERATION_ROUTE, parent_generation(7)),
+    Case("generation_day_stream", GENERATION_ROUTE, generation(1, stream=True)),
+    Case(
+        "generation_week_csv",
+        GENERATION_ROUTE,
+        generation(7),
+        headers={"Accept": "text/csv"},
+    ),
+    Case(
+        "generation_batch_day",
+        "/power-systems-resource/timeseries/generation",
+        batch_generation(10, 1),
+    ),
+]
+
+
+def api_routes() -> set[str]:
+    """The paths of the GET routes of the API, as documented."""
+    return {
+        route.path
+        for route in get_app().routes
+        if isinstance(route, APIRoute)
+        and route.include_in_schema
+        and "GET" in route.methods
+    }
+
+
+def check_coverage() -> None:
+    missing = api_routes() - {case.route for case in CASES}
+    if missing:
+        raise SystemExit(f"No benchmark case for {', '.join(sorted(missing))}")
+
+
+def run_case(
+    client: TestClient,
+    case: Case,
+    scale: Scale,
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+    drawn = [case.request(rng, scale) for _ in range(requests)]
+
+    def timed(request: Request) -> tuple[float, int, int]:
+        url, params = request
+        start = time.perf_counter()
+        response = client.get(url, params=params, headers=case.headers)
+        return time.perf_counter() - start, response.status_code, len(response.content)
+
+    # Warm up the caches, pools and stores the first request of a worker fills
+    for request in drawn[: min(5, requests)]:
+        timed(request)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, drawn))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([seconds for seconds, _, _ in results]) * 1000
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    statuses: dict[str, int] = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "route": case.route,
+        "requests": requests,
+        "concurrency": concurrency,
+        "p50_ms": round(p50, 3),
+        "p90_ms": round(p90, 3),
+        "p99_ms": round(p99, 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "throughput_rps": round(requests / wall, 1),
+        "mean_bytes": round(float(np.mean([size for _, _, size in results]))),
+        "statuses": statuses,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def db_bytes(db_file: Path) -> int:
+    """Size of the database, once its write-ahead log is written back."""
+    with get_engine().connect() as connection:
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return db_file.stat().st_size
+
+
+def seed_dataset(work_dir: Path, scale: Scale, data_dir: Path | None) -> dict:
+    """Generate (unless given) and seed the dataset, with what it took."""
+    dataset: dict[str, Any] = {}
+    if data_dir is None:
+        data_dir = work_dir / "data"
+        start = time.perf_counter()
+        generate(data_dir, scale)
+        dataset["generate_seconds"] = round(time.perf_counter() - start, 3)
+    settings.data_dir = data_dir
+    settings.db_file = work_dir / "db.sqlite3"
+    settings.parquet_dir = work_dir / "parquet"
+    settings.duckdb_file = work_dir / "db.duckdb"
+    settings.seed_on_startup = False
+
+    start = time.perf_counter()
+    seed()
+    dataset["seed_seconds"] = round(time.perf_counter() - start, 3)
+    start = time.perf_counter()
+    seed()
+    dataset["seed_up_to_date_seconds"] = round(time.perf_counter() - start, 3)
+    with Session(get_engine()) as session:
+        dataset["generation_rows"] = session.scalar(
+            select(func.count()).select_from(GenerationByFuelSourceTable)
+        )
+    dataset["db_bytes"] = db_bytes(settings.db_file)
+    return dataset
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    add_scale_arguments(parser)
+    parser.add_argument(
+        "--data-dir", type=Path, help="seed this data directory instead"
+    )
+    parser.add_argument("--requests", type=int, default=200, help="per endpoint")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--cases", nargs="+", help="names of the cases to run, all by default"
+    )
+    parser.add_argument("--output", type=Path, default=Path("benchmark.json"))
+    args = parser.parse_args()
+    scale = scale_from_args(args)
+    check_coverage()
+    cases = [case for case in CASES if not args.cases or case.name in args.cases]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dataset = seed_dataset(Path(temp_dir), scale, args.data_dir)
+        print(
+            f"Seeded {dataset['generation_rows']} generation rows in "
+            f"{dataset['seed_seconds']:.2f}s, {dataset['db_bytes'] / 1e6:.1f} MB"
+        )
+        endpoints = {}
+        print(f"{'case':<26} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+        with TestClient(get_app()) as client:
+            for case in cases:
+                result = run_case(
+                    client, case, scale, args.requests, args.concurrency, args.seed
+                )
+                endpoints[case.name] = result
+                print(
+                    f"{case.name:<26} {result['p50_ms']:>9.2f} "
+                    f"{result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                    f"{result['throughput_rps']:>8.1f}"
+                )
+
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "generation_backend": settings.generation_backend.value,
+            "query_engine": settings.query_engine.value,
+        },
+        "scale": asdict(scale),
+        "dataset": dataset,
+        "endpoints": endpoints,
+    }
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+A synthetic data directory at production scale, in the schemas the seeder
+reads.
+
+Every registered source gets ``--psrs`` balancing areas under one parent
+node, each publishing ``--fuel-types`` fuel types every ``--resolution``
+over ``--years`` years, with their load forecast, exchanges with the next
+area and installed capacity. ENTSO-E areas can also get ``--units``
+generating units, in long format files of their own. ``example/`` holds the
+metadata, with the capacities of every area. The values follow a daily
+cycle with noise, from a fixed random seed, so a directory is reproducible.
+
+Seed it with ``POWER_SYSTEMS_DATA_API_DEMONSTRATOR_DATA_DIR`` pointing at
+it. Run with ``python -m benchmarks.synthetic_data OUT_DIR --psrs 100``.
+"""
+import argparse
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from power_systems_data_api_demonstrator.src.api.seed import DATA_DIR
+from power_systems_data_api_demonstrator.src.api.sources import SOURCES
+
+START = pd.Timestamp("2021-01-01")
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+# Metadata files copied as they are from the packaged data
+COPIED_METADATA = ["topology_metadata.csv", "fuel_source_metadata.csv"]
+
+
+@dataclass(frozen=True)
+class Scale:
+    psrs: int = 10
+    fuel_types: int = 8
+    years: float = 1.0
+    # ISO 8601 duration of the intervals, e.g. PT1H or PT15M
+    resolution: str = "PT1H"
+    units: int = 0
+    seed: int = 0
+
+    @property
+    def days(self) -> int:
+        return round(365 * self.years)
+
+    @property
+    def intervals(self) -> pd.DatetimeIndex:
+        end = START + pd.Timedelta(days=self.days)
+        return pd.date_range(
+            START, end, freq=pd.Timedelta(self.resolution), inclusive="left"
+        )
+
+    @property
+    def fuel_type_names(self) -> list[str]:
+        return [f"FUEL_{fuel}" for fuel in range(self.fuel_types)]
+
+    def generation_rows(self) -> int:
+        """Rows the generation files make in the generation table."""
+        areas = self.psrs * len(SOURCES)
+        units = self.psrs * self.units if "ENTSO-E" in SOURCES else 0
+        return len(self.intervals) * (areas * self.fuel_types + units)
+
+
+def parent_id(source: str) -> str:
+    return f"SYN-{source}"
+
+
+def psr_id(source: str, psr: int) -> str:
+    return f"SYN-{source}-{psr:04d}"
+
+
+def unit_id(source: str, psr: int, unit: int) -> str:
+    return f"{psr_id(source, psr)}-U{unit}"
+
+
+def daily_profile(
+    rng: np.random.Generator, intervals: pd.DatetimeIndex, columns: int
+) -> np.ndarray:
+    """Positive values with a daily cycle, one column per series."""
+    hours = intervals.hour.to_numpy() + intervals.minute.to_numpy() / 60
+    cycle = 1 + 0.5 * np.sin(2 * np.pi * (hours - 6) / 24)
+    base = rng.uniform(100, 2_000, columns)
+    noise = rng.normal(1, 0.1, (len(intervals), columns))
+    return np.round(np.abs(cycle[:, None] * base[None, :] * noise), 1)
+
+
+def interval_columns(intervals: pd.DatetimeIndex, freq: pd.Timedelta) -> dict:
+    return {
+        "start_datetime": intervals.strftime(DATETIME_FORMAT),
+        "end_datetime": (intervals + freq).strftime(DATETIME_FORMAT),
+    }
+
+
+def write_generation(
+    path: Path, scale: Scale, source: str, rng: np.random.Generator
+) -> None:
+    """The wide generation file of a source, one column per fuel type."""
+    intervals = scale.intervals
+    times = interval_columns(intervals, pd.Timedelta(scale.resolution))
+    header = True
+    with open(path, "w", newline="") as f:
+        for psr in range(scale.psrs):
+            df = pd.DataFrame(
+                daily_profile(rng, intervals, scale.fuel_types),
+                columns=scale.fuel_type_names,
+            )
+            df.insert(0, "Grid Node", psr_id(source, psr))
+            df = df.assign(
+                **times,
+                **{"Parent Node": parent_id(source), "Topology Level": 1},
+                unit="MWh",
+            )
+            df.to_csv(f, index=False, header=header)
+            header = False
+
+
+def write_unit_generation(
+    directory: Path, scale: Scale, source: str, rng: np.random.Generator
+) -> None:
+    """One long format file per generating unit, as ENTSO-E publishes them."""
+    intervals = scale.intervals
+    times = interval_columns(intervals, pd.Timedelta(scale.resolution))
+    for psr in range(scale.psrs):
+        for unit in range(scale.units):
+            df = pd.DataFrame(
+                {
+                    **times,
+                    "Topology Level": 2,
+                    "value": daily_profile(rng, intervals, 1)[:, 0],
+                    "Grid Node": unit_id(source, psr, unit),
+                    "Parent Node": psr_id(source, psr),
+                    "unit": "MWh",
+                    "Fuel Type": scale.fuel_type_names[unit % scale.fuel_types],
+                }
+            )
+            name = f"generation_{unit_id(source, psr, unit)}.csv"
+            df.to_csv(directory / name, index=False)
+
+
+def write_load_forecast(
+    path: Path, scale: Scale, source: str, rng: np.random.Generator
+) -> None:
+    intervals = scale.intervals
+    times = interval_columns(intervals, pd.Timedelta(scale.resolution))
+    frames = []
+    for psr in range(scale.psrs):
+        actual = daily_profile(rng, intervals, 1)[:, 0] * 10
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Grid Node": psr_id(source, psr),
+                    **times,
+                    "forecast": np.round(actual * rng.normal(1, 0.05, len(actual))),
+                    "actual": np.round(actual),
+                    "unit": "MWh",
+                }
+            )
+        )
+    pd.concat(frames).to_csv(path, index=False)
+
+
+def write_exchanges(
+    path: Path, scale: Scale, source: str, rng: np.random.Generator
+) -> None:
+    """The exchanges of every area with the next one, around a ring."""
+    intervals = scale.intervals
+    times = interval_columns(intervals, pd.Timedelta(scale.resolution))
+    frames = [
+        pd.DataFrame(
+            {
+                **times,
+                "Grid Node From": psr_id(source, psr),
+                "Grid Node To": psr_id(source, (psr + 1) % scale.psrs),
+                "Value": np.round(rng.normal(0, 500, len(intervals))),
+                "unit": "MWh",
+            }
+        )
+        for psr in range(scale.psrs)
+    ]
+    pd.concat(frames).to_csv(path, index=False)
+
+
+def write_installed_capacity(
+    path: Path, scale: Scale, source: str, rng: np.random.Generator
+) -> None:
+    """The capacity of every fuel type of every area, once per year."""
+    years = pd.date_range(START, periods=max(1, int(np.ceil(scale.years))), freq="YS")
+    rows = [
+        {
+            "Grid Node": psr_id(source, psr),
+            "start_datetime": year.strftime(DATETIME_FORMAT),
+            "end_datetime": (year + pd.DateOffset(years=1)).strftime(DATETIME_FORMAT),
+            "Fuel Type": fuel_type,
+            "Value": round(rng.uniform(100, 5_000), 1),
+            "unit": "MW",
+        }
+        for psr in range(scale.psrs)
+        for year in years
+        for fuel_type in scale.fuel_type_names
+    ]
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def psr_metadata(scale: Scale, rng: np.random.Generator) -> list[dict]:
+    """The areas of every source with their capacities, for psr_metadata.json."""
+    return [
+        {
+            "id": psr_id(source, psr),
+            "topology_level": 1,
+            "parent": parent_id(source),
+            "transmission_capacity": [
+                {
+                    "connectedPSR": psr_id(source, (psr + 1) % scale.psrs),
+                    "unit": "MW",
+                    "value": round(rng.uniform(100, 2_000)),
+                }
+            ],
+            "fuelSource_capacity": [
+                {
+                    "type": fuel_type,
+                    "technology": "Unspecified",
+                    "unit": "MW",
+                    # A retired capacity, then the current one
+                    "capacity": [
+                        {
+                            "value": round(rng.uniform(100, 5_000)),
+                            "startDatetime": "2000-01-01",
+                            "endDatetime": "2020-12-31",
+                        },
+                        {
+                            "value": round(rng.uniform(100, 5_000)),
+                            "startDatetime": START.strftime("%Y-%m-%d"),
+                        },
+                    ],
+                }
+                for fuel_type in scale.fuel_type_names
+            ],
+        }
+        for source in SOURCES
+        for psr in range(scale.psrs)
+    ]
+
+
+def generate(out_dir: Path, scale: Scale) -> None:
+    """Write the data directory of ``scale`` to ``out_dir``, replacing it."""
+    rng = np.random.default_rng(scale.seed)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    example = out_dir / "example"
+    example.mkdir(parents=True)
+    for name in COPIED_METADATA:
+        shutil.copy(Path(DATA_DIR) / "example" / name, example / name)
+    (example / "psr_metadata.json").write_text(json.dumps(psr_metadata(scale, rng)))
+
+    for source in SOURCES:
+        directory = out_dir / source
+        directory.mkdir()
+        write_generation(directory / "generation.csv", scale, source, rng)
+        if source == "ENTSO-E":
+            write_unit_generation(directory, scale, source, rng)
+        write_load_forecast(directory / "load_forecast.csv", scale, source, rng)
+        write_exchanges(directory / "imports_exports.csv", scale, source, rng)
+        write_installed_capacity(
+            directory / "installed_capacity.csv", scale, source, rng
+        )
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--psrs", type=int, default=Scale.psrs, help="per source")
+    parser.add_argument("--fuel-types", type=int, default=Scale.fuel_types)
+    parser.add_argument("--years", type=float, default=Scale.years)
+    parser.add_argument("--resolution", default=Scale.resolution)
+    parser.add_argument(
+        "--units", type=int, default=Scale.units, help="per ENTSO-E area"
+    )
+    parser.add_argument("--seed", type=int, default=Scale.seed)
+
+
+def scale_from_args(args: argparse.Namespace) -> Scale:
+    return Scale(
+        psrs=args.psrs,
+        fuel_types=args.fuel_types,
+        years=args.years,
+        resolution=args.resolution,
+        units=args.units,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("out_dir", type=Path)
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    scale = scale_from_args(args)
+    generate(args.out_dir, scale)
+    print(f"Wrote {scale.generation_rows()} generation rows to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
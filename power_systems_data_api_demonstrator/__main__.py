@@ -1,12 +1,33 @@
 # SPDX-License-Identifier: Apache-2.0
 
+import os
+import re
+
 import uvicorn
 
 from power_systems_data_api_demonstrator.settings import settings
 
+# Names of the files prometheus_client writes the samples of a process to
+SAMPLES_FILE = re.compile(r"(counter|gauge_[a-z]+|histogram|summary)_\d+\.db")
+
+
+def prepare_metrics_dir() -> None:
+    """
+    Have the workers share their metrics through ``metrics_dir``, emptied of
+    the samples of a previous run. Only the files prometheus_client writes
+    are removed, whatever else the directory holds is left alone.
+    """
+    settings.metrics_dir.mkdir(parents=True, exist_ok=True)
+    for path in settings.metrics_dir.iterdir():
+        if path.is_file() and SAMPLES_FILE.fullmatch(path.name):
+            path.unlink()
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(settings.metrics_dir)
+
 
 def main() -> None:
     """Entrypoint of the application."""
+    if settings.workers_count > 1:
+        prepare_metrics_dir()
     uvicorn.run(
         "power_systems_data_api_demonstrator.src.application:get_app",
         workers=settings.workers_count,
@@ -20,6 +20,21 @@ class LogLevel(str, enum.Enum):  # noqa: WPS600
     FATAL = "FATAL"
 
 
+class GenerationBackend(str, enum.Enum):
+    """Where the generation endpoints read their time series from."""
+
+    sql = "sql"
+    memory = "memory"
+    parquet = "parquet"
+
+
+class QueryEngine(str, enum.Enum):
+    """The database the timeseries and capacity queries run on."""
+
+    sqlite = "sqlite"
+    duckdb = "duckdb"
+
+
 class Settings(BaseSettings):
     """
     Application settings.
@@ -42,7 +57,42 @@ class Settings(BaseSettings):
 
     # Variables for the database
     db_file: Path = Path(f"{DB_PATH}/db.sqlite3")
+    # The timeseries and capacity queries run on SQLite, or on a DuckDB copy
+    # of it at duckdb_file that the seeder writes
+    query_engine: QueryEngine = QueryEngine.sqlite
+    duckdb_file: Path = Path(f"{DB_PATH}/db.duckdb")
     db_echo: bool = False
+    # Connection pool shared by all requests of a worker
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    # How long a connection waits on a locked database, e.g. while seeding
+    db_busy_timeout: float = 300.0
+    # Directory holding the data files to seed (one directory per source and
+    # example/ with the metadata), the packaged data when unset
+    data_dir: Path | None = None
+    # Ingest changed data files when a worker starts. Can be turned off when
+    # seeding runs as a separate step (python -m ...src.api.seed).
+    seed_on_startup: bool = True
+    # Rows per executemany batch when bulk loading seed data
+    seed_batch_size: int = 10_000
+    # Processes parsing source files while seeding; 0 parses them in the
+    # seeding process and None uses one per CPU
+    seed_workers: int | None = None
+    # Rendered responses of the read endpoints kept per worker, and for how
+    # many seconds (None keeps them until the dataset version changes)
+    cache_maxsize: int = 256
+    cache_ttl: float | None = None
+    # How often a worker re-reads the dataset version written by the seeder
+    cache_version_interval: float = 5.0
+    # Generation is queried from SQLite per request ("sql"), served from
+    # NumPy arrays loaded from it at startup ("memory"), or read from a
+    # Parquet dataset the seeder writes to parquet_dir ("parquet")
+    generation_backend: GenerationBackend = GenerationBackend.sql
+    parquet_dir: Path = Path(f"{DB_PATH}/parquet")
+    # With several workers, where each one writes its request metrics for
+    # /metrics to sum them
+    metrics_dir: Path = Path(f"{DB_PATH}/metrics")
 
     @property
     def db_url(self) -> URL:
@@ -56,6 +106,18 @@ class Settings(BaseSettings):
             path=f"///{self.db_file}",
         )
 
+    @property
+    def db_async_url(self) -> URL:
+        """
+        Assemble the aiosqlite database URL from settings.
+
+        :return: async database URL.
+        """
+        return URL.build(
+            scheme="sqlite+aiosqlite",
+            path=f"///{self.db_file}",
+        )
+
     class Config:
         env_file = ".env"
         env_prefix = "POWER_SYSTEMS_DATA_API_DEMONSTRATOR_"
@@ -0,0 +1,165 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+An embedded DuckDB copy of the database for the analytical queries.
+
+DuckDB scans and sums columns in vectorized batches over all cores, which
+pays off on the queries summing many rows (resampling, parent PSRs, several
+PSRs at once), while SQLite answers small index lookups with less overhead.
+With the duckdb query engine the seeder copies every table to
+``duckdb_file`` and the timeseries and capacity queries run there. They are
+the same SQLAlchemy statements, compiled with the PostgreSQL dialect, whose
+SQL DuckDB understands.
+
+duckdb is imported on first use, so the SQLite engine does not need it.
+"""
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from sqlalchemy import (
+    Boolean,
+    Connection,
+    DateTime,
+    Enum,
+    Float,
+    Integer,
+    Select,
+    select,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from power_systems_data_api_demonstrator.settings import QueryEngine, settings
+from power_systems_data_api_demonstrator.src.api.cache import (
+    refresh_dataset_version,
+)
+from power_systems_data_api_demonstrator.src.api.db import driver_sql, fetch_frame
+from power_systems_data_api_demonstrator.src.api.metrics import record_rows, stage
+
+DIALECT = postgresql.dialect(paramstyle="qmark")
+# Table holding the dataset version the copy was made from
+VERSION_TABLE = "_version"
+# SQLite sorts NULL first, which the responses rely on for missing
+# technologies
+CONFIG = {"default_null_order": "nulls_first"}
+
+
+# DuckDB column types of the SQLAlchemy types, VARCHAR for the others
+COLUMN_TYPES = [
+    (DateTime, "TIMESTAMP"),
+    (Boolean, "BOOLEAN"),
+    (Integer, "BIGINT"),
+    (Float, "DOUBLE"),
+]
+
+
+def column_type(column: Any) -> str:
+    for column_class, duckdb_type in COLUMN_TYPES:
+        if isinstance(column.type, column_class):
+            return duckdb_type
+    return "VARCHAR"
+
+
+def copy_tables(connection: Connection, path: Path, version: str | None) -> None:
+    """
+    Copy every table of the SQLite ``connection`` to a new DuckDB file that
+    replaces ``path`` once complete.
+
+    The rows are read as the driver returns them and cast by DuckDB on
+    insert, e.g. the datetime text to TIMESTAMP. Enums stay as their stored
+    names.
+    """
+    import duckdb
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}-{uuid.uuid4().hex}")
+    with duckdb.connect(str(temp_path)) as duck:
+        for table in SQLModel.metadata.sorted_tables:
+            columns = ", ".join(
+                f'"{column.name}" {column_type(column)}' for column in table.columns
+            )
+            duck.execute(f'CREATE TABLE "{table.name}" ({columns})')
+            result = connection.exec_driver_sql(
+                *driver_sql(select(table), connection.dialect)
+            )
+            rows = pd.DataFrame(result.all(), columns=list(result.keys()))
+            if len(rows):
+                duck.register("rows", rows)
+                duck.execute(f'INSERT INTO "{table.name}" SELECT * FROM rows')
+                duck.unregister("rows")
+        duck.execute(f"CREATE TABLE {VERSION_TABLE} (version VARCHAR)")
+        duck.execute(f"INSERT INTO {VERSION_TABLE} VALUES (?)", [version])
+    os.replace(temp_path, path)
+
+
+def read_version(path: Path) -> str | None:
+    """The dataset version of the copy at ``path``, None if there is none."""
+    import duckdb
+
+    if not path.exists():
+        return None
+    with duckdb.connect(str(path), read_only=True) as duck:
+        row = duck.execute(f"SELECT version FROM {VERSION_TABLE}").fetchone()
+    return None if row is None else row[0]
+
+
+class AnalyticsDatabase:
+    """A read-only connection to the DuckDB copy, for one dataset version."""
+
+    def __init__(self) -> None:
+        self.connection: Any = None
+        self.version: str | None = None
+
+    def open(self, path: Path, version: str | None) -> None:
+        """(Re)connect when the dataset version changed."""
+        if self.connection is not None and self.version == version:
+            return
+        import duckdb
+
+        # Queries still running keep their own cursor on the old connection
+        self.connection = duckdb.connect(str(path), read_only=True, config=CONFIG)
+        self.version = version
+
+    def clear(self) -> None:
+        self.connection = None
+        self.version = None
+
+    def fetch_frame(self, statement: Select) -> pd.DataFrame:
+        """
+        Run ``statement`` and return the rows as a DataFrame, with the enum
+        columns read back as their enum members like SQLAlchemy does.
+        """
+        sql, params = driver_sql(statement, DIALECT)
+        # Datetimes are compared on the wall clock as stored, as in SQLite
+        params = tuple(
+            param.replace(tzinfo=None) if isinstance(param, datetime) else param
+            for param in params
+        )
+        cursor = self.connection.cursor()
+        try:
+            with stage("query"):
+                df = cursor.execute(sql, params).df()
+        finally:
+            cursor.close()
+        record_rows(len(df))
+        for column in statement.selected_columns:
+            if isinstance(column.type, Enum) and column.type.enum_class is not None:
+                members = {member.name: member for member in column.type.enum_class}
+                df[column.name] = df[column.name].map(members)
+        return df
+
+
+analytics_db = AnalyticsDatabase()
+
+
+async def fetch_query_frame(session: AsyncSession, statement: Select) -> pd.DataFrame:
+    """``fetch_frame`` on the configured query engine."""
+    if settings.query_engine is QueryEngine.sqlite:
+        return await fetch_frame(session, statement)
+    analytics_db.open(settings.duckdb_file, await refresh_dataset_version(session))
+    return await asyncio.to_thread(analytics_db.fetch_frame, statement)
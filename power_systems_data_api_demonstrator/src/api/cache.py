@@ -0,0 +1,143 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+In-process cache of serialized responses.
+
+The read endpoints only change when the data is seeded again, so their
+rendered bodies are kept in an LRU cache. Every entry belongs to a dataset
+version; when the seeder writes a new one the whole cache is dropped.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import UJSONResponse
+from fastapi.routing import serialize_response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from power_systems_data_api_demonstrator.settings import settings
+from power_systems_data_api_demonstrator.src.api.dataset import (
+    fetch_dataset_version,
+)
+from power_systems_data_api_demonstrator.src.api.metrics import stage
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    media_type: str
+    expires_at: float | None
+
+
+class ResponseCache:
+    """LRU cache of response bodies with an optional time to live."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self.version: str | None = None
+        self.version_checked_at = float("-inf")
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None and (
+            entry.expires_at is None or entry.expires_at > time.monotonic()
+        ):
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry
+        if entry is not None:
+            del self._entries[key]
+        self.stats.misses += 1
+        return None
+
+    def put(self, key: str, body: bytes, media_type: str) -> CachedResponse:
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        entry = CachedResponse(body=body, media_type=media_type, expires_at=expires_at)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        return entry
+
+    def set_version(self, version: str | None) -> None:
+        """Drop every entry when the dataset version changed."""
+        self.version_checked_at = time.monotonic()
+        if version != self.version:
+            self.version = version
+            if self._entries:
+                self._entries.clear()
+                self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.version = None
+        self.version_checked_at = float("-inf")
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            **asdict(self.stats),
+        }
+
+
+response_cache = ResponseCache(settings.cache_maxsize, settings.cache_ttl)
+
+
+async def refresh_dataset_version(session: AsyncSession) -> str | None:
+    """
+    The current dataset version, read from the database at most once per
+    ``cache_version_interval`` so that a seed run by another process is
+    picked up.
+    """
+    checked_at = response_cache.version_checked_at
+    if time.monotonic() - checked_at >= settings.cache_version_interval:
+        response_cache.set_version(await fetch_dataset_version(session))
+    return response_cache.version
+
+
+def cache_key(request: Request) -> str:
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+async def render(request: Request, content: Any) -> Any:
+    """Serialize ``content`` the way FastAPI does for the route's response model."""
+    route = request.scope.get("route")
+    field = getattr(route, "response_field", None)
+    if field is None:
+        return jsonable_encoder(content)
+    return await serialize_response(field=field, response_content=content)
+
+
+async def cached_response(
+    request: Request,
+    session: AsyncSession,
+    build: Callable[[], Awaitable[Any]],
+) -> Response:
+    """Serve the rendered response from the cache, building it on a miss."""
+    await refresh_dataset_version(session)
+    key = cache_key(request)
+    entry = response_cache.get(key)
+    if entry is None:
+        content = await build()
+        with stage("serialize"):
+            response = UJSONResponse(await render(request, content))
+        entry = response_cache.put(key, bytes(response.body), response.media_type)
+    return Response(content=entry.body, media_type=entry.media_type)
@@ -0,0 +1,133 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Conditional GET for the read endpoints.
+
+A response is determined by the dataset version and the request, so its
+ETag is a digest of both and can be computed before any query runs. A
+request whose If-None-Match matches gets ``304 Not Modified`` straight from
+the router dependency, without touching the data. Before the data is
+seeded there is no dataset version, and no ETag either.
+"""
+import hashlib
+from datetime import datetime
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.param_functions import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from power_systems_data_api_demonstrator.src.api.cache import (
+    refresh_dataset_version,
+)
+from power_systems_data_api_demonstrator.src.api.db import get_async_session
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str, cache_control: str | None) -> None:
+        super().__init__(etag)
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+def normalize_param(value: str) -> str:
+    """
+    Datetimes compare as the queries compare them: as wall-clock times, the
+    offset they were sent with dropped, not converted.
+    """
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    return parsed.replace(tzinfo=None).isoformat()
+
+
+def make_etag(version: str, request: Request) -> str:
+    # Repeated parameters keep their order, which the response may follow
+    params = sorted(
+        (
+            (name, normalize_param(value))
+            for name, value in request.query_params.multi_items()
+        ),
+        key=lambda param: param[0],
+    )
+    digest = hashlib.sha256(
+        repr(
+            (version, request.url.path, params, request.headers.get("accept"))
+        ).encode()
+    )
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def if_none_match(request: Request) -> set[str]:
+    header = request.headers.get("if-none-match", "")
+    # If-None-Match uses the weak comparison, so W/ tags match too
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag}
+
+
+class ConditionalGet:
+    """
+    Router dependency answering conditional GETs.
+
+    ``cache_control`` is sent with every response of the router, 304s
+    included.
+    """
+
+    def __init__(self, cache_control: str | None = None) -> None:
+        self.cache_control = cache_control
+
+    async def __call__(
+        self,
+        request: Request,
+        session: AsyncSession = Depends(get_async_session),
+    ) -> None:
+        version = await refresh_dataset_version(session)
+        if version is None:
+            return
+        etag = make_etag(version, request)
+        tags = if_none_match(request)
+        if etag in tags or "*" in tags:
+            raise NotModified(etag, self.cache_control)
+        request.state.etag = etag
+        request.state.cache_control = self.cache_control
+
+
+def not_modified_response(etag: str, cache_control: str | None) -> Response:
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if cache_control is not None:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
+
+
+async def not_modified_handler(request: Request, exc: Exception) -> Response:
+    assert isinstance(exc, NotModified)
+    return not_modified_response(exc.etag, exc.cache_control)
+
+
+class ConditionalGetMiddleware:
+    """Adds the ETag and Cache-Control chosen by ConditionalGet to 200s."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            state: dict[str, Any] = scope.get("state", {})
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] == 200
+                and "etag" in state
+            ):
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = state["etag"]
+                headers.add_vary_header("Accept")
+                if state.get("cache_control") is not None:
+                    headers["Cache-Control"] = state["cache_control"]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
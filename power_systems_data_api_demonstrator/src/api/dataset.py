@@ -0,0 +1,34 @@
+# SPDX-License-Identifier: Apache-2.0
+"""The version of the seeded dataset, which read caches are keyed on."""
+import hashlib
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import Field, Session, SQLModel, select
+
+
+class DatasetVersion(SQLModel, table=True):
+    """A single row, rewritten by every seeding run that changes the data."""
+
+    id: int = Field(default=1, primary_key=True)
+    version: str
+    seeded_at: datetime
+
+
+def dataset_version(digests: dict[str, str]) -> str:
+    """Version of the data seeded from files with the given digests."""
+    lines = (f"{path}:{digest}" for path, digest in sorted(digests.items()))
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()[:16]
+
+
+def write_dataset_version(session: Session, version: str) -> None:
+    session.merge(DatasetVersion(version=version, seeded_at=datetime.now(timezone.utc)))
+
+
+def read_dataset_version(session: Session) -> str | None:
+    return session.exec(select(DatasetVersion.version)).one_or_none()
+
+
+async def fetch_dataset_version(session: AsyncSession) -> str | None:
+    result = await session.execute(select(DatasetVersion.version))
+    return result.scalar_one_or_none()
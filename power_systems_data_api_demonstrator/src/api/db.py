@@ -1,21 +1,237 @@
-import os
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+from sqlalchemy import Select, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlmodel import Session, create_engine
 
-from sqlmodel import Session, SQLModel, create_engine
 from power_systems_data_api_demonstrator.settings import settings
+from power_systems_data_api_demonstrator.src.api.metrics import (
+    record_rows,
+    record_stage,
+    stage,
+)
+
+logger = logging.getLogger(__name__)
+
+# Applied to every new SQLite connection. WAL lets readers run concurrently
+# with the seeding writer.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+}
+
+_engine: Engine | None = None
+_async_engine: AsyncEngine | None = None
+_async_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+
+@dataclass
+class PoolStats:
+    """Counters collected by an instrumented connection pool."""
+
+    connects: int = 0
+    checkouts: int = 0
+    checkins: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+
+class TimedPoolMixin:
+    """Records how long callers wait to get a connection out of the pool."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()  # type: ignore[misc]
+        finally:
+            wait = time.perf_counter() - start
+            self.stats.record_wait(wait)
+            record_stage("session", wait)
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def instrument_engine(engine: Engine) -> Engine:
+    """Set the SQLite pragmas on connect and count pool events."""
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+
+    def count(name: str) -> Any:
+        def listener(*args: Any) -> None:
+            stats = getattr(engine.pool, "stats", None)
+            if stats is not None:
+                setattr(stats, name, getattr(stats, name) + 1)
+
+        return listener
+
+    event.listen(engine, "connect", count("connects"))
+    event.listen(engine, "checkout", count("checkouts"))
+    event.listen(engine, "checkin", count("checkins"))
+    return engine
+
+
+def pool_status(engine: Engine) -> dict[str, Any]:
+    """Snapshot of the pool occupancy and the collected counters."""
+    pool = engine.pool
+    status: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(vars(stats))
+    return status
+
+
+def create_db_engine() -> Engine:
+    engine = create_engine(
+        str(settings.db_url),
+        echo=settings.db_echo,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": settings.db_busy_timeout,
+        },
+    )
+    return instrument_engine(engine)
 
 
-def get_engine():
-    return create_engine(str(settings.db_url), echo=False)
+def get_engine() -> Engine:
+    """Process-wide engine, built on first use (normally at startup)."""
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine()
+    return _engine
 
 
-def init_db():
-    engine = get_engine()
-    SQLModel.metadata.drop_all(engine)
-    SQLModel.metadata.create_all(engine)
+def dispose_engine() -> None:
+    global _engine
+    if _engine is not None:
+        logger.info("Database pool status: %s", pool_status(_engine))
+        _engine.dispose()
+        _engine = None
+
+
+def create_db_async_engine() -> AsyncEngine:
+    engine = create_async_engine(
+        str(settings.db_async_url),
+        echo=settings.db_echo,
+        poolclass=TimedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        connect_args={"timeout": settings.db_busy_timeout},
+    )
+    instrument_engine(engine.sync_engine)
     return engine
 
 
+def get_async_engine() -> AsyncEngine:
+    """Process-wide async engine, built on first use (normally at startup)."""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        _async_engine = create_db_async_engine()
+        _async_session_factory = async_sessionmaker(
+            _async_engine, expire_on_commit=False
+        )
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        logger.info(
+            "Async database pool status: %s", pool_status(_async_engine.sync_engine)
+        )
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+
 def get_session():
-    engine = get_engine()
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        yield session
+
+
+async def get_async_session():
+    get_async_engine()
+    async with _async_session_factory() as session:
         yield session
+
+
+async def fetch_frame(session: AsyncSession, statement: Select) -> pd.DataFrame:
+    """
+    Run a column-projected select and return the rows as a DataFrame.
+
+    The rows come back as plain tuples, so no ORM entity is built or
+    tracked in the identity map.
+    """
+    with stage("query"):
+        result = await session.execute(statement)
+        rows = result.all()
+    record_rows(len(rows))
+    return pd.DataFrame(rows, columns=list(result.keys()))
+
+
+def driver_sql(statement: Select, dialect: Any) -> tuple[str, tuple[Any, ...]]:
+    """The SQL and positional parameters of ``statement`` for exec_driver_sql."""
+    compiled = statement.compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True}
+    )
+    params = compiled.construct_params()
+    return str(compiled), tuple(params[name] for name in compiled.positiontup)
+
+
+async def fetch_raw_frame(session: AsyncSession, statement: Select) -> pd.DataFrame:
+    """
+    Like ``fetch_frame``, but the values skip SQLAlchemy's result processing
+    and come back as the driver returns them, e.g. DateTime columns as text
+    to be parsed a column at a time. Meant for bulk reads.
+    """
+    connection = await session.connection()
+    with stage("query"):
+        result = await connection.exec_driver_sql(
+            *driver_sql(statement, connection.dialect)
+        )
+        rows = result.all()
+    record_rows(len(rows))
+    return pd.DataFrame(rows, columns=list(result.keys()))
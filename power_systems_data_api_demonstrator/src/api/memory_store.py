@@ -0,0 +1,237 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Generation time series held in memory as NumPy arrays.
+
+Each PSR has a sorted array of interval starts, as int64 microseconds since
+the epoch, the timezone of each interval, and a float64 matrix with a row
+per interval and a column per fuel source. As in the database, an interval
+is its start, end and timezone, so rows in different timezones are kept
+apart. A range query is two ``searchsorted`` calls and a slice, and
+the interval totals are row sums over the slice, so a request is answered
+without a database round trip. The series are loaded from the database,
+already summed over each PSR's descendants, and reloaded when the dataset
+version changes. A series holds its values in one unit, the one its rows
+share or MWh when they mix units.
+"""
+import asyncio
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from power_systems_data_api_demonstrator.src.api.units import (
+    ENERGY_UNIT,
+    common_unit,
+    convert,
+)
+
+FuelSource = tuple[str, str | None]
+
+
+def epoch_us(value: datetime) -> np.int64:
+    """
+    A query bound in the microseconds of the series.
+
+    Stored datetimes are compared on their wall clock, as SQLite does.
+    """
+    return np.datetime64(value.replace(tzinfo=None), "us").astype(np.int64)
+
+
+def fuel_source_order(fuel_source: FuelSource) -> tuple[str, bool, str]:
+    # Sorted like the SQL path, which puts a missing technology first
+    type, technology = fuel_source
+    return type, technology is not None, technology or ""
+
+
+@dataclass(frozen=True)
+class GenerationSeries:
+    """The generation of one PSR, a row per interval and a column per fuel source."""
+
+    starts: np.ndarray
+    ends: np.ndarray
+    fuel_sources: list[FuelSource]
+    # NaN where the fuel source has no row in the interval
+    values: np.ndarray
+    timezones: np.ndarray
+    unit: str
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "GenerationSeries":
+        """
+        Pivot the long-format rows of one PSR, summing the rows of a cell
+        once converted to the unit of the series.
+        """
+        starts = df["start_datetime"].to_numpy("datetime64[us]").astype(np.int64)
+        ends = df["end_datetime"].to_numpy("datetime64[us]").astype(np.int64)
+        timezone_codes, timezones = pd.factorize(df["timezone"], sort=True)
+        intervals, interval_codes = np.unique(
+            np.column_stack([starts, ends, timezone_codes]),
+            axis=0,
+            return_inverse=True,
+        )
+
+        type_codes, types = pd.factorize(df["type"])
+        technology_codes, technologies = pd.factorize(df["technology"])
+        # A missing technology has the code -1, so 0 in the combined code
+        width = len(technologies) + 1
+        fuel_codes, fuel_keys = pd.factorize(type_codes * width + technology_codes + 1)
+        fuel_sources = [
+            (
+                types[key // width],
+                technologies[key % width - 1] if key % width else None,
+            )
+            for key in fuel_keys.tolist()
+        ]
+        order = sorted(
+            range(len(fuel_sources)), key=lambda i: fuel_source_order(fuel_sources[i])
+        )
+        rank = np.empty(len(order), dtype=np.intp)
+        rank[order] = np.arange(len(order))
+
+        unit = common_unit(df["unit"], ENERGY_UNIT)
+        weights = convert(df["value"].to_numpy(dtype=float), df["unit"], unit)
+        shape = (len(intervals), len(fuel_sources))
+        cells = interval_codes.ravel() * shape[1] + rank[fuel_codes]
+        counts = np.bincount(cells, minlength=shape[0] * shape[1])
+        sums = np.bincount(cells, weights=weights, minlength=len(counts))
+        values = np.where(counts > 0, sums, np.nan).reshape(shape)
+        return cls(
+            starts=intervals[:, 0].copy(),
+            ends=intervals[:, 1].copy(),
+            fuel_sources=[fuel_sources[i] for i in order],
+            values=values,
+            timezones=np.asarray(timezones, dtype=object)[intervals[:, 2]],
+            unit=unit,
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def between(self, start: datetime, end: datetime) -> "GenerationSeries":
+        """The intervals starting at or after ``start`` and ending by ``end``."""
+        start_us, end_us = epoch_us(start), epoch_us(end)
+        first = np.searchsorted(self.starts, start_us, side="left")
+        last = np.searchsorted(self.starts, end_us, side="right")
+        keep = np.flatnonzero(self.ends[first:last] <= end_us) + first
+        if len(keep) == last - first:
+            keep = slice(first, last)
+        return replace(
+            self,
+            starts=self.starts[keep],
+            ends=self.ends[keep],
+            values=self.values[keep],
+            timezones=self.timezones[keep],
+        )
+
+    def buckets(self, unit: str) -> "GenerationSeries":
+        """
+        The intervals summed per calendar bucket of the NumPy datetime
+        ``unit`` (h, D, M or Y) they start in.
+        """
+        if not len(self):
+            return self
+        keys = self.starts.astype("datetime64[us]").astype(f"datetime64[{unit}]")
+        timezone_codes, _ = pd.factorize(self.timezones, sort=True)
+        values, timezones = self.values, self.timezones
+        if timezone_codes.any():
+            # The intervals of a bucket in each timezone are summed apart
+            order = np.lexsort((timezone_codes, keys))
+            keys, timezone_codes = keys[order], timezone_codes[order]
+            values, timezones = values[order], timezones[order]
+        # The starts are sorted, so each bucket is a contiguous run of rows
+        changes = (np.diff(keys) != np.timedelta64(0)) | (np.diff(timezone_codes) != 0)
+        bounds = np.concatenate(([0], np.flatnonzero(changes) + 1))
+        buckets = keys[bounds]
+        counts = np.add.reduceat((~np.isnan(values)).astype(int), bounds)
+        values = np.add.reduceat(np.nan_to_num(values), bounds)
+        values[counts == 0] = np.nan
+        return replace(
+            self,
+            starts=buckets.astype("datetime64[us]").astype(np.int64),
+            ends=(buckets + 1).astype("datetime64[us]").astype(np.int64),
+            values=values,
+            timezones=timezones[bounds],
+        )
+
+    def in_unit(self, unit: str) -> "GenerationSeries":
+        """The series with its values converted to ``unit``."""
+        return replace(self, values=convert(self.values, self.unit, unit), unit=unit)
+
+    def totals(self) -> np.ndarray:
+        """Generation of every interval over all fuel sources."""
+        return np.nansum(self.values, axis=1)
+
+    def cells(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Interval boundaries into the cells holding a value, and the row and
+        column of each cell, in row order.
+        """
+        rows, columns = np.nonzero(~np.isnan(self.values))
+        bounds = np.searchsorted(rows, np.arange(len(self) + 1))
+        return bounds, rows, columns
+
+    def frame(self) -> pd.DataFrame:
+        """The cells holding a value as long-format rows, in row order."""
+        _, rows, columns = self.cells()
+        fuel_sources = np.array(self.fuel_sources, dtype=object).reshape(-1, 2)
+        return pd.DataFrame(
+            {
+                "start_datetime": self.starts[rows].astype("datetime64[us]"),
+                "end_datetime": self.ends[rows].astype("datetime64[us]"),
+                "type": fuel_sources[columns, 0],
+                "technology": fuel_sources[columns, 1],
+                "value": self.values[rows, columns],
+                "timezone": self.timezones[rows],
+            }
+        )
+
+
+class GenerationStore:
+    """The generation series of every PSR, for one dataset version."""
+
+    def __init__(self) -> None:
+        self.series: dict[str, GenerationSeries] = {}
+        self.version: str | None = None
+        self.loaded = False
+        self.lock = asyncio.Lock()
+
+    def load(self, df: pd.DataFrame, version: str | None) -> None:
+        """
+        Replace the series with the rows of ``df``, grouped by PSR id. The
+        datetimes can be given as text, as SQLite stores them.
+        """
+        df = df.assign(
+            start_datetime=pd.to_datetime(df["start_datetime"]),
+            end_datetime=pd.to_datetime(df["end_datetime"]),
+        )
+        self.series = {
+            psr_id: GenerationSeries.from_frame(rows)
+            for psr_id, rows in df.groupby("id", sort=False)
+        }
+        self.version = version
+        self.loaded = True
+
+    def clear(self) -> None:
+        self.series = {}
+        self.version = None
+        self.loaded = False
+
+    def is_current(self, version: str | None) -> bool:
+        return self.loaded and self.version == version
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded": self.loaded,
+            "psrs": len(self.series),
+            "intervals": sum(len(series) for series in self.series.values()),
+            "bytes": sum(
+                series.values.nbytes + series.starts.nbytes + series.ends.nbytes
+                for series in self.series.values()
+            ),
+        }
+
+
+generation_store = GenerationStore()
@@ -1,14 +1,16 @@
 from typing import Optional, Sequence
 
-import pandas as pd
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from fastapi.param_functions import Depends
 from pydantic import BaseModel
-from sqlmodel import Field, Session, SQLModel, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import Field, SQLModel, select
 
-from power_systems_data_api_demonstrator.src.api.db import get_session
+from power_systems_data_api_demonstrator.src.api.cache import cached_response
+from power_systems_data_api_demonstrator.src.api.db import get_async_session
+from power_systems_data_api_demonstrator.src.api.metrics import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 class TopologyLevel(SQLModel, table=True):
@@ -28,13 +30,18 @@ class TopologyLevelsResponse(BaseModel):
 @router.get(
     "/topology-levels",
     summary="TOPOLOGY DESCRIPTION",
+    response_model=TopologyLevelsResponse,
 )
 async def get_topology_levels(
-    session: Session = Depends(get_session),
-) -> TopologyLevelsResponse:
-    result = session.execute(select(TopologyLevel))
-    topology_levels = result.scalars().all()
-    return TopologyLevelsResponse(topology_levels=topology_levels)
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    async def build() -> TopologyLevelsResponse:
+        result = await session.execute(select(TopologyLevel))
+        topology_levels = result.scalars().all()
+        return TopologyLevelsResponse(topology_levels=topology_levels)
+
+    return await cached_response(request, session, build)
 
 
 class FuelSourceType(SQLModel, table=True):
@@ -50,13 +57,18 @@ class FuelSourceTypesResponse(SQLModel):
 @router.get(
     "/fuel-source/types",
     summary="FUEL SOURCE TYPES",
+    response_model=FuelSourceTypesResponse,
 )
 async def get_fuel_source_types(
-    session: Session = Depends(get_session),
-) -> FuelSourceTypesResponse:
-    result = session.execute(select(FuelSourceType))
-    types = result.scalars().all()
-    return FuelSourceTypesResponse(types=types)
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    async def build() -> FuelSourceTypesResponse:
+        result = await session.execute(select(FuelSourceType))
+        types = result.scalars().all()
+        return FuelSourceTypesResponse(types=types)
+
+    return await cached_response(request, session, build)
 
 
 class FuelSourceTechnologyReference(SQLModel):
@@ -80,26 +92,32 @@ class FuelSourceTechnologyResponse(SQLModel):
 @router.get(
     "/fuel-source/technologies",
     summary="FUEL SOURCE TECHNOLOGIES",
+    response_model=FuelSourceTechnologyResponse,
 )
 async def get_fuel_source_technologies(
-    session: Session = Depends(get_session),
-) -> FuelSourceTechnologyResponse:
-    result = session.execute(select(FuelSourceTechnologyReferenceTable))
-    technologies = result.scalars().all()
-    df = pd.DataFrame(g.dict() for g in technologies)
-    technologies = []
-    for index, row in df.iterrows():
-        technologies.append(
-            # FuelSourceTechnologyReferenceTable(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    async def build() -> FuelSourceTechnologyResponse:
+        result = await session.execute(
+            select(
+                FuelSourceTechnologyReferenceTable.name,
+                FuelSourceTechnologyReferenceTable.aibCode,
+                FuelSourceTechnologyReferenceTable.source_document,
+            )
+        )
+        technologies = [
             FuelSourceTechnology(
-                name=row["name"],
+                name=name,
                 externalReference=FuelSourceTechnologyReference(
-                    aibCode=row["aibCode"],
-                    source_document=row["source_document"],
+                    aibCode=aib_code, source_document=source_document
                 ),
             )
-        )
-    return FuelSourceTechnologyResponse(technologies=technologies)
+            for name, aib_code, source_document in result.all()
+        ]
+        return FuelSourceTechnologyResponse(technologies=technologies)
+
+    return await cached_response(request, session, build)
 
 
 # class FuelTypeDescription(BaseModel):
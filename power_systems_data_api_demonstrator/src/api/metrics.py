@@ -0,0 +1,269 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Request metrics in the Prometheus format.
+
+``MetricsMiddleware`` times every request and, per route, records its
+latency, the bytes of its response, the rows its queries read and the time
+spent in each stage of the request:
+
+- ``session``: waiting for a pooled database connection,
+- ``query``: running the queries (SQLite, DuckDB or Parquet),
+- ``transform``: reshaping the rows with pandas or NumPy,
+- ``validate``: building the pydantic response models, or the dicts shaped
+  like them that the generation endpoints return,
+- ``serialize``: encoding the response body.
+
+The stages are timed with ``stage`` where they happen, and add up on the
+``RequestMetrics`` of the request, held in a context variable that follows
+the request into the threads it uses. A stage running outside a request is
+not recorded.
+
+With several workers, each one writes its samples to
+``PROMETHEUS_MULTIPROC_DIR`` and ``/metrics`` sums those of all workers; the
+entrypoint sets it to ``metrics_dir``.
+"""
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
+from typing import Any, Callable, Coroutine, Iterator
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+# Route label of the requests no route matched, e.g. 404s and static files
+UNMATCHED_ROUTE = "unmatched"
+
+STAGE_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the end of its response.",
+    ["route", "method", "status"],
+    buckets=STAGE_BUCKETS,
+)
+STAGE_DURATION = Histogram(
+    "http_request_stage_duration_seconds",
+    "Time a request spent in a stage, summed over the stage's runs.",
+    ["route", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+RESPONSE_ROWS = Histogram(
+    "http_response_rows",
+    "Rows read by the queries of a request.",
+    ["route"],
+    buckets=(0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000),
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Bytes of a response body.",
+    ["route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000),
+)
+
+
+@dataclass
+class RequestMetrics:
+    """What a request measured of itself."""
+
+    stages: dict[str, float] = field(default_factory=dict)
+    rows: int = 0
+    # When the endpoint returned, the start of FastAPI's serialization
+    endpoint_returned_at: float | None = None
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+
+_request_metrics: ContextVar[RequestMetrics | None] = ContextVar(
+    "request_metrics", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Add the time spent in the block to the ``name`` stage of the request."""
+    metrics = _request_metrics.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_stage(name, time.perf_counter() - start)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    metrics = _request_metrics.get()
+    if metrics is not None:
+        metrics.add_stage(name, seconds)
+
+
+def record_rows(rows: int) -> None:
+    metrics = _request_metrics.get()
+    if metrics is not None:
+        metrics.rows += rows
+
+
+def route_label(scope: Scope) -> str:
+    """The path template of the matched route, keeping the label set small."""
+    return getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+
+
+# The label values are bounded by the routes, so their series are kept
+# rather than looked up again on every request
+@lru_cache(maxsize=None)
+def series(histogram: Histogram, *labels: str) -> Histogram:
+    return histogram.labels(*labels)
+
+
+def observe(
+    route: str,
+    method: str,
+    status: int,
+    seconds: float,
+    size: int,
+    metrics: RequestMetrics,
+) -> None:
+    series(REQUEST_DURATION, route, method, str(status)).observe(seconds)
+    for name, stage_seconds in metrics.stages.items():
+        series(STAGE_DURATION, route, name).observe(stage_seconds)
+    series(RESPONSE_ROWS, route).observe(metrics.rows)
+    series(RESPONSE_SIZE, route).observe(size)
+
+
+class MetricsMiddleware:
+    """Times every request and records its metrics once its response is sent."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_counting(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_counting)
+        finally:
+            _request_metrics.reset(token)
+            observe(
+                route_label(scope),
+                scope["method"],
+                status,
+                time.perf_counter() - start,
+                size,
+                metrics,
+            )
+
+
+def _mark_returned() -> None:
+    metrics = _request_metrics.get()
+    if metrics is not None:
+        metrics.endpoint_returned_at = time.perf_counter()
+
+
+def _timed_endpoint(call: Callable[..., Any]) -> Callable[..., Any]:
+    """``call``, noting when it returns. Coroutine functions stay so."""
+    if asyncio.iscoroutinefunction(call):
+
+        @wraps(call)
+        async def timed_async(**kwargs: Any) -> Any:
+            try:
+                return await call(**kwargs)
+            finally:
+                _mark_returned()
+
+        return timed_async
+
+    @wraps(call)
+    def timed(**kwargs: Any) -> Any:
+        try:
+            return call(**kwargs)
+        finally:
+            _mark_returned()
+
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    Route recording, as the ``serialize`` stage, the time FastAPI takes to
+    validate and encode what the endpoint returned into the response body.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        # The parameters were already read from the endpoint's signature
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response = await handler(request)
+            metrics = _request_metrics.get()
+            if metrics is not None and metrics.endpoint_returned_at is not None:
+                record_stage(
+                    "serialize", time.perf_counter() - metrics.endpoint_returned_at
+                )
+                metrics.endpoint_returned_at = None
+            return response
+
+        return timed_handler
+
+
+def metrics_registry() -> CollectorRegistry:
+    """The registry of this worker, or one summing every worker's samples."""
+    if MULTIPROC_DIR_ENV not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_response() -> Response:
+    return Response(
+        content=generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST
+    )
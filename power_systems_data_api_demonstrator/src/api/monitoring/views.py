@@ -0,0 +1,59 @@
+from typing import Any
+
+from fastapi import APIRouter, Response
+
+from power_systems_data_api_demonstrator.src.api.cache import response_cache
+from power_systems_data_api_demonstrator.src.api.memory_store import generation_store
+from power_systems_data_api_demonstrator.src.api.metrics import metrics_response
+from power_systems_data_api_demonstrator.src.api.db import (
+    get_async_engine,
+    get_engine,
+    pool_status,
+)
+
+router = APIRouter()
+# Served at the root, where Prometheus scrapes by default
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """
+    Request metrics of every worker, in the Prometheus text format.
+
+    :return: latency, stage, row and size histograms by route.
+    """
+    return metrics_response()
+
+
+@router.get("/pool", include_in_schema=False)
+async def get_pool_status() -> dict[str, Any]:
+    """
+    Connection pool statistics of this worker.
+
+    :return: pool occupancy, checkouts, overflow and checkout wait time.
+    """
+    return {
+        "sync": pool_status(get_engine()),
+        "async": pool_status(get_async_engine().sync_engine),
+    }
+
+
+@router.get("/cache", include_in_schema=False)
+async def get_cache_status() -> dict[str, Any]:
+    """
+    Response cache statistics of this worker.
+
+    :return: dataset version, size, hits, misses, evictions and invalidations.
+    """
+    return response_cache.status()
+
+
+@router.get("/generation-store", include_in_schema=False)
+async def get_generation_store_status() -> dict[str, Any]:
+    """
+    In-memory generation store of this worker.
+
+    :return: dataset version, PSRs, intervals and bytes held.
+    """
+    return generation_store.status()
@@ -0,0 +1,183 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Generation time series stored as a Parquet dataset.
+
+The dataset is partitioned by source and PSR, one file per partition
+(``generation/source=EIA/id=US-WECC-CISO/part-0.parquet``), with the rows
+sorted by start_datetime and split into row groups. A query opens the files
+memory-mapped, skips the partitions of other PSRs and, from the row group
+statistics, the row groups outside the range, and reads only the columns it
+needs. The seeder writes the partitions of the PSRs whose generation changed.
+
+pyarrow is imported on first use, so the other backends do not need it.
+"""
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import quote
+
+import pandas as pd
+
+from power_systems_data_api_demonstrator.src.api.metrics import record_rows, stage
+
+# Rows per row group; the unit of predicate pushdown on start_datetime
+ROW_GROUP_SIZE = 8_192
+# Written last by an export, with the dataset version the files belong to
+VERSION_FILE = "_version"
+
+COLUMNS = [
+    "type",
+    "technology",
+    "value",
+    "start_datetime",
+    "end_datetime",
+    "timezone",
+    "unit",
+]
+
+
+def generation_root(root: Path) -> Path:
+    return root / "generation"
+
+
+def partition_dir(root: Path, source: str, psr_id: str) -> Path:
+    return (
+        generation_root(root)
+        / f"source={quote(source, safe='')}"
+        / f"id={quote(psr_id, safe='')}"
+    )
+
+
+def schema() -> Any:
+    import pyarrow as pa
+
+    return pa.schema(
+        [
+            ("type", pa.dictionary(pa.int32(), pa.string())),
+            ("technology", pa.dictionary(pa.int32(), pa.string())),
+            ("value", pa.float64()),
+            ("start_datetime", pa.timestamp("us")),
+            ("end_datetime", pa.timestamp("us")),
+            ("timezone", pa.dictionary(pa.int32(), pa.string())),
+            ("unit", pa.dictionary(pa.int32(), pa.string())),
+        ]
+    )
+
+
+def read_version(root: Path) -> str | None:
+    try:
+        return (root / VERSION_FILE).read_text()
+    except FileNotFoundError:
+        return None
+
+
+def write_version(root: Path, version: str) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    (root / VERSION_FILE).write_text(version)
+
+
+def clear(root: Path) -> None:
+    shutil.rmtree(generation_root(root), ignore_errors=True)
+    (root / VERSION_FILE).unlink(missing_ok=True)
+
+
+def remove_psrs(root: Path, psr_ids: Iterable[str]) -> None:
+    """Remove the partitions of ``psr_ids``, under whichever source."""
+    names = {f"id={quote(psr_id, safe='')}" for psr_id in psr_ids}
+    for source_dir in generation_root(root).glob("source=*"):
+        for psr_dir in source_dir.iterdir():
+            if psr_dir.name in names:
+                shutil.rmtree(psr_dir)
+
+
+def write_psr(root: Path, source: str, psr_id: str, df: pd.DataFrame) -> None:
+    """
+    Write the generation rows of one PSR as its partition.
+
+    The file is written next to its final name and renamed over it, so
+    readers see either the old rows or the new ones.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = partition_dir(root, source, psr_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    df = df.sort_values(["start_datetime", "end_datetime"], kind="stable")
+    table = pa.Table.from_pandas(df[COLUMNS], schema=schema(), preserve_index=False)
+    temp_path = directory / f".part-{uuid.uuid4().hex}.parquet"
+    pq.write_table(table, temp_path, row_group_size=ROW_GROUP_SIZE)
+    os.replace(temp_path, directory / "part-0.parquet")
+
+
+class ParquetDataset:
+    """The generation dataset as a reader sees it, for one dataset version."""
+
+    def __init__(self) -> None:
+        self.dataset: Any = None
+        self.version: str | None = None
+        self.opened = False
+
+    def open(self, root: Path, version: str | None) -> None:
+        """(Re)discover the partition files when the dataset version changed."""
+        if self.opened and self.version == version:
+            return
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        directory = generation_root(root)
+        self.dataset = None
+        if directory.is_dir():
+            self.dataset = ds.dataset(
+                str(directory),
+                format="parquet",
+                partitioning=ds.partitioning(
+                    pa.schema([("source", pa.string()), ("id", pa.string())]),
+                    flavor="hive",
+                ),
+                filesystem=fs.LocalFileSystem(use_mmap=True),
+                exclude_invalid_files=True,
+            )
+        self.version = version
+        self.opened = True
+
+    def clear(self) -> None:
+        self.dataset = None
+        self.version = None
+        self.opened = False
+
+    def read(
+        self, psr_ids: list[str], start_datetime: datetime, end_datetime: datetime
+    ) -> pd.DataFrame:
+        """
+        The rows of ``psr_ids`` starting at or after ``start_datetime`` and
+        ending by ``end_datetime``, compared on the wall clock as stored.
+        """
+        if self.dataset is None or not psr_ids:
+            return pd.DataFrame(columns=["id", *COLUMNS])
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        start = pa.scalar(start_datetime.replace(tzinfo=None), pa.timestamp("us"))
+        end = pa.scalar(end_datetime.replace(tzinfo=None), pa.timestamp("us"))
+        with stage("query"):
+            table = self.dataset.to_table(
+                columns=["id", *COLUMNS],
+                filter=(
+                    ds.field("id").isin(psr_ids)
+                    & (ds.field("start_datetime") >= start)
+                    & (ds.field("end_datetime") <= end)
+                ),
+            )
+            df = table.to_pandas()
+            # Dictionary columns come back as categoricals
+            for column in ["type", "technology", "timezone", "unit"]:
+                df[column] = df[column].astype(object)
+        record_rows(len(df))
+        return df
+
+
+parquet_dataset = ParquetDataset()
@@ -1,14 +1,33 @@
 from enum import Enum
 from typing import Annotated, Optional, Sequence
 
+import numpy as np
 import pandas as pd
-from fastapi import APIRouter, Path, Query
+from fastapi import APIRouter, Path, Query, Request, Response
 from fastapi.param_functions import Depends
-from sqlmodel import Field, Session, SQLModel, select
-
-from power_systems_data_api_demonstrator.src.api.db import get_session
+from sqlalchemy import Index, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import Field, SQLModel, select
+
+from power_systems_data_api_demonstrator.src.api.analytics_db import fetch_query_frame
+from power_systems_data_api_demonstrator.src.api.cache import cached_response
+from power_systems_data_api_demonstrator.src.api.db import get_async_session
+from power_systems_data_api_demonstrator.src.api.metrics import TimedRoute, stage
+from power_systems_data_api_demonstrator.src.api.responses import (
+    TABLE_CONTENT,
+    TABLE_DESCRIPTION,
+    FastJSONResponse,
+    Payload,
+    table_media_type,
+    table_response,
+)
+from power_systems_data_api_demonstrator.src.api.units import (
+    POWER_UNIT,
+    common_unit,
+    convert,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 class PowerUnit(str, Enum):
@@ -21,6 +40,23 @@ class PSRList(SQLModel, table=True):
     id: str = Field(primary_key=True)
     level: int
     name: Optional[str]
+    parent: Optional[str] = Field(default=None, index=True)
+
+
+class PSRClosureTable(SQLModel, table=True):
+    """
+    Every (ancestor, descendant) pair of the PSR hierarchy, each PSR being
+    its own ancestor at depth 0.
+
+    ``counted`` marks the descendants whose generation makes up the
+    ancestor's: those with generation of their own and no such PSR between
+    them and the ancestor, so that nothing is counted twice.
+    """
+
+    ancestor: str = Field(primary_key=True)
+    descendant: str = Field(primary_key=True)
+    depth: int
+    counted: bool = False
 
 
 class PSRListResponse(SQLModel):
@@ -34,17 +70,22 @@ class PSRListReqest(SQLModel):
 @router.get(
     "/power-system-resource",
     summary="PSR LIST",
+    response_model=PSRListResponse,
 )
 async def get_psr_list(
+    request: Request,
     level: Annotated[Optional[int], Path(description="Filter by level")] | None = None,
-    session: Session = Depends(get_session),
-) -> PSRListResponse:
-    if level is None:
-        result = session.execute(select(PSRList))
-    else:
-        result = session.execute(select(PSRList).filter_by(level=level))
-    psr_list = result.scalars().all()
-    return PSRListResponse(psr_list=psr_list)
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    async def build() -> PSRListResponse:
+        if level is None:
+            result = await session.execute(select(PSRList))
+        else:
+            result = await session.execute(select(PSRList).filter_by(level=level))
+        psr_list = result.scalars().all()
+        return PSRListResponse(psr_list=psr_list)
+
+    return await cached_response(request, session, build)
 
 
 class PSR(SQLModel):
@@ -58,6 +99,9 @@ class PSRInterconnection(SQLModel):
 
 
 class PSRInterconnectionTable(PSRInterconnection, table=True):
+    # The primary key is (connectedPSR, id); lookups are by id.
+    __table_args__ = (Index("ix_psrinterconnection_id", "id", "connectedPSR"),)
+
     id: str = Field(primary_key=True)
     unit: PowerUnit
 
@@ -79,6 +123,11 @@ class Capacity(SQLModel):
 
 
 class CapacityTable(Capacity, table=True):
+    # The primary key is (startDatetime, id, type); lookups are by id.
+    __table_args__ = (
+        Index("ix_capacity_id_type_start", "id", "type", "startDatetime"),
+    )
+
     id: str = Field(primary_key=True)
     type: str = Field(primary_key=True)
     unit: PowerUnit
@@ -101,101 +150,195 @@ class FuelSourceCapacityResponse(SQLModel):
     capacity: Sequence[FuelSourceCapacity]
 
 
+def select_capacity(id: str) -> Select:
+    return (
+        select(
+            CapacityTable.id,
+            CapacityTable.unit,
+            CapacityTable.technology,
+            CapacityTable.type,
+            CapacityTable.value,
+            CapacityTable.startDatetime,
+            CapacityTable.endDatetime,
+        )
+        .filter(CapacityTable.id == id)
+        .order_by(CapacityTable.type, CapacityTable.startDatetime)
+    )
+
+
+def select_transmission_capacity(id: str) -> Select:
+    return (
+        select(
+            PSRInterconnectionTable.id,
+            PSRInterconnectionTable.unit,
+            PSRInterconnectionTable.connectedPSR,
+            PSRInterconnectionTable.value,
+        )
+        .filter(PSRInterconnectionTable.id == id)
+        .order_by(PSRInterconnectionTable.connectedPSR)
+    )
+
+
+def in_unit(df: pd.DataFrame, unit: PowerUnit) -> pd.DataFrame:
+    """The capacity rows of ``df`` with their values converted to ``unit``."""
+    values = df["value"].to_numpy(dtype=float)
+    return df.assign(value=convert(values, df["unit"], unit), unit=unit)
+
+
+def power_units(units: pd.Series) -> pd.Series:
+    return units.map({unit: unit.value for unit in PowerUnit})
+
+
+def capacity_table(df: pd.DataFrame) -> pd.DataFrame:
+    """The capacity rows as the flat rows of the columnar formats."""
+    return pd.DataFrame(
+        {
+            "start_datetime": df["startDatetime"],
+            "end_datetime": df["endDatetime"],
+            "id": df["id"],
+            "type": df["type"],
+            "technology": df["technology"],
+            "value": df["value"].astype(float),
+            "unit": power_units(df["unit"]),
+        }
+    )
+
+
+def optional_strings(column: pd.Series) -> np.ndarray:
+    """The values of ``column`` with None where they are missing."""
+    values = column.to_numpy(dtype=object, copy=True)
+    values[pd.isna(values)] = None
+    return values
+
+
+def capacity_payload(df: pd.DataFrame) -> Payload:
+    """
+    The FuelSourceCapacityResponse of the capacity rows of one PSR.
+
+    The rows are sorted by fuel source (unit, technology and type) with one
+    stable sort of their codes, after which every fuel source is a
+    contiguous slice of the columns, its capacities still in the order of
+    the query. No rows make an empty response.
+    """
+    if df.empty:
+        return {"capacity": []}
+    with stage("transform"):
+        keys = [power_units(df["unit"]), df["technology"], df["type"]]
+        codes = np.column_stack([pd.factorize(key, sort=True)[0] for key in keys])
+        # lexsort sorts by its last key first
+        order = np.lexsort(codes.T[::-1])
+        codes = codes[order]
+        changes = np.flatnonzero((codes[1:] != codes[:-1]).any(axis=1)) + 1
+        starts = np.concatenate(([0], changes)).tolist()
+        ends = np.concatenate((changes, [len(order)])).tolist()
+
+        units, technologies, types = (key.to_numpy()[order].tolist() for key in keys)
+        values = df["value"].to_numpy(dtype=float)[order].tolist()
+        start_dts = df["startDatetime"].to_numpy()[order].tolist()
+        end_dts = optional_strings(df["endDatetime"])[order].tolist()
+
+    with stage("validate"):
+        fuel_sources = [
+            {
+                "technology": technologies[first],
+                "type": types[first],
+                "unit": units[first],
+                "capacity": [
+                    {"value": value, "startDatetime": start, "endDatetime": end}
+                    for value, start, end in zip(
+                        values[first:last], start_dts[first:last], end_dts[first:last]
+                    )
+                ],
+            }
+            for first, last in zip(starts, ends)
+        ]
+    return {"capacity": [{"id": df["id"].iloc[0], "fuelSource": fuel_sources}]}
+
+
+def transmission_capacity_payload(df: pd.DataFrame) -> Payload:
+    """
+    The PSRCapacityResponse of the interconnection rows of one PSR, all in
+    one unit. No rows make an empty response.
+    """
+    if df.empty:
+        return {"capacity": []}
+    with stage("validate"):
+        connections = [
+            {"connectedPSR": connected_psr, "value": value}
+            for connected_psr, value in zip(
+                df["connectedPSR"].tolist(), df["value"].to_numpy(dtype=float).tolist()
+            )
+        ]
+    return {
+        "capacity": [
+            {
+                "id": df["id"].iloc[0],
+                "unit": PowerUnit(df["unit"].iloc[0]).value,
+                "transmissionCapacity": connections,
+            }
+        ]
+    }
+
+
+def transmission_capacity_table(df: pd.DataFrame) -> pd.DataFrame:
+    """The interconnection rows as the flat rows of the columnar formats."""
+    return pd.DataFrame(
+        {
+            "id": df["id"],
+            "connectedPSR": df["connectedPSR"],
+            "value": df["value"].astype(float),
+            "unit": power_units(df["unit"]),
+        }
+    )
+
+
 @router.get(
     "/power-system-resource/capacity",
     summary="PSR CAPACITY",
+    responses={200: {"content": TABLE_CONTENT, "description": TABLE_DESCRIPTION}},
 )
 async def get_psr_capacity(
+    request: Request,
     id: Annotated[str, Query(description="Filter by PSR")] = "US-WECC-CISO",
-    session: Session = Depends(get_session),
+    unit: Annotated[
+        PowerUnit | None,
+        Query(
+            description="Convert the capacities to this unit. By default "
+            "each fuel source is in the unit it is stored in."
+        ),
+    ] = None,
+    session: AsyncSession = Depends(get_async_session),
 ) -> FuelSourceCapacityResponse:
-    result = session.execute(select(CapacityTable).filter_by(id=id))
-    psr_capacity = result.scalars().all()
-    df = pd.DataFrame(g.dict() for g in psr_capacity)
-    print("This is the basic df")
-    print(df)
-    print(df.columns)
-
-    # colapse the data frame to a single row per id and unit
-    df_psr_capacity = (
-        df.groupby(["id", "unit", "technology", "type"])
-        .agg(
-            {
-                "value": lambda x: list(x),
-                "startDatetime": lambda x: list(x),
-                "endDatetime": lambda x: list(x),
-            }
-        )
-        .copy()
-        .reset_index()
-    )
-
-    print("This is after grouby")
-    print(df_psr_capacity.to_string())
-    print(df_psr_capacity.columns)
-
-    # print("this is psr capacity")
-    # print(df_psr_capacity)
-
-    psr_capacity = []
-    psr_capacity.append(
-        FuelSourceCapacity(
-            id=df_psr_capacity.loc[0, "id"],
-            fuelSource=[
-                FuelSource(
-                    technology=row["technology"],
-                    type=row["type"],
-                    unit=row["unit"],
-                    capacity=[
-                        Capacity(
-                            value=row["value"][i],
-                            startDatetime=row["startDatetime"][i],
-                            endDatetime=row["endDatetime"][i],
-                        )
-                        for i in range(len(row["startDatetime"]))
-                    ],
-                )
-                for index, row in df_psr_capacity.iterrows()
-            ],
-        )
-    )
-
-    return FuelSourceCapacityResponse(capacity=psr_capacity)
+    df = await fetch_query_frame(session, select_capacity(id))
+    if unit is not None:
+        df = in_unit(df, unit)
+    media_type = table_media_type(request)
+    if media_type is not None:
+        return table_response(capacity_table(df), media_type)
+    return FastJSONResponse(capacity_payload(df))
 
 
 @router.get(
     "/power-system-resource/transmission-capacity",
     summary="TRANSMISSION CAPACITY",
+    responses={200: {"content": TABLE_CONTENT, "description": TABLE_DESCRIPTION}},
 )
 async def get_psr_transmission_capacity(
+    request: Request,
     id: Annotated[str, Query(description="Filter by PSR")] = "US-WECC-CISO",
-    session: Session = Depends(get_session),
+    unit: Annotated[
+        PowerUnit | None,
+        Query(
+            description="Convert the capacities to this unit. By default "
+            "they are in the unit they are stored in, or in MW when they mix "
+            "units."
+        ),
+    ] = None,
+    session: AsyncSession = Depends(get_async_session),
 ) -> PSRCapacityResponse:
-    result = session.execute(select(PSRInterconnectionTable).filter_by(id=id))
-    psr_capacity = result.scalars().all()
-    df = pd.DataFrame(g.dict() for g in psr_capacity)
-    # colapse the data frame to a single row per id and unit
-    df_psr_interconnections = (
-        df.groupby(["id", "unit"])
-        .agg({"connectedPSR": lambda x: list(x), "value": lambda x: list(x)})
-        .reset_index()
-    )
-
-    number_of_interconnections = df_psr_interconnections["connectedPSR"].apply(len)[0]
-
-    psr_capacity = []
-    psr_capacity.append(
-        PSRCapacity(
-            id=df_psr_interconnections.loc[0, "id"],
-            unit=df_psr_interconnections.loc[0, "unit"],
-            transmissionCapacity=[
-                PSRInterconnection(
-                    connectedPSR=df_psr_interconnections["connectedPSR"].str[i][0],
-                    value=df_psr_interconnections["value"].str[i][0],
-                )
-                for i in range(number_of_interconnections)
-            ],
-        )
-    )
-
-    return PSRCapacityResponse(capacity=psr_capacity)
+    df = await fetch_query_frame(session, select_transmission_capacity(id))
+    df = in_unit(df, unit or PowerUnit(common_unit(df["unit"], POWER_UNIT)))
+    media_type = table_media_type(request)
+    if media_type is not None:
+        return table_response(transmission_capacity_table(df), media_type)
+    return FastJSONResponse(transmission_capacity_payload(df))
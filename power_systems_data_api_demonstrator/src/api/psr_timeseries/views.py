@@ -2,22 +2,95 @@ from pydantic import BaseModel
 from zoneinfo import ZoneInfo
 from fastapi import Path
 from fastapi import Query
-from typing import Annotated
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterator,
+    Sequence,
+)
+import numpy as np
+import orjson
 import pandas as pd
+from sqlalchemy import (
+    DateTime,
+    Index,
+    Row,
+    Select,
+    String,
+    Subquery,
+    case,
+    distinct,
+    exists,
+    func,
+    literal,
+    literal_column,
+    union_all,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 from sqlmodel import select
 
-from sqlmodel import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from enum import Enum
 from sqlmodel import Field
 from datetime import datetime
 from sqlmodel import SQLModel
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.param_functions import Depends
-from power_systems_data_api_demonstrator.src.api.db import get_session
+from sqlmodel import Session
+from power_systems_data_api_demonstrator.settings import (
+    GenerationBackend,
+    QueryEngine,
+    settings,
+)
+from power_systems_data_api_demonstrator.src.api.analytics_db import fetch_query_frame
+from power_systems_data_api_demonstrator.src.api.cache import (
+    refresh_dataset_version,
+)
+from power_systems_data_api_demonstrator.src.api.dataset import read_dataset_version
+from power_systems_data_api_demonstrator.src.api.memory_store import (
+    GenerationSeries,
+    GenerationStore,
+    generation_store,
+)
+from power_systems_data_api_demonstrator.src.api.parquet_store import parquet_dataset
+from power_systems_data_api_demonstrator.src.api.psr_metadata.views import (
+    PowerUnit,
+    PSRClosureTable,
+    PSRList,
+)
+from power_systems_data_api_demonstrator.src.api.db import (
+    driver_sql,
+    fetch_frame,
+    fetch_raw_frame,
+    get_async_session,
+    get_engine,
+)
+from power_systems_data_api_demonstrator.src.api.metrics import TimedRoute, stage
+from power_systems_data_api_demonstrator.src.api.units import (
+    ENERGY_UNIT,
+    common_unit,
+    convert,
+)
+from power_systems_data_api_demonstrator.src.api.responses import (
+    JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    TABLE_CONTENT,
+    TABLE_DESCRIPTION,
+    FastJSONResponse,
+    NDJSONResponse,
+    Payload,
+    accepts,
+    table_media_type,
+    table_response,
+)
 
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 class ElectricityUnit(str, Enum):
@@ -55,6 +128,23 @@ class GenerationByFuelSource(SQLModel):
 
 
 class GenerationByFuelSourceTable(GenerationByFuelSource, table=True):
+    # The primary key leads with type and technology, so it cannot range-scan
+    # a PSR by time. This index serves the generation query from the index
+    # alone; it also covers any lookup on its (id, start_datetime) prefix.
+    __table_args__ = (
+        Index(
+            "ix_generation_id_start_covering",
+            "id",
+            "start_datetime",
+            "end_datetime",
+            "type",
+            "technology",
+            "value",
+            "timezone",
+            "unit",
+        ),
+    )
+
     start_datetime: datetime = Field(primary_key=True)
     end_datetime: datetime = Field(primary_key=True)
     timezone: str = Field(default="UTC")
@@ -84,11 +174,976 @@ class GenerationRequest(SQLModel):
     end_datetime: datetime
 
 
+class LoadForecastTable(SQLModel, table=True):
+    id: str = Field(primary_key=True)
+    start_datetime: datetime = Field(primary_key=True)
+    end_datetime: datetime = Field(primary_key=True)
+    timezone: str = Field(default="UTC")
+    unit: ElectricityUnit
+    forecast: float | None
+    actual: float | None
+
+
+class ExchangeTable(SQLModel, table=True):
+    id: str = Field(primary_key=True)
+    connectedPSR: str = Field(primary_key=True)
+    start_datetime: datetime = Field(primary_key=True)
+    end_datetime: datetime = Field(primary_key=True)
+    timezone: str = Field(default="UTC")
+    # Sources publish exchanges as energy (MWh) or as power (MW)
+    unit: str
+    value: float
+
+
+class InstalledCapacityTable(SQLModel, table=True):
+    id: str = Field(primary_key=True)
+    type: str = Field(primary_key=True)
+    start_datetime: datetime = Field(primary_key=True)
+    end_datetime: datetime = Field(primary_key=True)
+    timezone: str = Field(default="UTC")
+    unit: PowerUnit
+    value: float
+
+
+INTERVAL_COLUMNS = ["start_datetime", "end_datetime", "timezone"]
+
+# Rows fetched per round trip when streaming from the server-side cursor
+STREAM_BATCH_SIZE = 1000
+
+# Columns read for a generation response, selected as plain tuples
+GENERATION_COLUMNS = (
+    GenerationByFuelSourceTable.id,
+    GenerationByFuelSourceTable.type,
+    GenerationByFuelSourceTable.technology,
+    GenerationByFuelSourceTable.value,
+    GenerationByFuelSourceTable.start_datetime,
+    GenerationByFuelSourceTable.end_datetime,
+    GenerationByFuelSourceTable.timezone,
+    GenerationByFuelSourceTable.unit,
+)
+
+
+def id_filter(column: Any, id: str | Sequence[str]) -> Any:
+    return column == id if isinstance(id, str) else column.in_(id)
+
+
+# Most selects SQLite allows in one compound select
+COMPOUND_SELECT_LIMIT = 500
+
+
+def psr_rows(ids: Sequence[str]) -> Subquery:
+    """``ids`` as the rows of an ancestor column."""
+    selects = [select(literal(id, String).label("ancestor")) for id in ids]
+    chunks = [
+        union_all(*selects[start : start + COMPOUND_SELECT_LIMIT]).subquery()
+        for start in range(0, len(selects), COMPOUND_SELECT_LIMIT)
+    ]
+    if len(chunks) == 1:
+        return chunks[0]
+    return union_all(*(select(chunk.c.ancestor) for chunk in chunks)).subquery()
+
+
+def counted_descendants(
+    table: type[SQLModel], id: str | Sequence[str] | None
+) -> Subquery:
+    """
+    The PSRs ``id`` (every PSR if None) as ancestor, with each of their
+    counted descendants as descendant.
+
+    A PSR with generation of its own is its only counted descendant, so this
+    is one primary key lookup in the closure table per PSR. A PSR the closure
+    table has no entries of, e.g. one stored without refreshing it, stands
+    for its own rows of ``table``.
+    """
+    closure = select(PSRClosureTable.ancestor, PSRClosureTable.descendant).filter(
+        PSRClosureTable.counted
+    )
+    if id is None:
+        psrs = select(table.id.label("ancestor")).distinct().subquery()
+    else:
+        closure = closure.filter(id_filter(PSRClosureTable.ancestor, id))
+        psrs = psr_rows([id] if isinstance(id, str) else id)
+    own = select(psrs.c.ancestor, psrs.c.ancestor.label("descendant")).filter(
+        ~exists().where(PSRClosureTable.ancestor == psrs.c.ancestor)
+    )
+    return union_all(closure, own).subquery("descendants")
+
+
+def from_descendants(
+    statement: Select, table: type[SQLModel], psrs: Subquery
+) -> Select:
+    """
+    Restrict ``statement`` to the rows of ``table`` making up the generation
+    of the PSRs of ``counted_descendants``, i.e. those of their counted
+    descendants.
+    """
+    return statement.select_from(table).join(psrs, psrs.c.descendant == table.id)
+
+
+def select_generation_sums(id: str | Sequence[str] | None = None) -> Select:
+    """
+    Generation of the PSRs ``id`` per fuel source and stored interval,
+    summed over their descendants.
+    """
+    table = GenerationByFuelSourceTable
+    psrs = counted_descendants(table, id)
+    statement = select(
+        psrs.c.ancestor.label("id"),
+        table.type,
+        table.technology,
+        func.sum(table.value).label("value"),
+        table.start_datetime,
+        table.end_datetime,
+        table.timezone,
+        table.unit,
+    )
+    # Ordered like the groups, which SQLite returns in that order anyway
+    keys = (
+        psrs.c.ancestor,
+        table.start_datetime,
+        table.end_datetime,
+        table.timezone,
+        table.unit,
+        table.type,
+        table.technology,
+    )
+    return from_descendants(statement.group_by(*keys).order_by(*keys), table, psrs)
+
+
+def in_range(
+    table: type[SQLModel], start_datetime: datetime, end_datetime: datetime
+) -> tuple[Any, ...]:
+    """
+    The rows of ``table`` whose interval lies within the range.
+
+    The bound on start_datetime at the end of the range follows from the
+    others, but closes the index range scanned on (id, start_datetime).
+    """
+    return (
+        table.start_datetime >= start_datetime,
+        table.start_datetime <= end_datetime,
+        table.end_datetime <= end_datetime,
+    )
+
+
+def select_generation(
+    id: str | Sequence[str], start_datetime: datetime, end_datetime: datetime
+) -> Select:
+    table = GenerationByFuelSourceTable
+    return select_generation_sums(id).filter(
+        *in_range(table, start_datetime, end_datetime)
+    )
+
+
+class Resolution(str, Enum):
+    hour = "PT1H"
+    day = "P1D"
+    month = "P1M"
+    year = "P1Y"
+
+
+RESOLUTION_ORDER = list(Resolution)
+
+# strftime format truncating a start datetime to the start of its bucket, and
+# the SQLite date modifier from there to the end of the bucket. The formats
+# match how DateTime columns are stored, so buckets compare with them.
+BUCKETS = {
+    Resolution.hour: ("%Y-%m-%d %H:00:00.000000", "+1 hour"),
+    Resolution.day: ("%Y-%m-%d 00:00:00.000000", "+1 day"),
+    Resolution.month: ("%Y-%m-01 00:00:00.000000", "+1 month"),
+    Resolution.year: ("%Y-01-01 00:00:00.000000", "+1 year"),
+}
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# The same buckets as NumPy datetime units, for the in-memory store
+NUMPY_BUCKETS = {
+    Resolution.hour: "h",
+    Resolution.day: "D",
+    Resolution.month: "M",
+    Resolution.year: "Y",
+}
+
+
+class GenerationRollup(SQLModel):
+    """
+    Generation summed per fuel source over a calendar bucket.
+
+    start_datetime is the start of the bucket. The intervals ending within
+    it are summed into a row ending with the bucket, the intervals running
+    past it into a row per end of theirs (see ``select_rollup``).
+    """
+
+    id: str = Field(primary_key=True)
+    start_datetime: datetime = Field(primary_key=True)
+    type: str = Field(primary_key=True)
+    technology: str | None = Field(primary_key=True, nullable=True)
+    end_datetime: datetime = Field(primary_key=True)
+    timezone: str = Field(default="UTC")
+    # Rows in different units are rolled up apart, converted when read
+    unit: ElectricityUnit = Field(primary_key=True)
+    value: float | None
+
+
+class GenerationDailyTable(GenerationRollup, table=True):
+    pass
+
+
+class GenerationMonthlyTable(GenerationRollup, table=True):
+    pass
+
+
+# Rollups maintained by the seeder, coarsest first
+ROLLUPS = {
+    Resolution.month: GenerationMonthlyTable,
+    Resolution.day: GenerationDailyTable,
+}
+
+
+class bucket_start(FunctionElement):
+    """
+    The start of the bucket of a resolution a stored datetime falls in.
+
+    SQLite truncates the stored text with strftime, other databases (DuckDB)
+    the timestamp with date_trunc.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+    def __init__(self, value: Any, resolution: Resolution) -> None:
+        super().__init__(value, literal_column(f"'{resolution.name}'"))
+
+    @property
+    def resolution(self) -> Resolution:
+        return Resolution[self.clauses.clauses[1].name.strip("'")]
+
+
+class bucket_end(bucket_start):
+    """The end of the bucket of a resolution a stored datetime falls in."""
+
+    inherit_cache = True
+
+
+@compiles(bucket_start)
+def _bucket_start(element: bucket_start, compiler: Any, **kw: Any) -> str:
+    value, unit = element.clauses
+    return compiler.process(func.date_trunc(unit, value), **kw)
+
+
+@compiles(bucket_end)
+def _bucket_end(element: bucket_end, compiler: Any, **kw: Any) -> str:
+    value, unit = element.clauses
+    start = compiler.process(func.date_trunc(unit, value), **kw)
+    return f"{start} + INTERVAL '1 {element.resolution.name}'"
+
+
+@compiles(bucket_start, "sqlite")
+def _sqlite_bucket_start(element: bucket_start, compiler: Any, **kw: Any) -> str:
+    bucket_format, _ = BUCKETS[element.resolution]
+    return compiler.process(
+        func.strftime(bucket_format, element.clauses.clauses[0]), **kw
+    )
+
+
+@compiles(bucket_end, "sqlite")
+def _sqlite_bucket_end(element: bucket_end, compiler: Any, **kw: Any) -> str:
+    bucket_format, bucket_length = BUCKETS[element.resolution]
+    bucket = func.strftime(bucket_format, element.clauses.clauses[0])
+    return compiler.process(
+        func.strftime("%Y-%m-%d %H:%M:%S.000000", bucket, bucket_length), **kw
+    )
+
+
+def is_aligned(value: datetime, resolution: Resolution) -> bool:
+    """Whether ``value`` starts a bucket of ``resolution``."""
+    bucket_format, _ = BUCKETS[resolution]
+    return value.strftime(bucket_format) == value.strftime(DATETIME_FORMAT)
+
+
+def generation_source(
+    start_datetime: datetime, end_datetime: datetime, resolution: Resolution
+) -> type[SQLModel]:
+    """
+    The coarsest table answering a bucketed query exactly.
+
+    A rollup can serve a resolution that is a multiple of its grain, for a
+    range that starts and ends on its bucket boundaries; anything else is
+    summed from the stored intervals.
+    """
+    for grain, table in ROLLUPS.items():
+        if (
+            RESOLUTION_ORDER.index(grain) <= RESOLUTION_ORDER.index(resolution)
+            and is_aligned(start_datetime, grain)
+            and is_aligned(end_datetime, grain)
+        ):
+            return table
+    return GenerationByFuelSourceTable
+
+
+def select_buckets(
+    table: type[SQLModel], resolution: Resolution, psr_id: Any = None
+) -> Select:
+    """
+    Rows of ``table`` summed per fuel source over buckets of ``resolution``.
+
+    Rows fall in the bucket their interval starts in, on the stored (UTC)
+    clock. The columns are those of ``select_generation``, with the bucket
+    boundaries as start_datetime and end_datetime. Rows are summed per
+    ``psr_id``, by default the id of ``table``.
+    """
+    if psr_id is None:
+        psr_id = table.id
+    bucket = bucket_start(table.start_datetime, resolution)
+    return (
+        select(
+            psr_id.label("id"),
+            table.type,
+            table.technology,
+            func.sum(table.value).label("value"),
+            bucket.label("start_datetime"),
+            bucket_end(table.start_datetime, resolution).label("end_datetime"),
+            table.timezone,
+            table.unit,
+        )
+        .group_by(
+            psr_id,
+            bucket,
+            table.timezone,
+            table.unit,
+            table.type,
+            table.technology,
+        )
+        .order_by(bucket, table.timezone, table.type, table.technology)
+    )
+
+
+def select_rollup(resolution: Resolution) -> Select:
+    """
+    Rows of the rollup of ``resolution``, summed from the stored intervals.
+
+    An interval falls in the bucket it starts in. Those running past the end
+    of their bucket are summed apart, by their own end, so that ``in_range``
+    keeps the same intervals of a rollup as of the stored ones: a query
+    served by the rollup leaves out the intervals ending after the range, as
+    the query of the intervals does.
+    """
+    table = GenerationByFuelSourceTable
+    bucket = bucket_start(table.start_datetime, resolution)
+    end = bucket_end(table.start_datetime, resolution)
+    row_end = case((table.end_datetime > end, table.end_datetime), else_=end)
+    return select(
+        table.id,
+        table.type,
+        table.technology,
+        func.sum(table.value).label("value"),
+        bucket.label("start_datetime"),
+        row_end.label("end_datetime"),
+        table.timezone,
+        table.unit,
+    ).group_by(
+        table.id,
+        bucket,
+        row_end,
+        table.timezone,
+        table.unit,
+        table.type,
+        table.technology,
+    )
+
+
+def select_generation_buckets(
+    id: str | Sequence[str],
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution,
+) -> Select:
+    table = generation_source(start_datetime, end_datetime, resolution)
+    psrs = counted_descendants(table, id)
+    statement = select_buckets(table, resolution, psrs.c.ancestor)
+    return from_descendants(statement, table, psrs).filter(
+        *in_range(table, start_datetime, end_datetime)
+    )
+
+
+def generation_statement(
+    id: str | Sequence[str],
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution | None,
+) -> Select:
+    """The generation query, summed over buckets when there is a resolution."""
+    if resolution is None:
+        return select_generation(id, start_datetime, end_datetime)
+    return select_generation_buckets(id, start_datetime, end_datetime, resolution)
+
+
+def select_generation_units(
+    id: str, start_datetime: datetime, end_datetime: datetime
+) -> Select:
+    table = GenerationByFuelSourceTable
+    statement = select(distinct(table.unit))
+    psrs = counted_descendants(table, id)
+    return from_descendants(statement, table, psrs).filter(
+        *in_range(table, start_datetime, end_datetime)
+    )
+
+
+def response_unit(
+    units: Sequence[ElectricityUnit | str], unit: ElectricityUnit | None
+) -> ElectricityUnit:
+    """
+    The unit of a generation response: ``unit`` if asked for, else the one
+    its rows are in, or MWh when they mix units.
+    """
+    if unit is not None:
+        return unit
+    return ElectricityUnit(common_unit(units, ENERGY_UNIT))
+
+
+def sum_fuel_sources(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The rows of ``df`` summed per PSR, interval, unit and fuel source, in
+    the order of the generation query.
+    """
+    keys = ["id", *INTERVAL_COLUMNS, "unit", "type", "technology"]
+    df = (
+        df.groupby(keys, sort=False, dropna=False)["value"]
+        .sum(min_count=1)
+        .reset_index()
+        .sort_values(
+            ["id", "start_datetime", "end_datetime", "type", "technology"],
+            kind="stable",
+            na_position="first",
+            ignore_index=True,
+        )
+    )
+    df["technology"] = df["technology"].astype(object).where(df["technology"].notna())
+    return df
+
+
+def normalize_units(df: pd.DataFrame, unit: ElectricityUnit | None) -> pd.DataFrame:
+    """
+    The generation rows of ``df`` with the values of every PSR in one unit,
+    its ``response_unit``. The rows of a fuel source and interval that were
+    in several units are summed into one.
+    """
+    with stage("transform"):
+        codes, distinct = pd.factorize(df["unit"])
+        mixed = np.zeros(len(df), dtype=bool)
+        if len(distinct) > 1:
+            units_per_psr = pd.Series(codes).groupby(df["id"].to_numpy()).nunique()
+            mixed = df["id"].isin(units_per_psr.index[units_per_psr > 1]).to_numpy()
+        if unit is not None:
+            targets = unit
+        elif mixed.any():
+            targets = df["unit"].to_numpy(dtype=object).copy()
+            targets[mixed] = ElectricityUnit(ENERGY_UNIT)
+        else:
+            return df
+
+        values = df["value"].to_numpy(dtype=float)
+        converted = convert(values, df["unit"], targets)
+        if converted is values and not mixed.any():
+            return df
+        df = df.assign(value=converted, unit=targets)
+        return sum_fuel_sources(df) if mixed.any() else df
+
+
+def json_datetimes(values: Any, timezones: str | Sequence[str]) -> list[str]:
+    """
+    Stored wall-clock datetimes in their timezones, written as pydantic
+    writes datetimes in JSON, e.g. 2021-06-01T00:00:00Z.
+    """
+    values = np.asarray(values, dtype="datetime64[us]")
+    if isinstance(timezones, str):
+        timezones = [timezones] * len(values)
+    whole_seconds = not (values.astype(np.int64) % 1_000_000).any()
+    if whole_seconds and set(timezones) <= {"UTC"}:
+        return np.datetime_as_string(values, unit="s", timezone="UTC").tolist()
+    return [
+        pd.Timestamp(value).tz_localize(timezone).isoformat().replace("+00:00", "Z")
+        for value, timezone in zip(values, timezones)
+    ]
+
+
+def generation_from_frame(
+    df: pd.DataFrame, keys: Sequence[str] = INTERVAL_COLUMNS
+) -> list[Payload]:
+    """
+    Group long-format generation rows into one Generation per interval.
+
+    Intervals keep the order in which they first appear in ``df`` and the
+    fuel sources keep their row order within each interval. The grouping is
+    a single stable sort, after which every interval is a contiguous slice
+    of the sorted columns and its total is a numpy sum over that slice.
+    ``keys`` can add columns to the interval, e.g. the PSR id.
+    """
+    with stage("transform"):
+        group = df.groupby(list(keys), sort=False).ngroup().to_numpy()
+        order = np.argsort(group, kind="stable")
+        bounds = np.flatnonzero(np.diff(group[order])) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(order)]))
+
+        values = df["value"].to_numpy(dtype=float)[order]
+        # Missing values count as zero in the totals, like Series.sum
+        summable = np.where(np.isnan(values), 0.0, values)
+        totals = [
+            float(summable[first:last].sum()) for first, last in zip(starts, ends)
+        ]
+
+        ids = df["id"].to_numpy()[order].tolist()
+        types = df["type"].to_numpy()[order].tolist()
+        technologies = df["technology"].to_numpy()[order].tolist()
+        values = values.tolist()
+        intervals = df[INTERVAL_COLUMNS].iloc[order[starts]]
+
+    with stage("validate"):
+        timezones = intervals["timezone"].tolist()
+        return [
+            interval_generation(
+                start_dt,
+                end_dt,
+                total,
+                ids[first:last],
+                types[first:last],
+                technologies[first:last],
+                values[first:last],
+            )
+            for start_dt, end_dt, total, first, last in zip(
+                json_datetimes(intervals["start_datetime"], timezones),
+                json_datetimes(intervals["end_datetime"], timezones),
+                totals,
+                starts,
+                ends,
+            )
+        ]
+
+
+def interval_generation(
+    start_datetime: str,
+    end_datetime: str,
+    total: float,
+    ids: list[str],
+    types: list[str],
+    technologies: list[str | None],
+    values: list[float],
+) -> Payload:
+    """A Generation, its datetimes already written by ``json_datetimes``."""
+    return {
+        "start_datetime": start_datetime,
+        "end_datetime": end_datetime,
+        "value": total,
+        "value_by_fuel_source": [
+            {"id": id, "type": type, "technology": technology, "value": value}
+            for id, type, technology, value in zip(ids, types, technologies, values)
+        ],
+    }
+
+
+def generation_response(
+    id: str,
+    unit: ElectricityUnit | str | None = None,
+    generation: list[Payload] | None = None,
+) -> Payload:
+    """A GenerationResponse, without generation by default."""
+    return {
+        "id": id,
+        "unit": None if unit is None else ElectricityUnit(unit).value,
+        "generation": generation or [],
+    }
+
+
+def json_line(payload: Payload) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def _generation_line(rows: list[Row], unit: ElectricityUnit) -> bytes:
+    ids, types, technologies, values, start_dts, end_dts, tzs, units = zip(*rows)
+    if len(set(units)) > 1:
+        # Fuel sources in several units are summed, once in ``unit``
+        df = pd.DataFrame(rows, columns=list(rows[0]._fields))
+        (generation,) = generation_from_frame(normalize_units(df, unit))
+        return json_line(generation)
+    values = convert(np.array(values, dtype=float), units[0], unit)
+    (start_dt,) = json_datetimes([start_dts[0]], tzs[0])
+    (end_dt,) = json_datetimes([end_dts[0]], tzs[0])
+    generation = interval_generation(
+        start_dt,
+        end_dt,
+        float(np.nansum(values)),
+        list(ids),
+        list(types),
+        list(technologies),
+        values.tolist(),
+    )
+    return json_line(generation)
+
+
+async def stream_generation(
+    session: AsyncSession, statement: Select, unit: ElectricityUnit
+) -> AsyncIterator[bytes]:
+    """
+    Yield one JSON line per interval, in ``unit``, reading rows from a
+    server-side cursor.
+
+    The rows are ordered by interval, so an interval is complete as soon as
+    the next one starts and only one interval is held in memory at a time.
+    """
+    columns = statement.selected_columns
+    result = await session.stream(
+        statement.order_by(None)
+        .order_by(columns.start_datetime, columns.end_datetime)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    interval = None
+    rows: list[Row] = []
+    async for partition in result.partitions():
+        for row in partition:
+            key = (row.start_datetime, row.end_datetime, row.timezone)
+            if key != interval and rows:
+                yield _generation_line(rows, unit)
+                rows = []
+            interval = key
+            rows.append(row)
+    if rows:
+        yield _generation_line(rows, unit)
+
+
+def load_store(df: pd.DataFrame, version: str | None) -> None:
+    # Read without result processing, the units are the stored enum names
+    df["unit"] = df["unit"].map({unit.name: unit for unit in ElectricityUnit})
+    generation_store.load(df, version)
+
+
+def load_generation_store() -> None:
+    """Load the in-memory store from the database, e.g. at startup."""
+    with Session(get_engine()) as session:
+        connection = session.connection()
+        result = connection.exec_driver_sql(
+            *driver_sql(select_generation_sums(), connection.dialect)
+        )
+        df = pd.DataFrame(result.all(), columns=list(result.keys()))
+        version = read_dataset_version(session)
+    load_store(df, version)
+
+
+async def current_generation_store(session: AsyncSession) -> GenerationStore:
+    """The in-memory store, reloaded when the dataset version changed."""
+    version = await refresh_dataset_version(session)
+    if not generation_store.is_current(version):
+        async with generation_store.lock:
+            if not generation_store.is_current(version):
+                df = await fetch_raw_frame(session, select_generation_sums())
+                load_store(df, version)
+    return generation_store
+
+
+def series_generation(id: str, series: GenerationSeries) -> list[Payload]:
+    with stage("transform"):
+        bounds, rows, columns = series.cells()
+        types = [series.fuel_sources[column][0] for column in columns.tolist()]
+        technologies = [series.fuel_sources[column][1] for column in columns.tolist()]
+        values = series.values[rows, columns].tolist()
+        totals = series.totals().tolist()
+    with stage("validate"):
+        timezones = series.timezones.tolist()
+        starts = json_datetimes(series.starts, timezones)
+        ends = json_datetimes(series.ends, timezones)
+        return [
+            interval_generation(
+                start_dt,
+                end_dt,
+                total,
+                [id] * (last - first),
+                types[first:last],
+                technologies[first:last],
+                values[first:last],
+            )
+            for start_dt, end_dt, total, first, last in zip(
+                starts, ends, totals, bounds[:-1], bounds[1:]
+            )
+        ]
+
+
+def select_series(
+    series: GenerationSeries,
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution | None,
+    unit: ElectricityUnit | None,
+) -> GenerationSeries:
+    with stage("transform"):
+        series = series.between(start_datetime, end_datetime)
+        if resolution is not None:
+            series = series.buckets(NUMPY_BUCKETS[resolution])
+        if unit is not None:
+            series = series.in_unit(unit.value)
+    return series
+
+
+def series_response(
+    id: str,
+    series: GenerationSeries | None,
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution | None,
+    unit: ElectricityUnit | None,
+) -> Payload:
+    """Answer a generation query from the whole series of a PSR."""
+    if series is None:
+        return generation_response(id)
+    series = select_series(series, start_datetime, end_datetime, resolution, unit)
+    if not len(series):
+        return generation_response(id)
+    return generation_response(id, series.unit, series_generation(id, series))
+
+
+def memory_generation(
+    store: GenerationStore,
+    id: str,
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution | None,
+    unit: ElectricityUnit | None,
+) -> Payload:
+    """Answer a generation query from the in-memory store."""
+    return series_response(
+        id, store.series.get(id), start_datetime, end_datetime, resolution, unit
+    )
+
+
+# Reads the generation of several PSRs over a range, in a unit if given, one
+# response per PSR
+GenerationReader = Callable[
+    [
+        AsyncSession,
+        list[str],
+        datetime,
+        datetime,
+        Resolution | None,
+        ElectricityUnit | None,
+    ],
+    Awaitable[list[Payload]],
+]
+
+
+async def read_memory_generation(
+    session: AsyncSession,
+    ids: list[str],
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution | None,
+    unit: ElectricityUnit | None,
+) -> list[Payload]:
+    store = await current_generation_store(session)
+    return [
+        memory_generation(store, id, start_datetime, end_datetime, resolution, unit)
+        for id in ids
+    ]
+
+
+async def parquet_series(
+    session: AsyncSession,
+    ids: list[str],
+    start_datetime: datetime,
+    end_datetime: datetime,
+) -> dict[str, GenerationSeries]:
+    """
+    Read the generation of ``ids`` over the range from the Parquet dataset.
+
+    The files hold the generation each PSR publishes, so the counted
+    descendants of every PSR come from the closure table, and their rows in
+    the range are read and summed into its series.
+    """
+    result = await session.execute(
+        select(counted_descendants(GenerationByFuelSourceTable, ids))
+    )
+    descendants: dict[str, list[str]] = {}
+    for ancestor, descendant in result.all():
+        descendants.setdefault(ancestor, []).append(descendant)
+    parquet_dataset.open(settings.parquet_dir, await refresh_dataset_version(session))
+    rows = parquet_dataset.read(
+        list({id for ids in descendants.values() for id in ids}),
+        start_datetime,
+        end_datetime,
+    )
+    series = {}
+    with stage("transform"):
+        for id, psr_ids in descendants.items():
+            psr_rows = rows[rows["id"].isin(psr_ids)] if len(descendants) > 1 else rows
+            if len(psr_rows):
+                series[id] = GenerationSeries.from_frame(psr_rows)
+    return series
+
+
+async def read_parquet_generation(
+    session: AsyncSession,
+    ids: list[str],
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution | None,
+    unit: ElectricityUnit | None,
+) -> list[Payload]:
+    series = await parquet_series(session, ids, start_datetime, end_datetime)
+    return [
+        series_response(
+            id, series.get(id), start_datetime, end_datetime, resolution, unit
+        )
+        for id in ids
+    ]
+
+
+async def read_duckdb_generation(
+    session: AsyncSession,
+    ids: list[str],
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution | None,
+    unit: ElectricityUnit | None,
+) -> list[Payload]:
+    """Run the generation query of the sql backend on the DuckDB copy."""
+    statement = generation_statement(ids, start_datetime, end_datetime, resolution)
+    df = await fetch_query_frame(session, statement)
+    responses = generation_by_psr(df, unit) if not df.empty else {}
+    return [responses.get(id) or generation_response(id) for id in ids]
+
+
+# The backends other than "sql", which queries the database directly
+GENERATION_READERS: dict[GenerationBackend, GenerationReader] = {
+    GenerationBackend.memory: read_memory_generation,
+    GenerationBackend.parquet: read_parquet_generation,
+}
+
+
+def generation_reader() -> GenerationReader | None:
+    """
+    The reader of the configured generation backend, or None when the sql
+    backend queries SQLite, streaming the rows from its cursor.
+    """
+    if (
+        settings.generation_backend is GenerationBackend.sql
+        and settings.query_engine is QueryEngine.duckdb
+    ):
+        return read_duckdb_generation
+    return GENERATION_READERS.get(settings.generation_backend)
+
+
+# Formats of generation other than the columnar ones, in order of preference
+GENERATION_MEDIA_TYPES = (JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE)
+
+# Columns of the flat generation rows served in the columnar formats
+GENERATION_TABLE_COLUMNS = [
+    "start_datetime",
+    "end_datetime",
+    "id",
+    "type",
+    "technology",
+    "value",
+    "unit",
+]
+
+
+def utc_datetimes(df: pd.DataFrame, column: str) -> pd.Series:
+    """The stored wall-clock datetimes of ``column`` in UTC, by row timezone."""
+    values = pd.to_datetime(df[column])
+    parts = [
+        values[rows.index].dt.tz_localize(timezone).dt.tz_convert("UTC")
+        for timezone, rows in df.groupby("timezone", sort=False)
+    ]
+    if not parts:
+        return values.dt.tz_localize("UTC")
+    return pd.concat(parts).reindex(df.index)
+
+
+def generation_table(df: pd.DataFrame) -> pd.DataFrame:
+    """The generation rows of a query as the flat rows of the columnar formats."""
+    with stage("transform"):
+        return pd.DataFrame(
+            {
+                "start_datetime": utc_datetimes(df, "start_datetime"),
+                "end_datetime": utc_datetimes(df, "end_datetime"),
+                "id": df["id"],
+                "type": df["type"],
+                "technology": df["technology"],
+                "value": df["value"].astype(float),
+                "unit": df["unit"].map({unit: unit.value for unit in ElectricityUnit}),
+            },
+            columns=GENERATION_TABLE_COLUMNS,
+        )
+
+
+def series_frame(id: str, series: GenerationSeries) -> pd.DataFrame:
+    return series.frame().assign(id=id, unit=ElectricityUnit(series.unit))
+
+
+async def read_generation_frame(
+    session: AsyncSession,
+    ids: list[str],
+    start_datetime: datetime,
+    end_datetime: datetime,
+    resolution: Resolution | None,
+    unit: ElectricityUnit | None,
+) -> pd.DataFrame:
+    """
+    The generation of ``ids`` as flat rows, one per PSR, interval and fuel
+    source, read by the configured backend without building the response
+    models. Every backend sorts the rows by PSR and then interval, keeping
+    the order of the fuel sources of an interval.
+    """
+    if settings.generation_backend is GenerationBackend.sql:
+        statement = generation_statement(ids, start_datetime, end_datetime, resolution)
+        df = await fetch_query_frame(session, statement)
+        df = generation_table(normalize_units(df, unit))
+    else:
+        if settings.generation_backend is GenerationBackend.memory:
+            series = (await current_generation_store(session)).series
+        else:
+            series = await parquet_series(session, ids, start_datetime, end_datetime)
+        frames = [
+            series_frame(
+                id,
+                select_series(
+                    series[id], start_datetime, end_datetime, resolution, unit
+                ),
+            )
+            for id in ids
+            if id in series
+        ]
+        if not frames:
+            frames = [
+                pd.DataFrame(columns=[column.name for column in GENERATION_COLUMNS])
+            ]
+        df = generation_table(pd.concat(frames, ignore_index=True))
+    with stage("transform"):
+        return df.sort_values(
+            ["id", "start_datetime"], kind="stable", ignore_index=True
+        )
+
+
+def response_lines(payloads: Sequence[Payload]) -> Iterator[bytes]:
+    for payload in payloads:
+        yield json_line(payload)
+
+
 @router.get(
     "/{id}/timeseries/generation",
     summary="generation",
+    responses={
+        200: {
+            "content": {
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"$ref": "#/components/schemas/Generation"}
+                },
+                **TABLE_CONTENT,
+            },
+            "description": "With stream=true or an Accept header of "
+            f"{NDJSON_MEDIA_TYPE}, one Generation per line. The unit is sent in "
+            f"the X-Unit header. {TABLE_DESCRIPTION}",
+        }
+    },
 )
 async def get_generation(
+    request: Request,
     id: Annotated[str, Path(description="PSR id (try US-WECC-CISO)")],
     start_datetime: Annotated[
         datetime, Query(alias="startDatetime", description="Start datetime")
@@ -96,49 +1151,210 @@ async def get_generation(
     end_datetime: Annotated[
         datetime, Query(alias="endDatetime", description="End datetime")
     ] = datetime(2021, 6, 2, tzinfo=ZoneInfo("UTC")),
-    session: Session = Depends(get_session),
+    resolution: Annotated[
+        Resolution | None,
+        Query(
+            description="Sum the generation over intervals of this ISO 8601 "
+            "duration, e.g. P1D for daily totals. By default the stored "
+            "intervals are returned."
+        ),
+    ] = None,
+    stream: Annotated[
+        bool, Query(description="Stream one generation interval per line (NDJSON)")
+    ] = False,
+    unit: Annotated[
+        ElectricityUnit | None,
+        Query(
+            description="Convert the generation to this unit. By default it "
+            "is in the unit it is stored in, or in MWh when the range mixes "
+            "units."
+        ),
+    ] = None,
+    session: AsyncSession = Depends(get_async_session),
 ) -> GenerationResponse:
-    result = session.execute(
-        select(GenerationByFuelSourceTable)
-        .filter_by(id=id)
-        .filter(
-            GenerationByFuelSourceTable.start_datetime >= start_datetime,
-            GenerationByFuelSourceTable.end_datetime <= end_datetime,
+    media_type = table_media_type(request, GENERATION_MEDIA_TYPES)
+    if media_type is not None:
+        df = await read_generation_frame(
+            session, [id], start_datetime, end_datetime, resolution, unit
         )
-    )
-    generation = result.scalars().all()
-    if not generation:
-        return GenerationResponse.empty(id=id)
-    units = list(set([g.unit for g in generation]))
-    if len(units) > 1:
-        raise ValueError(
-            "There are multiple units of generation in this data and this has not yet been implemented"
+        return table_response(df, media_type)
+
+    reader = generation_reader()
+    if reader is not None:
+        (response,) = await reader(
+            session, [id], start_datetime, end_datetime, resolution, unit
         )
-    unit = units[0]
-    df = pd.DataFrame([g.dict() for g in generation])
-
-    generation = []
-    unique_dts = df[["start_datetime", "end_datetime", "timezone"]].drop_duplicates()
-    for _, dt in unique_dts.iterrows():
-        rows = df[
-            (df["start_datetime"] == dt["start_datetime"])
-            & (df["end_datetime"] == dt["end_datetime"])
-        ]
-        generation.append(
-            Generation(
-                start_datetime=dt["start_datetime"].tz_localize(dt["timezone"]),
-                end_datetime=dt["end_datetime"].tz_localize(dt["timezone"]),
-                value=rows["value"].sum(),
-                value_by_fuel_source=[
-                    GenerationByFuelSource(
-                        id=row["id"],
-                        technology=row["technology"],
-                        value=row["value"],
-                        type=row["type"],
-                    )
-                    for _, row in rows.iterrows()
-                ],
+        if stream or accepts(request, NDJSON_MEDIA_TYPE):
+            headers = {}
+            if response["unit"] is not None:
+                headers["X-Unit"] = response["unit"]
+            return NDJSONResponse(
+                response_lines(response["generation"]), headers=headers
             )
+        return FastJSONResponse(response)
+
+    statement = generation_statement(id, start_datetime, end_datetime, resolution)
+    if stream or accepts(request, NDJSON_MEDIA_TYPE):
+        result = await session.execute(
+            select_generation_units(id, start_datetime, end_datetime)
+        )
+        units = result.scalars().all()
+        stream_unit = response_unit(units, unit)
+        headers = {}
+        if units:
+            headers["X-Unit"] = stream_unit.value
+        return NDJSONResponse(
+            stream_generation(session, statement, stream_unit), headers=headers
+        )
+
+    df = await fetch_frame(session, statement)
+    if df.empty:
+        return FastJSONResponse(generation_response(id))
+    df = normalize_units(df, unit)
+    return FastJSONResponse(
+        generation_response(id, df["unit"].iloc[0], generation_from_frame(df))
+    )
+
+
+def generation_by_psr(
+    df: pd.DataFrame, unit: ElectricityUnit | None
+) -> dict[str, Payload]:
+    """
+    One GenerationResponse per PSR of ``df``, in ``unit`` if given.
+
+    All PSRs are grouped in one pass of ``generation_from_frame``, with the
+    PSR id as an extra interval key.
+    """
+    df = normalize_units(df, unit)
+    units = df.drop_duplicates("id").set_index("id")["unit"]
+    generations: dict[str, list[Payload]] = {}
+    for generation in generation_from_frame(df, ["id", *INTERVAL_COLUMNS]):
+        psr_id = generation["value_by_fuel_source"][0]["id"]
+        generations.setdefault(psr_id, []).append(generation)
+    return {
+        psr_id: generation_response(psr_id, units[psr_id], generation)
+        for psr_id, generation in generations.items()
+    }
+
+
+def _psr_line(rows: list[Row], unit: ElectricityUnit | None) -> bytes:
+    df = pd.DataFrame(rows, columns=list(rows[0]._fields))
+    return json_line(generation_by_psr(df, unit)[rows[0].id])
+
+
+async def stream_generation_by_psr(
+    session: AsyncSession,
+    statement: Select,
+    ids: Sequence[str],
+    unit: ElectricityUnit | None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield one GenerationResponse per line and PSR, reading rows from a
+    server-side cursor ordered by PSR, so that one PSR is held at a time.
+    PSRs without generation in the range come last, with no generation.
+    """
+    columns = statement.selected_columns
+    result = await session.stream(
+        statement.order_by(None)
+        .order_by(columns.id, columns.start_datetime, columns.end_datetime)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    seen = set()
+    rows: list[Row] = []
+    async for partition in result.partitions():
+        for row in partition:
+            if rows and row.id != rows[0].id:
+                seen.add(rows[0].id)
+                yield _psr_line(rows, unit)
+                rows = []
+            rows.append(row)
+    if rows:
+        seen.add(rows[0].id)
+        yield _psr_line(rows, unit)
+    for id in ids:
+        if id not in seen:
+            yield json_line(generation_response(id))
+
+
+@router.get(
+    "/timeseries/generation",
+    summary="generation of several PSRs",
+    responses={
+        200: {
+            "content": {
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"$ref": "#/components/schemas/GenerationResponse"}
+                },
+                **TABLE_CONTENT,
+            },
+            "description": "With stream=true or an Accept header of "
+            f"{NDJSON_MEDIA_TYPE}, one GenerationResponse per line and PSR. "
+            f"{TABLE_DESCRIPTION}",
+        }
+    },
+)
+async def get_generation_batch(
+    request: Request,
+    ids: Annotated[
+        list[str] | None,
+        Query(alias="id", description="PSR ids, repeat the parameter for each"),
+    ] = None,
+    parent: Annotated[
+        str | None,
+        Query(description="PSR included together with all of its children"),
+    ] = None,
+    start_datetime: Annotated[
+        datetime, Query(alias="startDatetime", description="Start datetime")
+    ] = datetime(2021, 6, 1, tzinfo=ZoneInfo("UTC")),
+    end_datetime: Annotated[
+        datetime, Query(alias="endDatetime", description="End datetime")
+    ] = datetime(2021, 6, 2, tzinfo=ZoneInfo("UTC")),
+    resolution: Annotated[
+        Resolution | None,
+        Query(description="Sum the generation over intervals of this duration"),
+    ] = None,
+    stream: Annotated[
+        bool, Query(description="Stream one PSR per line (NDJSON)")
+    ] = False,
+    unit: Annotated[
+        ElectricityUnit | None,
+        Query(description="Convert the generation to this unit"),
+    ] = None,
+    session: AsyncSession = Depends(get_async_session),
+) -> list[GenerationResponse]:
+    ids = list(ids or [])
+    if parent is not None:
+        result = await session.execute(
+            select(PSRList.id).filter(PSRList.parent == parent).order_by(PSRList.id)
+        )
+        ids += [parent, *result.scalars().all()]
+    if not ids:
+        raise HTTPException(status_code=422, detail="Pass an id or a parent")
+    # Each PSR once, in the order asked for
+    ids = list(dict.fromkeys(ids))
+
+    media_type = table_media_type(request, GENERATION_MEDIA_TYPES)
+    if media_type is not None:
+        df = await read_generation_frame(
+            session, ids, start_datetime, end_datetime, resolution, unit
         )
+        return table_response(df, media_type)
 
-    return GenerationResponse(id=id, unit=unit, generation=generation)
+    reader = generation_reader()
+    if reader is not None:
+        responses = await reader(
+            session, ids, start_datetime, end_datetime, resolution, unit
+        )
+        if stream or accepts(request, NDJSON_MEDIA_TYPE):
+            return NDJSONResponse(response_lines(responses))
+        return FastJSONResponse(responses)
+
+    statement = generation_statement(ids, start_datetime, end_datetime, resolution)
+    if stream or accepts(request, NDJSON_MEDIA_TYPE):
+        return NDJSONResponse(stream_generation_by_psr(session, statement, ids, unit))
+
+    df = await fetch_frame(session, statement)
+    responses = generation_by_psr(df, unit) if not df.empty else {}
+    return FastJSONResponse(
+        [responses.get(id) or generation_response(id) for id in ids]
+    )
@@ -0,0 +1,150 @@
+# SPDX-License-Identifier: Apache-2.0
+from typing import Any
+
+import orjson
+import pandas as pd
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+
+from power_systems_data_api_demonstrator.src.api.metrics import stage
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NDJSONResponse(StreamingResponse):
+    """Newline delimited JSON, one record per line, streamed as produced."""
+
+    media_type = NDJSON_MEDIA_TYPE
+
+
+# A response model as the dict of its JSON, served by FastJSONResponse
+Payload = dict[str, Any]
+
+
+class FastJSONResponse(Response):
+    """
+    JSON of content already shaped like the response model: dicts and lists,
+    encoded by orjson, or bytes, sent as they are.
+
+    Returned by an endpoint, it skips FastAPI's validation and encoding of
+    the response model, which still documents the response. Large responses
+    are then encoded once, instead of being built as models, validated again
+    and encoded by ``jsonable_encoder``.
+    """
+
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        with stage("serialize"):
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def accepted_ranges(request: Request) -> list[tuple[str, float]]:
+    """The media ranges of the Accept header, with their q-values."""
+    ranges = []
+    for media_range in request.headers.get("accept", "").split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_type.lower(), quality))
+    return ranges
+
+
+def quality(ranges: list[tuple[str, float]], media_type: str) -> float:
+    """The q-value of ``media_type``, from the most specific range matching it."""
+    main_type = media_type.split("/")[0]
+    specificities = {media_type: 2, f"{main_type}/*": 1, "*/*": 0}
+    matches = [
+        (specificities[media_range], q)
+        for media_range, q in ranges
+        if media_range in specificities
+    ]
+    return max(matches)[1] if matches else 0.0
+
+
+def preferred_media_type(request: Request, media_types: list[str]) -> str | None:
+    """
+    Of ``media_types``, the one the request accepts with the highest q-value,
+    the first of them on ties or without an Accept header. None if it accepts
+    none of them.
+    """
+    ranges = accepted_ranges(request)
+    if not ranges:
+        return media_types[0]
+    qualities = [quality(ranges, media_type) for media_type in media_types]
+    best = max(qualities)
+    return media_types[qualities.index(best)] if best > 0 else None
+
+
+def accepts(request: Request, media_type: str) -> bool:
+    """Whether the request prefers ``media_type`` to JSON."""
+    return preferred_media_type(request, [JSON_MEDIA_TYPE, media_type]) == media_type
+
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/parquet"
+CSV_MEDIA_TYPE = "text/csv"
+# Columnar formats of the flat rows behind a response, in order of preference
+TABLE_MEDIA_TYPES = [ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, CSV_MEDIA_TYPE]
+# OpenAPI content of the endpoints serving them
+TABLE_CONTENT: dict[str, dict[str, Any]] = {
+    media_type: {} for media_type in TABLE_MEDIA_TYPES
+}
+TABLE_DESCRIPTION = (
+    "With an Accept header of "
+    + ", ".join(TABLE_MEDIA_TYPES)
+    + ", the flat rows of the response, one per line of the JSON lists."
+)
+
+
+def table_media_type(
+    request: Request, media_types: tuple[str, ...] = (JSON_MEDIA_TYPE,)
+) -> str | None:
+    """
+    The columnar format the request prefers to the other ``media_types`` the
+    endpoint serves, if any. Those come first on ties, JSON first of all.
+    """
+    media_type = preferred_media_type(request, [*media_types, *TABLE_MEDIA_TYPES])
+    return media_type if media_type in TABLE_MEDIA_TYPES else None
+
+
+def table_response(df: pd.DataFrame, media_type: str) -> Response:
+    """
+    ``df`` serialized as ``media_type``, straight from its columns.
+
+    Datetime columns are expected in UTC. Arrow and Parquet need pyarrow.
+    """
+    with stage("serialize"):
+        return _table_response(df, media_type)
+
+
+def _table_response(df: pd.DataFrame, media_type: str) -> Response:
+    if media_type == CSV_MEDIA_TYPE:
+        body = df.to_csv(index=False, date_format="%Y-%m-%dT%H:%M:%SZ").encode()
+        return Response(content=body, media_type=media_type)
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise HTTPException(
+            status_code=406, detail=f"{media_type} is not available on this server"
+        )
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    if media_type == PARQUET_MEDIA_TYPE:
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=media_type)
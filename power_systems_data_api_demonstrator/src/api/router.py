@@ -3,30 +3,67 @@ from fastapi.param_functions import Depends
 from fastapi.routing import APIRouter
 from sqlmodel import Session
 
-from power_systems_data_api_demonstrator.src.api.db import get_session
+from power_systems_data_api_demonstrator.settings import GenerationBackend, settings
+from power_systems_data_api_demonstrator.src.api.conditional import ConditionalGet
+from power_systems_data_api_demonstrator.src.api.db import (
+    dispose_async_engine,
+    dispose_engine,
+    get_async_engine,
+    get_engine,
+)
 from power_systems_data_api_demonstrator.src.api import docs
 from power_systems_data_api_demonstrator.src.api.metadata.views import (
     router as metadata_router,
 )
+from power_systems_data_api_demonstrator.src.api.monitoring.views import (
+    metrics_router,
+    router as monitoring_router,
+)
 from power_systems_data_api_demonstrator.src.api.psr_metadata.views import (
     router as psr_metadata_router,
 )
 from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    load_generation_store,
     router as psr_timeseries_router,
 )
 from power_systems_data_api_demonstrator.src.api.seed import seed
 
 api_router = APIRouter()
-api_router.include_router(metadata_router, prefix="/metadata", tags=["metadata"])
 api_router.include_router(
-    psr_metadata_router, prefix="/power-systems-resource", tags=["psr metadata"]
+    metadata_router,
+    prefix="/metadata",
+    tags=["metadata"],
+    dependencies=[Depends(ConditionalGet(cache_control="public, max-age=300"))],
+)
+api_router.include_router(
+    psr_metadata_router,
+    prefix="/power-systems-resource",
+    tags=["psr metadata"],
+    dependencies=[Depends(ConditionalGet(cache_control="public, max-age=300"))],
 )
+# Clients revalidate timeseries on every poll; unchanged data costs a 304.
 api_router.include_router(
-    psr_timeseries_router, prefix="/power-systems-resource", tags=["psr timeseries"]
+    psr_timeseries_router,
+    prefix="/power-systems-resource",
+    tags=["psr timeseries"],
+    dependencies=[Depends(ConditionalGet(cache_control="public, no-cache"))],
 )
+api_router.include_router(monitoring_router, prefix="/monitoring")
+api_router.include_router(metrics_router)
 api_router.include_router(docs.router)
 
 
 @api_router.on_event("startup")
 def startup_event() -> None:
-    seed()
+    get_engine()
+    get_async_engine()
+    if settings.seed_on_startup:
+        seed()
+    if settings.generation_backend is GenerationBackend.memory:
+        load_generation_store()
+
+
+@api_router.on_event("shutdown")
+async def shutdown_event() -> None:
+    dispose_engine()
+    await dispose_async_engine()
@@ -1,10 +1,36 @@
+import argparse
+import hashlib
+import json
+import logging
 import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from typing import Callable, Iterable
 
 import pandas as pd
-from sqlmodel import Session
+from sqlalchemy import delete, distinct, func, insert, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import Field, Session, SQLModel, select
 
 import power_systems_data_api_demonstrator.data
-from power_systems_data_api_demonstrator.src.api.db import init_db
+from power_systems_data_api_demonstrator.settings import (
+    GenerationBackend,
+    QueryEngine,
+    settings,
+)
+from power_systems_data_api_demonstrator.src.api import analytics_db, parquet_store
+from power_systems_data_api_demonstrator.src.api.cache import response_cache
+from power_systems_data_api_demonstrator.src.api.dataset import (
+    dataset_version,
+    read_dataset_version,
+    write_dataset_version,
+)
+from power_systems_data_api_demonstrator.src.api.db import driver_sql, get_engine
 from power_systems_data_api_demonstrator.src.api.metadata.views import (
     FuelSourceTechnologyReferenceTable,
     FuelSourceType,
@@ -12,42 +38,371 @@ from power_systems_data_api_demonstrator.src.api.metadata.views import (
 )
 from power_systems_data_api_demonstrator.src.api.psr_metadata.views import (
     CapacityTable,
+    PSRClosureTable,
     PSRInterconnectionTable,
     PSRList,
 )
 from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    ROLLUPS,
+    ElectricityUnit,
     FuelType,
     GenerationByFuelSourceTable,
+    select_rollup,
 )
+from power_systems_data_api_demonstrator.src.api.sources import (
+    SOURCES,
+    ColumnArrays,
+    parse_source_file,
+    read_hierarchy,
+)
+
+logger = logging.getLogger(__name__)
 
 DATA_DIR = os.path.dirname(power_systems_data_api_demonstrator.data.__file__)
 
 
-def seed() -> None:
-    engine = init_db()
+def data_dir() -> str:
+    """The directory seeded from, the packaged data unless configured."""
+    return str(settings.data_dir or DATA_DIR)
+
+
+# Manifest entry holding the digest of the table definitions. When the
+# models change the database is rebuilt and every file is seeded again.
+SCHEMA_ENTRY = "<schema>"
+
+
+class SeedManifest(SQLModel, table=True):
+    """One row per seeded source file, with the digest it was seeded from."""
+
+    path: str = Field(primary_key=True)
+    sha256: str
+    # PSR ids (or other keys) written from this file, as a JSON list
+    keys: str = "[]"
+    # The table those rows are in, for source files
+    table_name: str | None = None
+    seeded_at: datetime
+
+
+@dataclass(frozen=True)
+class SeedFile:
+    """A source file, the loader that ingests it and how to undo it."""
+
+    path: str
+    # Called with the session, and with the parsed rows when there is a parser
+    load: Callable[..., list[str]]
+    clear: Callable[[Session, list[str]], None]
+    # Reads the file into table rows without a session, in a worker process
+    parse: Callable[[str], ColumnArrays] | None = None
+    source: str = "example"
+    # The table the parsed rows go to
+    table: type[SQLModel] | None = None
+
+
+@dataclass
+class SourceStats:
+    rows: int = 0
+    parse_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(os.path.join(data_dir(), path), "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def schema_sha256() -> str:
+    engine = get_engine()
+    ddl = [
+        str(CreateTable(table).compile(engine))
+        for table in SQLModel.metadata.sorted_tables
+    ] + [
+        str(CreateIndex(index).compile(engine))
+        for table in SQLModel.metadata.sorted_tables
+        for index in sorted(table.indexes, key=lambda index: index.name)
+    ]
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()
+
+
+def expected_digests() -> dict[str, str]:
+    digests = {
+        seed_file.path: file_sha256(seed_file.path) for seed_file in seed_files()
+    }
+    digests[SCHEMA_ENTRY] = schema_sha256()
+    return digests
+
+
+def read_manifest(session: Session) -> dict[str, SeedManifest]:
+    if not inspect(session.connection()).has_table(SeedManifest.__tablename__):
+        return {}
+    return {entry.path: entry for entry in session.scalars(select(SeedManifest))}
+
+
+def is_up_to_date(manifest: dict[str, SeedManifest], digests: dict[str, str]) -> bool:
+    return manifest.keys() == digests.keys() and all(
+        manifest[path].sha256 == digest for path, digest in digests.items()
+    )
+
+
+def clear_removed(
+    session: Session, manifest: dict[str, SeedManifest], digests: dict[str, str]
+) -> set[str]:
+    """
+    Clear the rows of the files seeded before that are gone from the data
+    directory, and their manifest entries. Returns the PSRs whose generation
+    was cleared.
+    """
+    generation_ids: set[str] = set()
+    for path, entry in manifest.items():
+        if path in digests:
+            continue
+        keys = json.loads(entry.keys)
+        if entry.table_name is not None:
+            table = SQLModel.metadata.tables[entry.table_name]
+            session.execute(delete(table).where(table.c.id.in_(keys)))
+            if entry.table_name == GenerationByFuelSourceTable.__tablename__:
+                generation_ids.update(keys)
+        session.delete(entry)
+        logger.info("Cleared %s, which was removed", path)
+    return generation_ids
+
+
+def file_owners(
+    manifest: dict[str, SeedManifest], seed_files: Iterable[SeedFile]
+) -> dict[tuple[str, str], str]:
+    """The file that wrote each (table, PSR) of ``seed_files``, by the manifest."""
+    return {
+        (seed_file.table.__tablename__, key): seed_file.path
+        for seed_file in seed_files
+        if seed_file.table is not None and seed_file.path in manifest
+        for key in json.loads(manifest[seed_file.path].keys)
+    }
+
+
+def claim_keys(
+    owners: dict[tuple[str, str], str], seed_file: SeedFile, keys: list[str]
+) -> None:
+    """
+    Record ``seed_file`` as the writer of the PSRs ``keys`` of its table.
+
+    A file's rows are cleared by PSR when it changes, so two files writing
+    the same PSR to a table would clear each other's rows; that is refused.
+    """
+    if seed_file.table is None:
+        return
+    for key in keys:
+        owner = owners.setdefault((seed_file.table.__tablename__, key), seed_file.path)
+        if owner != seed_file.path:
+            raise ValueError(
+                f"{seed_file.path} and {owner} both write {key} to "
+                f"{seed_file.table.__tablename__}"
+            )
+
+
+def exports_are_current(version: str) -> bool:
+    """Whether the copies the configured backends read are of ``version``."""
+    if (
+        settings.generation_backend is GenerationBackend.parquet
+        and parquet_store.read_version(settings.parquet_dir) != version
+    ):
+        return False
+    return (
+        settings.query_engine is not QueryEngine.duckdb
+        or analytics_db.read_version(settings.duckdb_file) == version
+    )
+
+
+def use_seeded(session: Session, version: str) -> None:
+    """
+    Serve the data already seeded, bringing its exported copies up to date.
+
+    Called with the seeding lock held, so that one worker writes the copies.
+    """
+    logger.info("Database is up to date, nothing to seed")
+    if settings.generation_backend is GenerationBackend.parquet:
+        export_parquet(session, version)
+    if settings.query_engine is QueryEngine.duckdb:
+        export_duckdb(session, version)
+    response_cache.set_version(version)
 
+
+def seed(reset: bool = False) -> None:
+    """
+    Bring the database up to date with the files in the data directory.
+
+    Only files whose content changed since they were last seeded are
+    ingested again, after the rows they wrote before are cleared, and the
+    rows of files removed since are cleared. The work runs in one
+    ``BEGIN IMMEDIATE`` transaction, so when several workers start at once
+    one of them seeds and the others wait and then find the manifest up to
+    date, leaving the data and its version as they are. The Parquet and
+    DuckDB copies are written under the same lock only. The dataset version
+    written along with the data invalidates the response caches.
+    """
+    start = time.perf_counter()
+    engine = get_engine()
+    digests = expected_digests()
+
+    version = dataset_version(digests)
+
+    # Without the lock only read: the data and its copies are up to date
+    with Session(engine) as session:
+        if (
+            not reset
+            and is_up_to_date(read_manifest(session), digests)
+            and exports_are_current(version)
+        ):
+            logger.info("Database is up to date, nothing to seed")
+            response_cache.set_version(version)
+            return
+
+    with Session(engine) as session:
+        session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        manifest = read_manifest(session)
+        # Seeded by another worker while this one waited for the lock, or
+        # only the copies are stale
+        if not reset and is_up_to_date(manifest, digests):
+            use_seeded(session, version)
+            return
+        schema_entry = manifest.get(SCHEMA_ENTRY)
+        if (
+            reset
+            or schema_entry is None
+            or schema_entry.sha256 != digests[SCHEMA_ENTRY]
+        ):
+            SQLModel.metadata.drop_all(session.connection())
+            session.expunge_all()
+            manifest = {}
+        SQLModel.metadata.create_all(session.connection())
+        previous_version = read_dataset_version(session) if manifest else None
+
+        changed = [
+            seed_file
+            for seed_file in seed_files()
+            if seed_file.path not in manifest
+            or manifest[seed_file.path].sha256 != digests[seed_file.path]
+        ]
+        changed_paths = {seed_file.path for seed_file in changed}
+        owners = file_owners(
+            manifest,
+            [
+                seed_file
+                for seed_file in seed_files()
+                if seed_file.path not in changed_paths
+            ],
+        )
+        parse_start = time.perf_counter()
+        parsed = parse_files([seed_file for seed_file in changed if seed_file.parse])
+        parse_seconds = time.perf_counter() - parse_start
+
+        stats: dict[str, SourceStats] = defaultdict(SourceStats)
+        # PSRs whose generation changed, and so whose rollups are stale
+        generation_ids = clear_removed(session, manifest, digests)
+        for seed_file in changed:
+            file_start = time.perf_counter()
+            entry = manifest.get(seed_file.path)
+            if entry is not None:
+                seed_file.clear(session, json.loads(entry.keys))
+                if seed_file.table is GenerationByFuelSourceTable:
+                    generation_ids.update(json.loads(entry.keys))
+            if seed_file.parse is None:
+                keys = seed_file.load(session)
+            else:
+                rows, file_parse_seconds = parsed[seed_file.path]
+                keys = seed_file.load(session, rows)
+                stats[seed_file.source].rows += len(rows)
+                stats[seed_file.source].parse_seconds += file_parse_seconds
+                if seed_file.table is GenerationByFuelSourceTable:
+                    generation_ids.update(keys)
+            claim_keys(owners, seed_file, keys)
+            session.merge(
+                SeedManifest(
+                    path=seed_file.path,
+                    sha256=digests[seed_file.path],
+                    keys=json.dumps(keys),
+                    table_name=seed_file.table and seed_file.table.__tablename__,
+                    seeded_at=datetime.now(timezone.utc),
+                )
+            )
+            write_seconds = time.perf_counter() - file_start
+            if seed_file.parse is not None:
+                stats[seed_file.source].write_seconds += write_seconds
+            logger.info("Seeded %s in %.2fs", seed_file.path, write_seconds)
+
+        seed_hierarchy(session)
+        refresh_closure(session)
+        if generation_ids:
+            refresh_rollups(session, generation_ids)
+
+        for source, source_stats in stats.items():
+            logger.info(
+                "Seeded source %s: %d rows, parsed in %.2fs, written in %.2fs",
+                source,
+                source_stats.rows,
+                source_stats.parse_seconds,
+                source_stats.write_seconds,
+            )
+
+        session.merge(
+            SeedManifest(
+                path=SCHEMA_ENTRY,
+                sha256=digests[SCHEMA_ENTRY],
+                seeded_at=datetime.now(timezone.utc),
+            )
+        )
+        write_dataset_version(session, version)
+        # Before committing, so that a worker finding the manifest up to date
+        # finds the exported copies up to date too
+        if settings.generation_backend is GenerationBackend.parquet:
+            export_parquet(session, version, previous_version, generation_ids)
+        if settings.query_engine is QueryEngine.duckdb:
+            export_duckdb(session, version)
+        session.commit()
+    response_cache.set_version(version)
+    logger.info(
+        "Seeded %d files in %.2fs wall time, %.2fs of it parsing",
+        len(changed),
+        time.perf_counter() - start,
+        parse_seconds,
+    )
+
+
+def seed_topology_levels(session: Session) -> list[str]:
     topology_levels = []
 
     for grid_source in ["example"]:
-        df = pd.read_csv(os.path.join(DATA_DIR, grid_source, "topology_metadata.csv"))
+        df = pd.read_csv(os.path.join(data_dir(), grid_source, "topology_metadata.csv"))
 
     levels = df
 
     for index, row in levels.iterrows():
         topology_levels.extend([TopologyLevel(id=row["id"], level=row["level"])])
 
-    with Session(engine) as session:
-        seed_generation(session)
-        session.add_all(topology_levels)
-        seed_fuelsource(session)
-        seed_psr(session)
-        session.commit()
+    session.add_all(topology_levels)
+    return []
+
+
+def clear_tables(*tables: type[SQLModel]) -> Callable[[Session, list[str]], None]:
+    def clear(session: Session, keys: list[str]) -> None:
+        for table in tables:
+            session.execute(delete(table))
+
+    return clear
+
+
+def clear_ids(table: type[SQLModel]) -> Callable[[Session, list[str]], None]:
+    def clear(session: Session, keys: list[str]) -> None:
+        session.execute(delete(table).where(table.id.in_(keys)))
 
+    return clear
 
-def seed_fuelsource(session: Session) -> None:
+
+def seed_fuelsource(session: Session) -> list[str]:
     for grid_source in ["example"]:
         df = pd.read_csv(
-            os.path.join(DATA_DIR, grid_source, "fuel_source_metadata.csv")
+            os.path.join(data_dir(), grid_source, "fuel_source_metadata.csv")
         )
 
     fuel_source_types = []
@@ -81,7 +436,7 @@ def seed_fuelsource(session: Session) -> None:
     # session.add_all(fuelsource_technologies)
     session.add_all(fuel_source_types)
     session.add_all(fuel_source_technologies)
-    session.commit()
+    return []
 
 
 def extract_info(df: pd.DataFrame, column_name: str):
@@ -106,18 +461,23 @@ def extract_info(df: pd.DataFrame, column_name: str):
     return df
 
 
-def seed_psr(session: Session) -> None:
+def seed_psr(session: Session) -> list[str]:
     psr_data = []
     generation_capacity = []
     transmission_capacity = []
 
     for grid_source in ["example"]:
-        df = pd.read_json(os.path.join(DATA_DIR, grid_source, "psr_metadata.json"))
+        df = pd.read_json(os.path.join(data_dir(), grid_source, "psr_metadata.json"))
         # PSR List
         psr_data = []
 
+        if "parent" not in df:
+            df["parent"] = None
         for index, row in df.iterrows():
-            psr_data.extend([PSRList(id=row["id"], level=row["topology_level"])])
+            parent = row["parent"] if pd.notna(row["parent"]) else None
+            psr_data.extend(
+                [PSRList(id=row["id"], level=row["topology_level"], parent=parent)]
+            )
 
         # PSR GENERATION CAPACITY
 
@@ -130,8 +490,6 @@ def seed_psr(session: Session) -> None:
         df_generation = extract_info(df_generation, "capacity")
 
         for index, row in df_generation.iterrows():
-            print("datetime")
-            print(pd.to_datetime(row["startDatetime"]))
             capacity_table = CapacityTable(
                 id=row["id"],
                 unit=row["unit"],
@@ -168,103 +526,311 @@ def seed_psr(session: Session) -> None:
     session.add_all(generation_capacity)
     session.add_all(psr_data)
     session.add_all(transmission_capacity)
-    session.commit()
+    return []
 
 
-def seed_generation(session: Session) -> None:
-    # Overall generation
-    fuel_types = []
-    # fuel_technologies = []
-    generation_interconnection_by_fuel_source = []
-    generation_balancing_area_by_fuel_source = []
+def bulk_insert(
+    session: Session,
+    table: type[SQLModel],
+    rows: ColumnArrays,
+    batch_size: int | None = None,
+) -> int:
+    """
+    Insert column arrays with one Core executemany per batch of rows.
 
-    for grid_source in ["EIA", "ELEXON"]:
-        df_generation = pd.read_csv(
-            os.path.join(DATA_DIR, grid_source, "generation.csv")
+    The rows skip the ORM entirely and become part of the session's
+    transaction; nothing is committed here.
+    """
+    batch_size = batch_size or settings.seed_batch_size
+    names = list(rows.columns)
+    columns = [rows.tolist(name) for name in names]
+    statement = insert(table.__table__)
+    connection = session.connection()
+    start = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        connection.execute(
+            statement,
+            [
+                dict(zip(names, row))
+                for row in zip(
+                    *(column[offset : offset + batch_size] for column in columns)
+                )
+            ],
+        )
+    elapsed = time.perf_counter() - start
+    logger.info(
+        "Inserted %d rows into %s in %.2fs (%.0f rows/sec)",
+        len(rows),
+        table.__tablename__,
+        elapsed,
+        len(rows) / elapsed if elapsed else 0,
+    )
+    return len(rows)
+
+
+def write_source_rows(
+    table: type[SQLModel], session: Session, rows: ColumnArrays
+) -> list[str]:
+    """Insert the rows parsed from a source file and return their PSR ids."""
+    if table is GenerationByFuelSourceTable:
+        # Fuel types are shared between sources
+        session.connection().execute(
+            sqlite_insert(FuelType.__table__).on_conflict_do_nothing(),
+            [{"name": fuel_type} for fuel_type in rows.unique("type")],
         )
+    bulk_insert(session, table, rows)
+    return sorted(rows.unique("id"))
+
+
+def seed_hierarchy(session: Session) -> None:
+    """
+    Add the grid nodes of every source file to the PSR list.
+
+    PSRs already listed keep their level, and their parent unless they have
+    none. A parent node that is not a grid node of any file is listed one
+    level above its children.
+    """
+    frames = [
+        read_hierarchy(os.path.join(data_dir(), path))
+        for source in SOURCES.values()
+        for path, _ in source.paths(data_dir())
+    ]
+    # The first parent and level given for each node
+    nodes = pd.concat(frames, ignore_index=True).groupby("id").first()
+    children = nodes.dropna(subset=["parent"])
+    parent_levels = children.groupby("parent")["level"].min() - 1
+    missing = parent_levels[~parent_levels.index.isin(nodes.index)]
+    nodes = pd.concat([nodes, missing.to_frame("level")])
+    levels = nodes["level"].fillna(0).clip(lower=0).astype(int)
+    parents = nodes["parent"].astype(object).where(nodes["parent"].notna(), None)
+
+    session.flush()
+    table = PSRList.__table__
+    statement = sqlite_insert(table)
+    session.connection().execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={"parent": func.coalesce(table.c.parent, statement.excluded.parent)},
+        ),
+        [
+            {"id": id, "level": level, "name": None, "parent": parents[id]}
+            for id, level in levels.items()
+        ],
+    )
+
+
+def refresh_closure(session: Session) -> None:
+    """
+    Rebuild the PSR closure table from the parents in the PSR list.
 
-        # Topology Level: Parent Node
-        df_by_interconnection = (
-            df_generation.groupby(
-                ["Parent Node", "start_datetime", "end_datetime", "unit"]
+    Every PSR with generation is in it, listed or not. Walking up from a
+    descendant, its generation counts towards each ancestor until an
+    ancestor with generation of its own is reached, which already covers it.
+    """
+    start = time.perf_counter()
+    session.flush()
+    parents = dict(session.execute(select(PSRList.id, PSRList.parent)).all())
+    measured = set(
+        session.execute(select(distinct(GenerationByFuelSourceTable.id))).scalars()
+    )
+    rows = []
+    for descendant in sorted(parents.keys() | measured):
+        ancestor: str | None = descendant
+        depth = 0
+        counted = descendant in measured
+        path = set()
+        while ancestor is not None and ancestor not in path:
+            path.add(ancestor)
+            rows.append(
+                {
+                    "ancestor": ancestor,
+                    "descendant": descendant,
+                    "depth": depth,
+                    "counted": counted,
+                }
             )
-            .sum(numeric_only=True)
-            .reset_index()
+            ancestor = parents.get(ancestor)
+            depth += 1
+            counted = counted and ancestor not in measured
+
+    session.execute(delete(PSRClosureTable))
+    if rows:
+        session.connection().execute(insert(PSRClosureTable.__table__), rows)
+    logger.info(
+        "Rebuilt the closure of %d PSRs in %.2fs",
+        len(parents.keys() | measured),
+        time.perf_counter() - start,
+    )
+
+
+def refresh_rollups(session: Session, ids: Iterable[str]) -> None:
+    """Recompute the generation rollups of the given PSRs from their rows."""
+    ids = sorted(ids)
+    start = time.perf_counter()
+    session.flush()
+    for resolution, table in ROLLUPS.items():
+        session.execute(delete(table).where(table.id.in_(ids)))
+        rows = select_rollup(resolution).filter(GenerationByFuelSourceTable.id.in_(ids))
+        session.execute(
+            insert(table).from_select(list(rows.selected_columns.keys()), rows)
         )
-        for power_system_resource_id in df_by_interconnection["Parent Node"].unique():
-            df_generation_rows = pd.melt(
-                df_by_interconnection,
-                id_vars=["Parent Node", "start_datetime", "end_datetime", "unit"],
-                var_name="fuel_type",
-                value_name="value",
-            ).reset_index()
-
-            generation_interconnection_by_fuel_source.extend(
-                [
-                    GenerationByFuelSourceTable(
-                        start_datetime=row["start_datetime"],
-                        end_datetime=row["end_datetime"],
-                        type=row["fuel_type"],
-                        technology=None,
-                        unit=row["unit"],
-                        value=row["value"],
-                        id=power_system_resource_id,
-                    )
-                    for _, row in df_generation_rows.iterrows()
-                ]
-            )
+    logger.info(
+        "Refreshed the rollups of %d PSRs in %.2fs",
+        len(ids),
+        time.perf_counter() - start,
+    )
+
+
+def export_parquet(
+    session: Session,
+    version: str,
+    previous_version: str | None = None,
+    generation_ids: Iterable[str] = (),
+) -> None:
+    """
+    Bring the Parquet dataset of the generation up to date with the database.
 
-            # Also add the fuel types
-            fuel_types.extend(
-                [
-                    FuelType(name=fuel_type, id=fuel_type)
-                    for fuel_type in df_generation_rows["fuel_type"].unique().tolist()
-                ]
-            )
+    When the files were written for ``previous_version`` only the partitions
+    of ``generation_ids`` are written again, otherwise all of them are.
+    """
+    root = settings.parquet_dir
+    written = parquet_store.read_version(root)
+    if written == version:
+        return
+    start = time.perf_counter()
+    manifest = read_manifest(session)
+    # Each PSR is partitioned under the source whose files publish it
+    sources = {
+        psr_id: seed_file.source
+        for seed_file in seed_files()
+        if seed_file.table is GenerationByFuelSourceTable and seed_file.path in manifest
+        for psr_id in json.loads(manifest[seed_file.path].keys)
+    }
+    statement = select(
+        GenerationByFuelSourceTable.id,
+        *[
+            getattr(GenerationByFuelSourceTable, column)
+            for column in parquet_store.COLUMNS
+        ],
+    )
+    if written is not None and written == previous_version:
+        ids = set(generation_ids)
+        parquet_store.remove_psrs(root, ids)
+        statement = statement.filter(GenerationByFuelSourceTable.id.in_(ids))
+    else:
+        parquet_store.clear(root)
+
+    connection = session.connection()
+    result = connection.exec_driver_sql(*driver_sql(statement, connection.dialect))
+    df = pd.DataFrame(result.all(), columns=list(result.keys()))
+    # Read without result processing: datetimes as text, units as enum names
+    df = df.assign(
+        start_datetime=pd.to_datetime(df["start_datetime"]),
+        end_datetime=pd.to_datetime(df["end_datetime"]),
+        unit=df["unit"].map({unit.name: unit.value for unit in ElectricityUnit}),
+    )
+    for psr_id, rows in df.groupby("id", sort=False):
+        parquet_store.write_psr(root, sources.get(psr_id, "unknown"), psr_id, rows)
+    parquet_store.write_version(root, version)
+    logger.info(
+        "Exported the generation of %d PSRs to %s in %.2fs",
+        df["id"].nunique(),
+        root,
+        time.perf_counter() - start,
+    )
+
+
+def export_duckdb(session: Session, version: str) -> None:
+    """Copy the database to DuckDB, unless the copy is of ``version`` already."""
+    if analytics_db.read_version(settings.duckdb_file) == version:
+        return
+    start = time.perf_counter()
+    analytics_db.copy_tables(session.connection(), settings.duckdb_file, version)
+    logger.info(
+        "Copied the database to %s in %.2fs",
+        settings.duckdb_file,
+        time.perf_counter() - start,
+    )
+
+
+METADATA_FILES = [
+    SeedFile(
+        "example/topology_metadata.csv",
+        seed_topology_levels,
+        clear_tables(TopologyLevel),
+    ),
+    SeedFile(
+        "example/fuel_source_metadata.csv",
+        seed_fuelsource,
+        clear_tables(FuelSourceType, FuelSourceTechnologyReferenceTable),
+    ),
+    SeedFile(
+        "example/psr_metadata.json",
+        seed_psr,
+        clear_tables(PSRList, CapacityTable, PSRInterconnectionTable),
+    ),
+]
+
+
+def seed_files() -> list[SeedFile]:
+    """The metadata files followed by every file of the registered sources."""
+    return METADATA_FILES + [
+        SeedFile(
+            path,
+            partial(write_source_rows, source_file.table),
+            clear_ids(source_file.table),
+            parse=partial(parse_source_file, source_file),
+            source=source.name,
+            table=source_file.table,
+        )
+        for source in SOURCES.values()
+        for path, source_file in source.paths(data_dir())
+    ]
+
+
+def parse_timed(
+    parse: Callable[[str], ColumnArrays], path: str
+) -> tuple[ColumnArrays, float]:
+    start = time.perf_counter()
+    rows = parse(path)
+    return rows, time.perf_counter() - start
 
-        for power_system_resource_id in df_generation["Grid Node"].unique():
-            print(power_system_resource_id)
-            df_this_nodes_generation = df_generation[
-                df_generation["Grid Node"] == power_system_resource_id
-            ]
-            df_generation_rows = pd.melt(
-                df_this_nodes_generation,
-                id_vars=[
-                    "Grid Node",
-                    "Parent Node",
-                    "start_datetime",
-                    "end_datetime",
-                    "unit",
-                ],
-                var_name="fuel_type",
-                value_name="value",
-            ).reset_index()
-
-            generation_balancing_area_by_fuel_source.extend(
-                [
-                    GenerationByFuelSourceTable(
-                        start_datetime=row["start_datetime"],
-                        end_datetime=row["end_datetime"],
-                        type=row["fuel_type"],
-                        technology=None,
-                        unit=row["unit"],
-                        value=row["value"],
-                        id=power_system_resource_id,
-                    )
-                    for _, row in df_generation_rows.iterrows()
-                ]
-            )
 
-        """
-        # Generation per unit
-        # Find pattern generation-*.csv
-        for file in os.listdir(os.path.join(DATA_DIR, grid_source)):
-            if file.startswith("generation_") and file.endswith(".csv"):
-                df_generation = pd.read_csv(os.path.join(DATA_DIR, grid_source, file))
-                breakpoint()
-        """
-
-    session.add_all(list(set(fuel_types)))
-    session.add_all(generation_interconnection_by_fuel_source)
-    session.add_all(generation_balancing_area_by_fuel_source)
-    session.commit()
+def parse_files(
+    seed_files: list[SeedFile], workers: int | None = None
+) -> dict[str, tuple[ColumnArrays, float]]:
+    """
+    Parse source files, in a process pool unless ``workers`` is 0, by path.
+
+    Reading and reshaping the files is CPU-bound and independent per file.
+    The workers send back compact column arrays and the database writes stay
+    in the calling process, which is the only writer.
+    """
+    if workers is None:
+        workers = settings.seed_workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    parses = [seed_file.parse for seed_file in seed_files]
+    paths = [os.path.join(data_dir(), seed_file.path) for seed_file in seed_files]
+    if workers == 0 or len(paths) < 2:
+        results = list(map(parse_timed, parses, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=min(len(paths), workers)) as pool:
+            results = list(pool.map(parse_timed, parses, paths))
+    return {seed_file.path: result for seed_file, result in zip(seed_files, results)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Seed the database from the files in the data directory."
+    )
+    parser.add_argument(
+        "--reset", action="store_true", help="drop every table and seed from scratch"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    seed(reset=args.reset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Data sources seeded into the database.
+
+A source is a directory under ``data/``. It registers the files it publishes,
+which table each file feeds and how the file's columns map onto that table.
+"""
+import glob
+import os
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from sqlmodel import SQLModel
+
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    ExchangeTable,
+    GenerationByFuelSourceTable,
+    InstalledCapacityTable,
+    LoadForecastTable,
+)
+
+DATETIME_COLUMNS = ["start_datetime", "end_datetime"]
+
+# Columns of a wide generation file that are not fuel types
+GENERATION_ID_COLUMNS = [
+    "Grid Node",
+    "Parent Node",
+    "Topology Level",
+    "start_datetime",
+    "end_datetime",
+    "unit",
+]
+INTERVAL_KEYS = ["start_datetime", "end_datetime", "unit"]
+# Columns placing the grid nodes of a file in the PSR hierarchy
+HIERARCHY_COLUMNS = {
+    "Grid Node": "id",
+    "Parent Node": "parent",
+    "Topology Level": "level",
+}
+
+
+@dataclass(frozen=True)
+class SourceFile:
+    """Files of a source matching ``pattern`` and the table they feed."""
+
+    pattern: str
+    table: type[SQLModel]
+    # File column -> table column. The datetimes and unit keep their names.
+    columns: dict[str, str]
+    # Reshapes the renamed file into table rows, e.g. wide to long format
+    transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    files: tuple[SourceFile, ...]
+
+    def paths(self, data_dir: str) -> list[tuple[str, SourceFile]]:
+        """Existing files of this source, as paths relative to ``data_dir``."""
+        return [
+            (os.path.relpath(path, data_dir), source_file)
+            for source_file in self.files
+            for path in sorted(
+                glob.glob(os.path.join(data_dir, self.name, source_file.pattern))
+            )
+        ]
+
+
+SOURCES: dict[str, Source] = {}
+
+
+def register_source(name: str, *files: SourceFile) -> Source:
+    source = Source(name=name, files=files)
+    SOURCES[name] = source
+    return source
+
+
+def melt_generation(df_generation: pd.DataFrame) -> pd.DataFrame:
+    """
+    Long-format generation rows for the grid nodes of a generation file.
+
+    Parent nodes get no rows of their own: their generation is summed from
+    their descendants through the PSR closure table when it is read.
+    """
+    fuel_types = [
+        column
+        for column in df_generation.columns
+        if column not in GENERATION_ID_COLUMNS
+    ]
+    df_rows = df_generation.rename(columns={"Grid Node": "id"}).melt(
+        id_vars=["id", *INTERVAL_KEYS],
+        value_vars=fuel_types,
+        var_name="type",
+        value_name="value",
+    )
+    df_rows["technology"] = None
+    return df_rows
+
+
+def read_hierarchy(path: str) -> pd.DataFrame:
+    """
+    The grid nodes of a source file with their parent and topology level,
+    one row per node; columns the file lacks are left empty.
+    """
+    df = pd.read_csv(path, usecols=lambda column: column in HIERARCHY_COLUMNS)
+    df = df.rename(columns=HIERARCHY_COLUMNS)
+    if "id" not in df:
+        return pd.DataFrame(columns=list(HIERARCHY_COLUMNS.values()))
+    return df.reindex(columns=list(HIERARCHY_COLUMNS.values())).drop_duplicates()
+
+
+def read_source_file(source_file: SourceFile, path: str) -> pd.DataFrame:
+    """
+    Read a source file into rows shaped like its table.
+
+    This only touches the file, so it can run in a worker process.
+    """
+    df = pd.read_csv(path, parse_dates=DATETIME_COLUMNS)
+    df = df.rename(columns=source_file.columns)
+    if source_file.transform is not None:
+        df = source_file.transform(df)
+    df["timezone"] = "UTC"
+    table_columns = source_file.table.__table__.columns.keys()
+    return df[[column for column in table_columns if column in df]]
+
+
+def code_dtype(categories: int) -> type[np.signedinteger]:
+    """The smallest signed integer type holding codes for ``categories``."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+@dataclass(frozen=True)
+class ColumnArrays:
+    """
+    Table rows as one numpy array per column.
+
+    String columns are dictionary encoded: ``columns`` holds integer codes
+    into ``categories``, so the handful of distinct ids, fuel types and units
+    is sent back from a worker once instead of once per row.
+    """
+
+    columns: dict[str, np.ndarray]
+    categories: dict[str, list]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ColumnArrays":
+        columns = {}
+        categories = {}
+        for name in df.columns:
+            if df[name].dtype == object:
+                codes, uniques = pd.factorize(df[name])
+                columns[name] = codes.astype(code_dtype(len(uniques)))
+                # Missing values get the code -1, i.e. the trailing None
+                categories[name] = [*uniques, None]
+            else:
+                columns[name] = df[name].to_numpy()
+        return cls(columns=columns, categories=categories)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def unique(self, name: str) -> list:
+        return self.categories[name][:-1]
+
+    def tolist(self, name: str) -> list:
+        """The values of a column as Python objects, ready to bind."""
+        column = self.columns[name]
+        if name in self.categories:
+            categories = np.array(self.categories[name], dtype=object)
+            return categories[column.astype(np.intp)].tolist()
+        if column.dtype.kind == "M":
+            return column.astype("datetime64[us]").tolist()
+        return column.tolist()
+
+
+def parse_source_file(source_file: SourceFile, path: str) -> ColumnArrays:
+    return ColumnArrays.from_frame(read_source_file(source_file, path))
+
+
+GENERATION = SourceFile(
+    "generation.csv", GenerationByFuelSourceTable, {}, melt_generation
+)
+# Generation of single units, already in long format
+UNIT_GENERATION = SourceFile(
+    "generation_*.csv",
+    GenerationByFuelSourceTable,
+    {"Grid Node": "id", "Fuel Type": "type", "value": "value"},
+)
+LOAD_FORECAST = SourceFile("load_forecast.csv", LoadForecastTable, {"Grid Node": "id"})
+EXCHANGES = SourceFile(
+    "imports_exports.csv",
+    ExchangeTable,
+    {"Grid Node From": "id", "Grid Node To": "connectedPSR", "Value": "value"},
+)
+INSTALLED_CAPACITY = SourceFile(
+    "installed_capacity.csv",
+    InstalledCapacityTable,
+    {"Grid Node": "id", "Fuel Type": "type", "Value": "value"},
+)
+
+register_source("EIA", GENERATION, LOAD_FORECAST, EXCHANGES, INSTALLED_CAPACITY)
+register_source("ELEXON", GENERATION, LOAD_FORECAST, EXCHANGES, INSTALLED_CAPACITY)
+register_source(
+    "ENTSO-E",
+    GENERATION,
+    UNIT_GENERATION,
+    LOAD_FORECAST,
+    EXCHANGES,
+    INSTALLED_CAPACITY,
+)
@@ -0,0 +1,54 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Conversions between the units a quantity is published in.
+
+Sources publish energy in MWh, kWh or Wh and power in MW, kW or W, and the
+rows of a range can mix them. Values are converted a whole column at a
+time: every distinct unit is looked up once, each row gets the power of ten
+between its unit and the target, and the column is scaled in one NumPy
+operation. Values already in the target unit keep their exact float.
+"""
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# Power of ten of every unit in the base unit of its quantity
+UNIT_EXPONENTS = {"Wh": 0, "kWh": 3, "MWh": 6, "W": 0, "kW": 3, "MW": 6}
+# Units of the rows mixing units are converted to, unless asked otherwise
+ENERGY_UNIT = "MWh"
+POWER_UNIT = "MW"
+
+
+def unit_value(unit: Any) -> str:
+    """The unit as published, from an enum member or its value."""
+    return getattr(unit, "value", unit)
+
+
+def unit_exponents(units: Any) -> np.ndarray:
+    """The power of ten of every unit of ``units``, a unit or a column of them."""
+    if isinstance(units, str):
+        return np.array(UNIT_EXPONENTS[unit_value(units)])
+    codes, distinct = pd.factorize(np.asarray(units, dtype=object))
+    exponents = np.array(
+        [UNIT_EXPONENTS[unit_value(unit)] for unit in distinct], dtype=int
+    )
+    return exponents[codes]
+
+
+def convert(values: np.ndarray, units: Any, to: Any) -> np.ndarray:
+    """
+    ``values``, in ``units`` (one unit or one per value), converted to the
+    units ``to`` (likewise).
+    """
+    exponents = unit_exponents(units) - unit_exponents(to)
+    if not exponents.any():
+        return values
+    scale = 10.0 ** np.abs(exponents)
+    return np.where(exponents > 0, values * scale, values / scale)
+
+
+def common_unit(units: Any, default: str) -> str:
+    """The unit all of ``units`` are in, or ``default`` when they mix units."""
+    distinct = {unit_value(unit) for unit in pd.unique(np.asarray(units, dtype=object))}
+    return distinct.pop() if len(distinct) == 1 else default
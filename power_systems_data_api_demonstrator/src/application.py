@@ -9,6 +9,12 @@ from fastapi.openapi.utils import get_openapi
 from fastapi.responses import UJSONResponse
 from fastapi.staticfiles import StaticFiles
 
+from power_systems_data_api_demonstrator.src.api.conditional import (
+    ConditionalGetMiddleware,
+    NotModified,
+    not_modified_handler,
+)
+from power_systems_data_api_demonstrator.src.api.metrics import MetricsMiddleware
 from power_systems_data_api_demonstrator.src.api.router import api_router
 from power_systems_data_api_demonstrator.static.docs.utils import (
     get_app_description,
@@ -32,6 +38,11 @@ def get_app() -> FastAPI:
 
     # Main router for the API.
     app.include_router(api_router)
+    # ETag and Cache-Control headers of the read endpoints.
+    app.add_middleware(ConditionalGetMiddleware)
+    app.add_exception_handler(NotModified, not_modified_handler)
+    # Latency, stage timings and sizes of every request, for /metrics.
+    app.add_middleware(MetricsMiddleware)
     # Adds static directory.
     # This directory is used to access swagger files.
     app.mount(
@@ -1,16 +1,34 @@
 # SPDX-License-Identifier: Apache-2.0
 import os
+from datetime import datetime, timedelta
 from httpx import Client
 
 
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 import power_systems_data_api_demonstrator.src.api.db
 import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlmodel import Session, create_engine, SQLModel
 
-from power_systems_data_api_demonstrator.settings import settings
+from power_systems_data_api_demonstrator.settings import QueryEngine, settings
+from power_systems_data_api_demonstrator.src.api.analytics_db import (
+    analytics_db,
+    copy_tables,
+)
+from power_systems_data_api_demonstrator.src.api.cache import response_cache
+from power_systems_data_api_demonstrator.src.api.memory_store import generation_store
+from power_systems_data_api_demonstrator.src.api.parquet_store import parquet_dataset
+from power_systems_data_api_demonstrator.src.api.psr_metadata.views import PSRList
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    GenerationByFuelSourceTable,
+)
+from power_systems_data_api_demonstrator.src.api.seed import (
+    refresh_closure,
+    refresh_rollups,
+)
 from power_systems_data_api_demonstrator.src.application import get_app
 import tempfile
 
@@ -39,13 +57,97 @@ def fastapi_app(session) -> FastAPI:
     :return: fastapi app with mocked dependencies.
     """
     application = get_app()
+    response_cache.clear()
+    generation_store.clear()
+    parquet_dataset.clear()
+    analytics_db.clear()
+
+    # TestClient runs every request in a fresh event loop, so aiosqlite
+    # connections must not be pooled across requests.
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{session.get_bind().url.database}",
+        poolclass=NullPool,
+    )
+
+    async def get_test_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as db:
+            yield db
 
     application.dependency_overrides[
         power_systems_data_api_demonstrator.src.api.db.get_session
     ] = lambda: session
+    application.dependency_overrides[
+        power_systems_data_api_demonstrator.src.api.db.get_async_session
+    ] = get_test_async_session
     return application  # noqa: WPS331
 
 
+class DuckDBTestClient(TestClient):
+    """Copies the test database to DuckDB before each request, as the seeder would."""
+
+    def __init__(self, app: FastAPI, session: Session, **kwargs) -> None:
+        super().__init__(app, **kwargs)
+        self.session = session
+        self.copied_changes = None
+
+    def request(self, *args, **kwargs):
+        # The tests write through the session, so its connection counts them
+        connection = self.session.connection()
+        changes = connection.exec_driver_sql("SELECT total_changes()").scalar()
+        if changes != self.copied_changes:
+            copy_tables(connection, settings.duckdb_file, None)
+            analytics_db.clear()
+            self.copied_changes = changes
+        return super().request(*args, **kwargs)
+
+
+@pytest.fixture(params=list(QueryEngine))
+def query_engine(request, monkeypatch, tmp_path) -> QueryEngine:
+    """Every test of the API runs once per query engine."""
+    if request.param is QueryEngine.duckdb:
+        pytest.importorskip("duckdb")
+    monkeypatch.setattr(settings, "query_engine", request.param)
+    monkeypatch.setattr(settings, "duckdb_file", tmp_path / "pytest_db.duckdb")
+    return request.param
+
+
 @pytest.fixture
-def fastapi_client(fastapi_app: FastAPI):
+def fastapi_client(fastapi_app: FastAPI, session, query_engine: QueryEngine):
+    if query_engine is QueryEngine.duckdb:
+        return DuckDBTestClient(fastapi_app, session, base_url="http://test")
     return TestClient(fastapi_app, base_url="http://test")
+
+
+@pytest.fixture
+def _seed_hierarchy(session) -> None:
+    session.add_all(
+        [
+            PSRList(id="TEST-AREA", level=1),
+            PSRList(id="TEST-PLANT", level=2, parent="TEST-AREA"),
+            PSRList(id="TEST-OTHER", level=2, parent="TEST-AREA"),
+        ]
+    )
+    start = datetime(2021, 1, 31, 20)
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=start + timedelta(hours=hour),
+                end_datetime=start + timedelta(hours=hour + 1),
+                type=fuel_type,
+                technology=technology,
+                unit="MWh",
+                value=hour + offset,
+                id=psr_id,
+            )
+            for psr_id, fuel_type, technology, offset in [
+                ("TEST-PLANT", "solar", "PV", 0.5),
+                ("TEST-PLANT", "solar", None, 1.0),
+                ("TEST-OTHER", "wind", None, 2.0),
+            ]
+            for hour in range(8)
+            if psr_id != "TEST-OTHER" or hour % 2
+        ]
+    )
+    refresh_closure(session)
+    refresh_rollups(session, ["TEST-PLANT", "TEST-OTHER"])
+    session.commit()
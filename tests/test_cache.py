@@ -0,0 +1,55 @@
+# SPDX-License-Identifier: Apache-2.0
+from httpx import Client
+from sqlmodel import Session
+
+from power_systems_data_api_demonstrator.src.api.cache import (
+    ResponseCache,
+    response_cache,
+)
+from power_systems_data_api_demonstrator.src.api.dataset import write_dataset_version
+from power_systems_data_api_demonstrator.src.api.metadata.views import TopologyLevel
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    cache = ResponseCache(maxsize=2)
+    cache.put("a", b"1", "application/json")
+    cache.put("b", b"2", "application/json")
+    assert cache.get("a") is not None
+    cache.put("c", b"3", "application/json")
+
+    assert cache.get("b") is None
+    assert cache.get("a").body == b"1"
+    assert cache.stats.evictions == 1
+
+
+def test_ttl_expires_entries() -> None:
+    cache = ResponseCache(maxsize=2, ttl=0)
+    cache.put("a", b"1", "application/json")
+
+    assert cache.get("a") is None
+    assert cache.stats.misses == 1
+
+
+def test_metadata_is_served_from_cache_until_version_changes(
+    fastapi_client: Client, session: Session
+) -> None:
+    session.add(TopologyLevel(id="Level 1", level=1))
+    write_dataset_version(session, "v1")
+    session.commit()
+
+    first = fastapi_client.get("/metadata/topology-levels")
+    session.add(TopologyLevel(id="Level 2", level=2))
+    session.commit()
+    second = fastapi_client.get("/metadata/topology-levels")
+
+    assert second.content == first.content
+    assert response_cache.stats.hits >= 1
+
+    write_dataset_version(session, "v2")
+    session.commit()
+    # The next request re-reads the version
+    response_cache.version_checked_at = float("-inf")
+    third = fastapi_client.get("/metadata/topology-levels")
+
+    assert len(third.json()["topology_levels"]) == 2
+    assert response_cache.version == "v2"
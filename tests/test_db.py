@@ -0,0 +1,31 @@
+# SPDX-License-Identifier: Apache-2.0
+import pytest
+from sqlalchemy import text
+
+from power_systems_data_api_demonstrator.settings import settings
+from power_systems_data_api_demonstrator.src.api import db
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "db_file", tmp_path / "pool.sqlite3")
+    db.dispose_engine()
+    yield db.get_engine()
+    db.dispose_engine()
+
+
+def test_engine_is_shared(engine) -> None:
+    assert db.get_engine() is engine
+
+
+def test_pragmas_and_pool_stats(engine) -> None:
+    for session in (next(db.get_session()), next(db.get_session())):
+        journal_mode = session.execute(text("PRAGMA journal_mode")).scalar()
+        assert journal_mode == "wal"
+        session.close()
+
+    status = db.pool_status(engine)
+    assert status["connects"] == 1
+    assert status["checkouts"] == 2
+    assert status["checked_out"] == 0
+    assert status["size"] == settings.db_pool_size
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: Apache-2.0
+import pytest
+from httpx import Client
+from sqlalchemy import update
+
+from power_systems_data_api_demonstrator.settings import GenerationBackend, settings
+from power_systems_data_api_demonstrator.src.api.psr_timeseries import views
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    GenerationByFuelSourceTable,
+)
+from power_systems_data_api_demonstrator.src.api.seed import refresh_rollups
+
+URL = "/power-systems-resource/{}/timeseries/generation"
+PARAMS = {
+    "startDatetime": "2021-01-01T00:00:00Z",
+    "endDatetime": "2021-03-01T00:00:00Z",
+}
+
+
+@pytest.mark.parametrize("psr_id", ["TEST-AREA", "TEST-PLANT", "TEST-MISSING"])
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"resolution": "PT1H"},
+        {"resolution": "P1D"},
+        {"unit": "kWh"},
+        {"unit": "Wh", "resolution": "P1D", "stream": True},
+        {"resolution": "P1M"},
+        {"startDatetime": "2021-01-31T21:30:00Z", "endDatetime": "2021-02-01T02:00Z"},
+        {"startDatetime": "2021-02-01T00:00:00Z", "resolution": "P1D"},
+        {"stream": True},
+    ],
+)
+def test_memory_backend_matches_sql(
+    fastapi_client: Client, _seed_hierarchy, monkeypatch, psr_id: str, params: dict
+) -> None:
+    params = {**PARAMS, **params}
+    from_sql = fastapi_client.get(URL.format(psr_id), params=params)
+
+    monkeypatch.setattr(settings, "generation_backend", GenerationBackend.memory)
+    from_memory = fastapi_client.get(URL.format(psr_id), params=params)
+
+    assert from_memory.status_code == from_sql.status_code == 200
+    assert from_memory.content == from_sql.content
+    assert from_memory.headers.get("x-unit") == from_sql.headers.get("x-unit")
+
+
+def test_memory_backend_does_not_query_once_loaded(
+    fastapi_client: Client, _seed_hierarchy, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "generation_backend", GenerationBackend.memory)
+    expected = fastapi_client.get(URL.format("TEST-AREA"), params=PARAMS).json()
+
+    async def fail(*args):
+        raise AssertionError("the database was queried")
+
+    monkeypatch.setattr(views, "fetch_frame", fail)
+    response = fastapi_client.get(URL.format("TEST-AREA"), params=PARAMS)
+
+    assert response.json() == expected
+    assert expected["generation"][1]["value"] == 1.5 + 2.0 + 3.0
+
+
+@pytest.mark.parametrize(
+    "params", [{}, {"resolution": "PT1H"}, {"resolution": "P1D"}, {"stream": True}]
+)
+def test_memory_backend_keeps_timezones_apart(
+    fastapi_client: Client, _seed_hierarchy, session, monkeypatch, params: dict
+) -> None:
+    session.execute(
+        update(GenerationByFuelSourceTable)
+        .where(GenerationByFuelSourceTable.id == "TEST-OTHER")
+        .values(timezone="Europe/Madrid")
+    )
+    refresh_rollups(session, ["TEST-OTHER"])
+    session.commit()
+    params = {**PARAMS, **params}
+    from_sql = fastapi_client.get(URL.format("TEST-AREA"), params=params)
+
+    monkeypatch.setattr(settings, "generation_backend", GenerationBackend.memory)
+    from_memory = fastapi_client.get(URL.format("TEST-AREA"), params=params)
+
+    assert from_memory.content == from_sql.content
+    assert b"+01:00" in from_memory.content
@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: Apache-2.0
+import os
+from datetime import datetime
+
+from httpx import Client
+from prometheus_client.parser import text_string_to_metric_families
+
+from power_systems_data_api_demonstrator.__main__ import prepare_metrics_dir
+from power_systems_data_api_demonstrator.settings import settings
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    GenerationByFuelSourceTable,
+)
+from power_systems_data_api_demonstrator.src.api.seed import refresh_closure
+
+ROUTE = "/power-systems-resource/{id}/timeseries/generation"
+
+
+def samples(client: Client) -> dict[tuple[str, frozenset], float]:
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, frozenset(sample.labels.items())): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+def test_metrics_record_generation_stages(fastapi_client: Client, session) -> None:
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=datetime(2021, 1, 1, hour),
+                end_datetime=datetime(2021, 1, 1, hour + 1),
+                type="solar",
+                technology=None,
+                unit="MWh",
+                value=1,
+                id="TEST-AREA",
+            )
+            for hour in range(3)
+        ]
+    )
+    refresh_closure(session)
+    session.commit()
+    before = samples(fastapi_client)
+
+    response = fastapi_client.get(
+        "/power-systems-resource/TEST-AREA/timeseries/generation",
+        params={
+            "startDatetime": "2021-01-01T00:00:00Z",
+            "endDatetime": "2021-01-02T00:00:00Z",
+        },
+    )
+    after = samples(fastapi_client)
+
+    def increase(name: str, **labels: str) -> float:
+        key = (name, frozenset({"route": ROUTE, **labels}.items()))
+        return after[key] - before.get(key, 0.0)
+
+    request = {"method": "GET", "status": "200"}
+    assert increase("http_request_duration_seconds_count", **request) == 1
+    assert increase("http_request_duration_seconds_sum", **request) > 0
+    assert increase("http_response_rows_sum") == 3
+    assert increase("http_response_size_bytes_sum") == len(response.content)
+    for name in ["query", "transform", "validate", "serialize"]:
+        assert increase("http_request_stage_duration_seconds_count", stage=name) == 1
+
+
+def test_prepare_metrics_dir_removes_only_samples(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "metrics_dir", tmp_path)
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "")
+    samples_files = ["counter_12.db", "histogram_12.db", "gauge_livesum_12.db"]
+    foreign_files = ["notes.txt", "data.db", "counter_backup.db"]
+    for name in samples_files + foreign_files:
+        (tmp_path / name).write_text("")
+
+    prepare_metrics_dir()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(foreign_files)
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == str(tmp_path)
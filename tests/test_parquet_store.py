@@ -0,0 +1,93 @@
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime
+
+import pytest
+from httpx import Client
+from sqlalchemy import update
+
+from power_systems_data_api_demonstrator.settings import GenerationBackend, settings
+from power_systems_data_api_demonstrator.src.api import parquet_store
+from power_systems_data_api_demonstrator.src.api.parquet_store import parquet_dataset
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    GenerationByFuelSourceTable,
+)
+from power_systems_data_api_demonstrator.src.api.seed import export_parquet
+
+pytest.importorskip("pyarrow")
+
+URL = "/power-systems-resource/{}/timeseries/generation"
+PARAMS = {
+    "startDatetime": "2021-01-01T00:00:00Z",
+    "endDatetime": "2021-03-01T00:00:00Z",
+}
+
+
+@pytest.fixture
+def _export(session, _seed_hierarchy, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "parquet_dir", tmp_path)
+    export_parquet(session, "v1")
+
+
+@pytest.mark.parametrize("psr_id", ["TEST-AREA", "TEST-PLANT", "TEST-MISSING"])
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"resolution": "PT1H"},
+        {"resolution": "P1D"},
+        {"unit": "kWh"},
+        {"unit": "Wh", "resolution": "P1D", "stream": True},
+        {"startDatetime": "2021-01-31T21:30:00Z", "endDatetime": "2021-02-01T02:00Z"},
+        {"stream": True},
+    ],
+)
+def test_parquet_backend_matches_sql(
+    fastapi_client: Client, _export, monkeypatch, psr_id: str, params: dict
+) -> None:
+    params = {**PARAMS, **params}
+    from_sql = fastapi_client.get(URL.format(psr_id), params=params)
+
+    monkeypatch.setattr(settings, "generation_backend", GenerationBackend.parquet)
+    from_parquet = fastapi_client.get(URL.format(psr_id), params=params)
+
+    assert from_parquet.status_code == from_sql.status_code == 200
+    assert from_parquet.content == from_sql.content
+    assert from_parquet.headers.get("x-unit") == from_sql.headers.get("x-unit")
+
+
+def test_parquet_dataset_reads_partitions_in_range(_export, tmp_path) -> None:
+    assert parquet_store.read_version(tmp_path) == "v1"
+    parquet_dataset.open(tmp_path, "v1")
+
+    df = parquet_dataset.read(
+        ["TEST-OTHER"], datetime(2021, 2, 1), datetime(2021, 2, 1, 4)
+    )
+
+    assert df["id"].unique().tolist() == ["TEST-OTHER"]
+    assert df["start_datetime"].tolist() == [
+        datetime(2021, 2, 1, 1),
+        datetime(2021, 2, 1, 3),
+    ]
+    assert df["unit"].unique().tolist() == ["MWh"]
+
+
+def test_export_parquet_rewrites_changed_psrs(session, _export, tmp_path) -> None:
+    plant_file = parquet_store.partition_dir(tmp_path, "unknown", "TEST-PLANT")
+    plant_mtime = (plant_file / "part-0.parquet").stat().st_mtime_ns
+    session.execute(
+        update(GenerationByFuelSourceTable)
+        .filter(GenerationByFuelSourceTable.id == "TEST-OTHER")
+        .values(value=10.0)
+    )
+    session.commit()
+
+    export_parquet(session, "v2", "v1", ["TEST-OTHER"])
+    parquet_dataset.open(tmp_path, "v2")
+    df = parquet_dataset.read(
+        ["TEST-OTHER", "TEST-PLANT"], datetime(2021, 1, 1), datetime(2021, 3, 1)
+    )
+
+    assert parquet_store.read_version(tmp_path) == "v2"
+    assert (plant_file / "part-0.parquet").stat().st_mtime_ns == plant_mtime
+    assert df[df["id"] == "TEST-OTHER"]["value"].unique().tolist() == [10.0]
+    assert len(df[df["id"] == "TEST-PLANT"]) == 16
@@ -0,0 +1,61 @@
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime
+
+from sqlalchemy import Select
+
+from power_systems_data_api_demonstrator.src.api.psr_metadata.views import (
+    select_capacity,
+    select_transmission_capacity,
+)
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    Resolution,
+    select_generation,
+    select_generation_buckets,
+)
+
+
+def query_plan(session, statement: Select) -> str:
+    connection = session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    params = compiled.construct_params()
+    rows = connection.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compiled}",
+        tuple(params[name] for name in compiled.positiontup),
+    )
+    return "\n".join(row.detail for row in rows)
+
+
+def test_generation_uses_covering_time_range_index(session) -> None:
+    plan = query_plan(
+        session,
+        select_generation("TEST", datetime(2021, 1, 1), datetime(2021, 2, 1)),
+    )
+    assert "SEARCH psrclosuretable USING INDEX" in plan
+    assert (
+        "USING COVERING INDEX ix_generation_id_start_covering "
+        "(id=? AND start_datetime>? AND start_datetime<?)" in plan
+    )
+
+
+def test_daily_generation_scans_the_daily_rollup(session) -> None:
+    plan = query_plan(
+        session,
+        select_generation_buckets(
+            "TEST", datetime(2021, 1, 1), datetime(2022, 1, 1), Resolution.day
+        ),
+    )
+    assert (
+        "SEARCH generationdailytable USING INDEX "
+        "sqlite_autoindex_generationdailytable_1 "
+        "(id=? AND start_datetime>? AND start_datetime<?)" in plan
+    )
+
+
+def test_capacity_uses_id_index(session) -> None:
+    plan = query_plan(session, select_capacity("TEST"))
+    assert "USING INDEX ix_capacity_id_type_start (id=?)" in plan
+
+
+def test_transmission_capacity_uses_id_index(session) -> None:
+    plan = query_plan(session, select_transmission_capacity("TEST"))
+    assert "USING INDEX ix_psrinterconnection_id (id=?)" in plan
@@ -1,11 +1,31 @@
 # SPDX-License-Identifier: Apache-2.0
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
 import pytest
 from sqlmodel import Session
 from httpx import Client
+from power_systems_data_api_demonstrator.settings import GenerationBackend, settings
+from power_systems_data_api_demonstrator.src.api.cache import response_cache
+from power_systems_data_api_demonstrator.src.api.dataset import write_dataset_version
+from power_systems_data_api_demonstrator.src.api.seed import (
+    export_parquet,
+    refresh_closure,
+    refresh_rollups,
+)
+from power_systems_data_api_demonstrator.src.api.psr_timeseries import views
 from power_systems_data_api_demonstrator.src.api.metadata.views import TopologyLevel
+from power_systems_data_api_demonstrator.src.api.psr_metadata.views import (
+    CapacityTable,
+    PSRInterconnectionTable,
+    PSRList,
+)
 from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
     GenerationByFuelSourceTable,
+    GenerationDailyTable,
+    GenerationMonthlyTable,
+    GenerationResponse,
+    Resolution,
+    generation_source,
     FuelType,
     FuelTechnology,
 )
@@ -55,3 +75,939 @@ async def test_generation(fastapi_client: Client, _seed) -> None:
     )
     assert response.is_success
     assert response.json()
+
+
+async def test_generation_in_range(fastapi_client: Client, _seed) -> None:
+    response = fastapi_client.get(
+        url="/power-systems-resource/TEST-SOLAR-PV2/timeseries/generation",
+        params={
+            "startDatetime": "2021-01-01T00:00:00Z",
+            "endDatetime": "2021-01-02T00:00:00Z",
+        },
+    )
+    assert response.is_success
+    assert response.json() == {
+        "id": "TEST-SOLAR-PV2",
+        "unit": "MWh",
+        "generation": [
+            {
+                "start_datetime": "2021-01-01T00:00:00Z",
+                "end_datetime": "2021-01-01T01:00:00Z",
+                "value": 200.0,
+                "value_by_fuel_source": [
+                    {
+                        "id": "TEST-SOLAR-PV2",
+                        "type": "solar",
+                        "technology": "PV2",
+                        "value": 200.0,
+                    }
+                ],
+            }
+        ],
+    }
+
+
+async def test_topology_levels(fastapi_client: Client, _seed) -> None:
+    response = fastapi_client.get(url="/metadata/topology-levels")
+    assert response.is_success
+    assert response.json() == {
+        "topology_levels": [
+            {"id": "Level 1", "level": 1},
+            {"id": "Level 2", "level": 2},
+        ]
+    }
+
+
+async def test_generation_groups_intervals(fastapi_client: Client, session) -> None:
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=datetime(2021, 1, 1, hour),
+                end_datetime=datetime(2021, 1, 1, hour + 1),
+                type=fuel_type,
+                technology=None,
+                unit="MWh",
+                value=value,
+                id="TEST-AREA",
+            )
+            for fuel_type, hour, value in [
+                ("solar", 1, 1.5),
+                ("wind", 0, 3.0),
+                ("solar", 0, 2.0),
+                ("wind", 1, 4.0),
+            ]
+        ]
+    )
+    session.commit()
+
+    response = fastapi_client.get(
+        url="/power-systems-resource/TEST-AREA/timeseries/generation",
+        params={
+            "startDatetime": "2021-01-01T00:00:00Z",
+            "endDatetime": "2021-01-02T00:00:00Z",
+        },
+    )
+    generation = response.json()["generation"]
+    assert {g["start_datetime"]: g["value"] for g in generation} == {
+        "2021-01-01T00:00:00Z": 5.0,
+        "2021-01-01T01:00:00Z": 5.5,
+    }
+    assert all(
+        sorted(s["type"] for s in g["value_by_fuel_source"]) == ["solar", "wind"]
+        for g in generation
+    )
+
+
+async def test_generation_json_matches_response_model(
+    fastapi_client: Client, session
+) -> None:
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=start,
+                end_datetime=start + timedelta(hours=1),
+                timezone="Europe/London",
+                type="solar",
+                technology=None,
+                unit="MWh",
+                value=1.5,
+                id="TEST-AREA",
+            )
+            for start in [datetime(2021, 1, 1), datetime(2021, 7, 1, 0, 0, 0, 500000)]
+        ]
+    )
+    session.commit()
+
+    response = fastapi_client.get(
+        url="/power-systems-resource/TEST-AREA/timeseries/generation",
+        params={
+            "startDatetime": "2021-01-01T00:00:00Z",
+            "endDatetime": "2021-12-31T00:00:00Z",
+        },
+    )
+    generation = response.json()["generation"]
+    assert [(g["start_datetime"], g["end_datetime"]) for g in generation] == [
+        ("2021-01-01T00:00:00Z", "2021-01-01T01:00:00Z"),
+        ("2021-07-01T00:00:00.500000+01:00", "2021-07-01T01:00:00.500000+01:00"),
+    ]
+    model = GenerationResponse.model_validate_json(response.content)
+    assert response.text == model.model_dump_json()
+
+
+async def test_generation_resolution_sums_buckets(
+    fastapi_client: Client, session
+) -> None:
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=datetime(2021, 1, day, hour),
+                end_datetime=datetime(2021, 1, day, hour) + timedelta(hours=1),
+                type=fuel_type,
+                technology=None,
+                unit="MWh",
+                value=value,
+                id="TEST-AREA",
+            )
+            for fuel_type, day, hour, value in [
+                ("solar", 1, 10, 1.5),
+                ("solar", 1, 11, 2.5),
+                ("wind", 1, 23, 3.0),
+                ("wind", 2, 0, 4.0),
+            ]
+        ]
+    )
+    refresh_rollups(session, ["TEST-AREA"])
+    session.commit()
+
+    response = fastapi_client.get(
+        url="/power-systems-resource/TEST-AREA/timeseries/generation",
+        params={
+            "startDatetime": "2021-01-01T00:00:00Z",
+            "endDatetime": "2021-01-03T00:00:00Z",
+            "resolution": "P1D",
+        },
+    )
+
+    assert response.json() == {
+        "id": "TEST-AREA",
+        "unit": "MWh",
+        "generation": [
+            {
+                "start_datetime": "2021-01-01T00:00:00Z",
+                "end_datetime": "2021-01-02T00:00:00Z",
+                "value": 7.0,
+                "value_by_fuel_source": [
+                    {
+                        "id": "TEST-AREA",
+                        "type": "solar",
+                        "technology": None,
+                        "value": 4.0,
+                    },
+                    {
+                        "id": "TEST-AREA",
+                        "type": "wind",
+                        "technology": None,
+                        "value": 3.0,
+                    },
+                ],
+            },
+            {
+                "start_datetime": "2021-01-02T00:00:00Z",
+                "end_datetime": "2021-01-03T00:00:00Z",
+                "value": 4.0,
+                "value_by_fuel_source": [
+                    {
+                        "id": "TEST-AREA",
+                        "type": "wind",
+                        "technology": None,
+                        "value": 4.0,
+                    },
+                ],
+            },
+        ],
+    }
+
+
+async def test_rollups_match_intervals_across_buckets(
+    fastapi_client: Client, session, monkeypatch
+) -> None:
+    # 90 minute intervals from 00:45, so some run past the end of their day
+    start = datetime(2021, 1, 1, 0, 45)
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=start + timedelta(minutes=90 * step),
+                end_datetime=start + timedelta(minutes=90 * (step + 1)),
+                type=fuel_type,
+                technology="PV" if fuel_type == "solar" else None,
+                unit="MWh",
+                value=step % 7 + 1,
+                id="TEST-AREA",
+            )
+            for step in range(32 * 16)
+            for fuel_type in ["solar", "wind"]
+        ]
+    )
+    refresh_rollups(session, ["TEST-AREA"])
+    session.commit()
+
+    url = "/power-systems-resource/TEST-AREA/timeseries/generation"
+    queries = [
+        ("2021-01-01T00:00:00Z", "2021-01-03T00:00:00Z", "P1D"),
+        ("2021-01-30T00:00:00Z", "2021-02-02T00:00:00Z", "P1D"),
+        ("2021-01-01T00:00:00Z", "2021-02-01T00:00:00Z", "P1M"),
+    ]
+    for start_datetime, end_datetime, resolution in queries:
+        assert generation_source(
+            datetime.fromisoformat(start_datetime[:-1]),
+            datetime.fromisoformat(end_datetime[:-1]),
+            Resolution(resolution),
+        ) in (GenerationDailyTable, GenerationMonthlyTable)
+    from_rollups = [
+        fastapi_client.get(
+            url,
+            params={
+                "startDatetime": start_datetime,
+                "endDatetime": end_datetime,
+                "resolution": resolution,
+            },
+        ).json()
+        for start_datetime, end_datetime, resolution in queries
+    ]
+
+    monkeypatch.setattr(
+        views, "generation_source", lambda *args: GenerationByFuelSourceTable
+    )
+    from_intervals = [
+        fastapi_client.get(
+            url,
+            params={
+                "startDatetime": start_datetime,
+                "endDatetime": end_datetime,
+                "resolution": resolution,
+            },
+        ).json()
+        for start_datetime, end_datetime, resolution in queries
+    ]
+    assert all(response["generation"] for response in from_intervals)
+    assert from_rollups == from_intervals
+
+
+async def test_generation_sums_counted_descendants(
+    fastapi_client: Client, session
+) -> None:
+    session.add_all(
+        [
+            PSRList(id="TEST-AREA", level=1),
+            PSRList(id="TEST-PLANT", level=2, parent="TEST-AREA"),
+            PSRList(id="TEST-UNIT-1", level=3, parent="TEST-PLANT"),
+            PSRList(id="TEST-UNIT-2", level=3, parent="TEST-PLANT"),
+            PSRList(id="TEST-OTHER", level=2, parent="TEST-AREA"),
+        ]
+    )
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=datetime(2021, 1, 1),
+                end_datetime=datetime(2021, 1, 1, 1),
+                type=fuel_type,
+                technology=None,
+                unit="MWh",
+                value=value,
+                id=psr_id,
+            )
+            for psr_id, fuel_type, value in [
+                # The plant's own total covers its units
+                ("TEST-PLANT", "nuclear", 10.0),
+                ("TEST-UNIT-1", "nuclear", 4.0),
+                ("TEST-UNIT-2", "nuclear", 5.0),
+                ("TEST-OTHER", "nuclear", 1.0),
+                ("TEST-OTHER", "wind", 2.0),
+            ]
+        ]
+    )
+    refresh_closure(session)
+    refresh_rollups(session, ["TEST-PLANT", "TEST-UNIT-1", "TEST-UNIT-2", "TEST-OTHER"])
+    session.commit()
+    params = {
+        "startDatetime": "2021-01-01T00:00:00Z",
+        "endDatetime": "2021-01-02T00:00:00Z",
+    }
+
+    def fuel_sources(psr_id: str, **extra: str) -> dict[str, float]:
+        response = fastapi_client.get(
+            f"/power-systems-resource/{psr_id}/timeseries/generation",
+            params={**params, **extra},
+        )
+        (generation,) = response.json()["generation"]
+        assert {s["id"] for s in generation["value_by_fuel_source"]} == {psr_id}
+        return {s["type"]: s["value"] for s in generation["value_by_fuel_source"]}
+
+    assert fuel_sources("TEST-AREA") == {"nuclear": 11.0, "wind": 2.0}
+    assert fuel_sources("TEST-AREA", resolution="P1D") == {"nuclear": 11.0, "wind": 2.0}
+    assert fuel_sources("TEST-PLANT") == {"nuclear": 10.0}
+    assert fuel_sources("TEST-UNIT-2") == {"nuclear": 5.0}
+
+
+@pytest.mark.parametrize(
+    "start_datetime, end_datetime, resolution, table",
+    [
+        ("2021-01-01", "2022-01-01", Resolution.year, GenerationMonthlyTable),
+        ("2021-01-01", "2021-02-01", Resolution.month, GenerationMonthlyTable),
+        ("2021-01-01", "2021-01-15", Resolution.month, GenerationDailyTable),
+        ("2021-01-01", "2021-01-15", Resolution.day, GenerationDailyTable),
+        ("2021-01-01T06:00", "2021-01-15", Resolution.day, GenerationByFuelSourceTable),
+        ("2021-01-01", "2021-01-15", Resolution.hour, GenerationByFuelSourceTable),
+    ],
+)
+def test_generation_source_picks_coarsest_exact_rollup(
+    start_datetime: str, end_datetime: str, resolution: Resolution, table
+) -> None:
+    assert (
+        generation_source(
+            datetime.fromisoformat(start_datetime),
+            datetime.fromisoformat(end_datetime),
+            resolution,
+        )
+        is table
+    )
+
+
+@pytest.fixture
+def _seed_capacity(session) -> None:
+    session.add_all(
+        [
+            CapacityTable(
+                id="TEST-AREA",
+                type="solar",
+                technology="PV",
+                unit="MW",
+                value=500,
+                startDatetime="2017-10-10",
+            ),
+            PSRInterconnectionTable(
+                id="TEST-AREA", connectedPSR="TEST-NEIGHBOUR", unit="MW", value=700
+            ),
+            PSRInterconnectionTable(
+                id="TEST-AREA", connectedPSR="TEST-OTHER", unit="MW", value=100
+            ),
+        ]
+    )
+    session.commit()
+
+
+async def test_psr_capacity(fastapi_client: Client, _seed_capacity) -> None:
+    response = fastapi_client.get(
+        url="/power-systems-resource/power-system-resource/capacity",
+        params={"id": "TEST-AREA"},
+    )
+    assert response.is_success
+    assert response.json() == {
+        "capacity": [
+            {
+                "id": "TEST-AREA",
+                "fuelSource": [
+                    {
+                        "technology": "PV",
+                        "type": "solar",
+                        "unit": "MW",
+                        "capacity": [
+                            {
+                                "value": 500.0,
+                                "startDatetime": "2017-10-10",
+                                "endDatetime": None,
+                            }
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+async def test_psr_transmission_capacity(
+    fastapi_client: Client, _seed_capacity
+) -> None:
+    response = fastapi_client.get(
+        url="/power-systems-resource/power-system-resource/transmission-capacity",
+        params={"id": "TEST-AREA"},
+    )
+    assert response.is_success
+    assert response.json() == {
+        "capacity": [
+            {
+                "id": "TEST-AREA",
+                "unit": "MW",
+                "transmissionCapacity": [
+                    {"connectedPSR": "TEST-NEIGHBOUR", "value": 700.0},
+                    {"connectedPSR": "TEST-OTHER", "value": 100.0},
+                ],
+            }
+        ]
+    }
+
+
+async def test_capacity_unit(fastapi_client: Client, session, _seed_capacity) -> None:
+    session.add(
+        PSRInterconnectionTable(
+            id="TEST-AREA", connectedPSR="TEST-SMALL", unit="kW", value=2500
+        )
+    )
+    session.commit()
+    url = "/power-systems-resource/power-system-resource"
+
+    response = fastapi_client.get(
+        f"{url}/capacity", params={"id": "TEST-AREA", "unit": "kW"}
+    )
+    (fuel_source,) = response.json()["capacity"][0]["fuelSource"]
+    assert fuel_source["unit"] == "kW"
+    assert fuel_source["capacity"][0]["value"] == 500_000.0
+
+    # Mixed units are served in MW unless asked otherwise
+    response = fastapi_client.get(
+        f"{url}/transmission-capacity", params={"id": "TEST-AREA"}
+    )
+    (capacity,) = response.json()["capacity"]
+    assert capacity["unit"] == "MW"
+    assert {
+        c["connectedPSR"]: c["value"] for c in capacity["transmissionCapacity"]
+    } == {
+        "TEST-NEIGHBOUR": 700.0,
+        "TEST-OTHER": 100.0,
+        "TEST-SMALL": 2.5,
+    }
+
+
+async def test_capacity_by_fuel_source(
+    fastapi_client: Client, session, _seed_capacity
+) -> None:
+    session.add_all(
+        [
+            CapacityTable(
+                id="TEST-AREA",
+                type="wind",
+                technology="onshore",
+                unit="MW",
+                value=200,
+                startDatetime="2019-01-01",
+                endDatetime="2020-01-01",
+            ),
+            CapacityTable(
+                id="TEST-AREA",
+                type="solar",
+                technology="PV",
+                unit="MW",
+                value=800,
+                startDatetime="2020-01-01",
+            ),
+            CapacityTable(
+                id="TEST-AREA",
+                type="wind",
+                technology="onshore",
+                unit="MW",
+                value=300,
+                startDatetime="2020-01-01",
+            ),
+        ]
+    )
+    session.commit()
+    response = fastapi_client.get(
+        url="/power-systems-resource/power-system-resource/capacity",
+        params={"id": "TEST-AREA"},
+    )
+    (capacity,) = response.json()["capacity"]
+    assert [
+        (
+            fuel_source["type"],
+            fuel_source["technology"],
+            [(c["value"], c["endDatetime"]) for c in fuel_source["capacity"]],
+        )
+        for fuel_source in capacity["fuelSource"]
+    ] == [
+        ("solar", "PV", [(500.0, None), (800.0, None)]),
+        ("wind", "onshore", [(200.0, "2020-01-01"), (300.0, None)]),
+    ]
+
+
+@pytest.mark.parametrize("path", ["capacity", "transmission-capacity"])
+async def test_capacity_of_unknown_psr_is_empty(
+    fastapi_client: Client, path: str
+) -> None:
+    response = fastapi_client.get(
+        url=f"/power-systems-resource/power-system-resource/{path}",
+        params={"id": "NO-SUCH-PSR"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"capacity": []}
+
+
+@pytest.fixture
+def _seed_mixed_units(session) -> None:
+    session.add_all(
+        [
+            PSRList(id="TEST-AREA", level=1),
+            PSRList(id="TEST-PLANT", level=2, parent="TEST-AREA"),
+            PSRList(id="TEST-OTHER", level=2, parent="TEST-AREA"),
+        ]
+    )
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=datetime(2021, 1, 1, hour),
+                end_datetime=datetime(2021, 1, 1, hour + 1),
+                type=fuel_type,
+                technology=None,
+                unit=unit,
+                value=value,
+                id=psr_id,
+            )
+            for psr_id, unit, fuel_type, value in [
+                ("TEST-PLANT", "kWh", "solar", 1500.0),
+                ("TEST-PLANT", "kWh", "wind", 250.0),
+                ("TEST-OTHER", "MWh", "solar", 2.0),
+            ]
+            for hour in range(2)
+        ]
+    )
+    refresh_closure(session)
+    session.commit()
+
+
+@pytest.mark.parametrize("backend", [GenerationBackend.sql, GenerationBackend.memory])
+async def test_generation_mixed_units(
+    fastapi_client: Client, _seed_mixed_units, monkeypatch, backend
+) -> None:
+    monkeypatch.setattr(settings, "generation_backend", backend)
+    url = "/power-systems-resource/TEST-AREA/timeseries/generation"
+    params = {
+        "startDatetime": "2021-01-01T00:00:00Z",
+        "endDatetime": "2021-01-02T00:00:00Z",
+    }
+
+    # The descendants' kWh and MWh are summed in MWh
+    response = fastapi_client.get(url, params=params)
+    assert response.json()["unit"] == "MWh"
+    generation = response.json()["generation"]
+    assert [g["value"] for g in generation] == [3.75, 3.75]
+    assert generation[0]["value_by_fuel_source"] == [
+        {"id": "TEST-AREA", "type": "solar", "technology": None, "value": 3.5},
+        {"id": "TEST-AREA", "type": "wind", "technology": None, "value": 0.25},
+    ]
+
+    response = fastapi_client.get(url, params={**params, "stream": True})
+    assert response.headers["x-unit"] == "MWh"
+    assert [json.loads(line) for line in response.text.splitlines()] == generation
+
+    response = fastapi_client.get(url, params={**params, "unit": "kWh"})
+    assert response.json()["unit"] == "kWh"
+    assert [g["value"] for g in response.json()["generation"]] == [3750.0, 3750.0]
+
+    response = fastapi_client.get(
+        "/power-systems-resource/timeseries/generation",
+        params={**params, "id": ["TEST-AREA", "TEST-PLANT"]},
+    )
+    area, plant = response.json()
+    assert (area["unit"], plant["unit"]) == ("MWh", "kWh")
+    assert plant["generation"][0]["value"] == 1750.0
+
+
+async def test_rollups_of_mixed_units(fastapi_client: Client, session) -> None:
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=datetime(2021, 1, 1, hour),
+                end_datetime=datetime(2021, 1, 1, hour + 1),
+                type="solar",
+                technology="PV",
+                unit=unit,
+                value=value,
+                id="TEST-AREA",
+            )
+            for hour, unit, value in [(0, "MWh", 2.0), (1, "kWh", 500.0)]
+        ]
+    )
+    refresh_rollups(session, ["TEST-AREA"])
+    session.commit()
+
+    response = fastapi_client.get(
+        "/power-systems-resource/TEST-AREA/timeseries/generation",
+        params={
+            "startDatetime": "2021-01-01T00:00:00Z",
+            "endDatetime": "2021-01-02T00:00:00Z",
+            "resolution": "P1D",
+        },
+    )
+    assert response.json() == {
+        "id": "TEST-AREA",
+        "unit": "MWh",
+        "generation": [
+            {
+                "start_datetime": "2021-01-01T00:00:00Z",
+                "end_datetime": "2021-01-02T00:00:00Z",
+                "value": 2.5,
+                "value_by_fuel_source": [
+                    {
+                        "id": "TEST-AREA",
+                        "type": "solar",
+                        "technology": "PV",
+                        "value": 2.5,
+                    }
+                ],
+            }
+        ],
+    }
+
+
+async def test_generation_stream(fastapi_client: Client, session) -> None:
+    session.add_all(
+        [
+            GenerationByFuelSourceTable(
+                start_datetime=datetime(2021, 1, 1, hour),
+                end_datetime=datetime(2021, 1, 1, hour + 1),
+                type=fuel_type,
+                technology=None,
+                unit="MWh",
+                value=hour + 1,
+                id="TEST-AREA",
+            )
+            for fuel_type in ["solar", "wind"]
+            for hour in range(3)
+        ]
+    )
+    session.commit()
+    url = "/power-systems-resource/TEST-AREA/timeseries/generation"
+    params = {
+        "startDatetime": "2021-01-01T00:00:00Z",
+        "endDatetime": "2021-01-02T00:00:00Z",
+    }
+
+    response = fastapi_client.get(url, params={**params, "stream": True})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["x-unit"] == "MWh"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == fastapi_client.get(url, params=params).json()["generation"]
+    assert [line["value"] for line in lines] == [2.0, 4.0, 6.0]
+
+    response = fastapi_client.get(
+        url, params=params, headers={"Accept": "application/x-ndjson"}
+    )
+    assert len(response.text.splitlines()) == 3
+
+
+async def test_generation_batch(fastapi_client: Client, session, _seed) -> None:
+    session.add_all(
+        [
+            PSRList(id="TEST-SOLAR", level=1),
+            PSRList(id="TEST-SOLAR-PV1", level=2, parent="TEST-SOLAR"),
+            PSRList(id="TEST-SOLAR-PV2", level=2, parent="TEST-SOLAR"),
+        ]
+    )
+    refresh_closure(session)
+    session.commit()
+    url = "/power-systems-resource/timeseries/generation"
+    params = {
+        "startDatetime": "2021-01-01T00:00:00Z",
+        "endDatetime": "2021-01-02T00:00:00Z",
+    }
+
+    response = fastapi_client.get(
+        url,
+        params={**params, "id": ["TEST-SOLAR-PV2", "TEST-MISSING", "TEST-SOLAR-PV1"]},
+    )
+    assert [psr["id"] for psr in response.json()] == [
+        "TEST-SOLAR-PV2",
+        "TEST-MISSING",
+        "TEST-SOLAR-PV1",
+    ]
+    for psr in response.json():
+        single = fastapi_client.get(
+            f"/power-systems-resource/{psr['id']}/timeseries/generation", params=params
+        )
+        assert psr == single.json()
+
+    by_parent = fastapi_client.get(url, params={**params, "parent": "TEST-SOLAR"})
+    assert [psr["id"] for psr in by_parent.json()] == [
+        "TEST-SOLAR",
+        "TEST-SOLAR-PV1",
+        "TEST-SOLAR-PV2",
+    ]
+    assert by_parent.json()[0]["generation"][0]["value"] == 300.0
+
+    streamed = fastapi_client.get(
+        url, params={**params, "parent": "TEST-SOLAR", "stream": True}
+    )
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert sorted(lines, key=lambda psr: psr["id"]) == by_parent.json()
+
+    assert fastapi_client.get(url, params=params).status_code == 422
+
+
+async def test_generation_batch_without_closure(fastapi_client: Client, _seed) -> None:
+    # More PSRs than SQLite allows selects in one compound select
+    ids = [f"TEST-MISSING-{number}" for number in range(600)] + ["TEST-SOLAR-PV2"]
+    response = fastapi_client.get(
+        "/power-systems-resource/timeseries/generation",
+        params={
+            "startDatetime": "2021-01-01T00:00:00Z",
+            "endDatetime": "2021-01-02T00:00:00Z",
+            "id": ids,
+        },
+    )
+    assert [psr["id"] for psr in response.json()] == ids
+    (generation,) = response.json()[-1]["generation"]
+    assert generation["value"] == 200.0
+
+
+GENERATION_URL = "/power-systems-resource/TEST-SOLAR-PV2/timeseries/generation"
+PARAMS = {
+    "startDatetime": "2021-01-01T00:00:00Z",
+    "endDatetime": "2021-01-02T00:00:00Z",
+}
+
+
+async def test_generation_as_csv(fastapi_client: Client, _seed) -> None:
+    response = fastapi_client.get(
+        "/power-systems-resource/timeseries/generation",
+        params={**PARAMS, "id": ["TEST-SOLAR-PV1", "TEST-SOLAR-PV2"]},
+        headers={"Accept": "text/csv"},
+    )
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines() == [
+        "start_datetime,end_datetime,id,type,technology,value,unit",
+        "2021-01-01T00:00:00Z,2021-01-01T01:00:00Z,TEST-SOLAR-PV1,solar,PV,100.0,MWh",
+        "2021-01-01T00:00:00Z,2021-01-01T01:00:00Z,TEST-SOLAR-PV2,solar,PV2,200.0,MWh",
+    ]
+
+
+@pytest.mark.parametrize("resolution", [None, "P1D"])
+@pytest.mark.parametrize("backend", list(GenerationBackend))
+async def test_generation_batch_rows_are_sorted(
+    fastapi_client: Client,
+    _seed_hierarchy,
+    session,
+    tmp_path,
+    monkeypatch,
+    backend: GenerationBackend,
+    resolution: str | None,
+) -> None:
+    if backend is GenerationBackend.parquet:
+        pytest.importorskip("pyarrow")
+        monkeypatch.setattr(settings, "parquet_dir", tmp_path / "parquet")
+        export_parquet(session, "v1")
+    monkeypatch.setattr(settings, "generation_backend", backend)
+    params = {
+        "startDatetime": "2021-01-31T00:00:00Z",
+        "endDatetime": "2021-02-02T00:00:00Z",
+        "id": ["TEST-PLANT", "TEST-OTHER", "TEST-AREA"],
+    }
+    if resolution is not None:
+        params["resolution"] = resolution
+
+    response = fastapi_client.get(
+        "/power-systems-resource/timeseries/generation",
+        params=params,
+        headers={"Accept": "text/csv"},
+    )
+    rows = [line.split(",") for line in response.text.splitlines()[1:]]
+    ids = [row[2] for row in rows]
+    assert set(ids) == {"TEST-AREA", "TEST-OTHER", "TEST-PLANT"}
+    assert [(row[2], row[0]) for row in rows] == sorted(
+        (row[2], row[0]) for row in rows
+    )
+
+
+@pytest.mark.parametrize(
+    "media_type", ["application/vnd.apache.arrow.stream", "application/parquet"]
+)
+async def test_generation_as_arrow(
+    fastapi_client: Client, _seed, media_type: str
+) -> None:
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    response = fastapi_client.get(
+        GENERATION_URL,
+        params=PARAMS,
+        headers={"Accept": media_type},
+    )
+    assert response.headers["content-type"] == media_type
+    if media_type == "application/parquet":
+        table = pq.read_table(pa.BufferReader(response.content))
+    else:
+        table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == [
+        "start_datetime",
+        "end_datetime",
+        "id",
+        "type",
+        "technology",
+        "value",
+        "unit",
+    ]
+    assert table.to_pylist()[0]["value"] == 200.0
+    assert str(table.schema.field("start_datetime").type.tz) == "UTC"
+
+
+async def test_capacity_as_csv(fastapi_client: Client, _seed_capacity) -> None:
+    capacity = fastapi_client.get(
+        "/power-systems-resource/power-system-resource/capacity",
+        params={"id": "TEST-AREA"},
+        headers={"Accept": "text/csv"},
+    )
+    assert capacity.text.splitlines() == [
+        "start_datetime,end_datetime,id,type,technology,value,unit",
+        "2017-10-10,,TEST-AREA,solar,PV,500.0,MW",
+    ]
+
+    transmission = fastapi_client.get(
+        "/power-systems-resource/power-system-resource/transmission-capacity",
+        params={"id": "TEST-AREA"},
+        headers={"Accept": "text/csv"},
+    )
+    assert transmission.text.splitlines() == [
+        "id,connectedPSR,value,unit",
+        "TEST-AREA,TEST-NEIGHBOUR,700.0,MW",
+        "TEST-AREA,TEST-OTHER,100.0,MW",
+    ]
+
+
+@pytest.mark.parametrize(
+    "accept, media_type",
+    [
+        ("application/json, text/csv;q=0.1", "application/json"),
+        ("text/csv;q=0", "application/json"),
+        ("text/csv, application/json", "application/json"),
+        ("*/*", "application/json"),
+        ("text/*", "text/csv"),
+        ("application/json;q=0.5, text/csv", "text/csv"),
+        ("application/x-ndjson, text/csv;q=0.5", "application/x-ndjson"),
+    ],
+)
+async def test_generation_media_type_by_quality(
+    fastapi_client: Client, _seed, accept: str, media_type: str
+) -> None:
+    response = fastapi_client.get(
+        GENERATION_URL, params=PARAMS, headers={"Accept": accept}
+    )
+    assert response.headers["content-type"].split(";")[0] == media_type
+
+
+@pytest.fixture
+def _version(session: Session) -> None:
+    write_dataset_version(session, "v1")
+    session.commit()
+
+
+def test_matching_etag_is_not_modified_without_querying(
+    fastapi_client: Client, _seed, _version, monkeypatch
+) -> None:
+    response = fastapi_client.get(GENERATION_URL, params=PARAMS)
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "public, no-cache"
+
+    async def fail(*args):
+        raise AssertionError("the data was read for a matching ETag")
+
+    monkeypatch.setattr(views, "fetch_frame", fail)
+    not_modified = fastapi_client.get(
+        GENERATION_URL, params=PARAMS, headers={"If-None-Match": etag}
+    )
+
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+
+def test_etag_normalizes_datetimes(fastapi_client: Client, _seed, _version) -> None:
+    response = fastapi_client.get(GENERATION_URL, params=PARAMS)
+    etag = response.headers["ETag"]
+    same_range = {
+        "endDatetime": "2021-01-02T00:00",
+        "startDatetime": "2021-01-01T00:00:00+00:00",
+    }
+
+    not_modified = fastapi_client.get(
+        GENERATION_URL, params=same_range, headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert fastapi_client.get(GENERATION_URL, params=same_range).content == (
+        response.content
+    )
+
+    # The queries drop the offset, so the same instant in another offset is
+    # another range, with another response
+    same_instant = {**PARAMS, "startDatetime": "2021-01-01T01:00:00+01:00"}
+    modified = fastapi_client.get(
+        GENERATION_URL, params=same_instant, headers={"If-None-Match": etag}
+    )
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+    assert modified.content != response.content
+
+
+def test_etag_changes_with_dataset_version(
+    fastapi_client: Client, session: Session, _seed, _version
+) -> None:
+    etag = fastapi_client.get("/metadata/topology-levels").headers["ETag"]
+    write_dataset_version(session, "v2")
+    session.commit()
+    response_cache.version_checked_at = float("-inf")
+
+    response = fastapi_client.get(
+        "/metadata/topology-levels", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+
+
+def test_no_etag_without_dataset_version(fastapi_client: Client, _seed) -> None:
+    response = fastapi_client.get(GENERATION_URL, params=PARAMS)
+    assert "ETag" not in response.headers
+
+    modified = fastapi_client.get(
+        GENERATION_URL, params=PARAMS, headers={"If-None-Match": "*"}
+    )
+    assert modified.status_code == 200
+    assert modified.content == response.content
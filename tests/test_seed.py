@@ -1,5 +1,342 @@
-from power_systems_data_api_demonstrator.src.api.seed import seed_generation
+import shutil
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
+import pandas as pd
+import pytest
+from sqlmodel import Session, func, select
 
-def test_seed(session):
-    seed_generation(session)
+from benchmarks.synthetic_data import Scale, generate
+from power_systems_data_api_demonstrator.settings import (
+    GenerationBackend,
+    QueryEngine,
+    settings,
+)
+from power_systems_data_api_demonstrator.src.api import (
+    analytics_db,
+    db,
+    parquet_store,
+    seed as seed_module,
+)
+from power_systems_data_api_demonstrator.src.api.dataset import DatasetVersion
+from power_systems_data_api_demonstrator.src.api.psr_metadata.views import (
+    PSRClosureTable,
+    PSRList,
+)
+from power_systems_data_api_demonstrator.src.api.psr_timeseries.views import (
+    ExchangeTable,
+    GenerationByFuelSourceTable,
+    GenerationDailyTable,
+    InstalledCapacityTable,
+    LoadForecastTable,
+)
+from power_systems_data_api_demonstrator.src.api.seed import (
+    SeedManifest,
+    parse_files,
+    refresh_closure,
+    refresh_rollups,
+    seed,
+)
+from power_systems_data_api_demonstrator.src.api.sources import melt_generation
+
+
+def test_seed_generation_files(session):
+    generation_files = [
+        seed_file
+        for seed_file in seed_module.seed_files()
+        if seed_file.table is GenerationByFuelSourceTable
+    ]
+    parsed = parse_files(generation_files, workers=0)
+    ids: set[str] = set()
+    for seed_file in generation_files:
+        rows, _ = parsed[seed_file.path]
+        ids.update(seed_file.load(session, rows))
+    refresh_closure(session)
+    refresh_rollups(session, ids)
+
+    assert {"UK-GB", "US-WECC-CISO", "ES"} <= ids
+    total = session.scalar(select(func.sum(GenerationByFuelSourceTable.value)))
+    rollup = session.scalar(select(func.sum(GenerationDailyTable.value)))
+    assert rollup == pytest.approx(total)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    for seed_file in seed_module.seed_files():
+        (data_dir / seed_file.path).parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(
+            f"{seed_module.DATA_DIR}/{seed_file.path}", data_dir / seed_file.path
+        )
+    monkeypatch.setattr(settings, "data_dir", data_dir)
+    monkeypatch.setattr(settings, "db_file", tmp_path / "seed.sqlite3")
+    db.dispose_engine()
+    yield data_dir
+    db.dispose_engine()
+
+
+def generation_rows(psr_id: str) -> int:
+    with Session(db.get_engine()) as session:
+        return session.exec(
+            select(func.count()).where(GenerationByFuelSourceTable.id == psr_id)
+        ).one()
+
+
+def generation_total(psr_id: str) -> float:
+    with Session(db.get_engine()) as session:
+        return session.exec(
+            select(func.sum(GenerationByFuelSourceTable.value)).where(
+                GenerationByFuelSourceTable.id == psr_id
+            )
+        ).one()
+
+
+def rollup_total(psr_id: str) -> float:
+    with Session(db.get_engine()) as session:
+        return session.exec(
+            select(func.sum(GenerationDailyTable.value)).where(
+                GenerationDailyTable.id == psr_id
+            )
+        ).one()
+
+
+def manifest() -> dict[str, tuple[str, datetime]]:
+    with Session(db.get_engine()) as session:
+        return {
+            entry.path: (entry.sha256, entry.seeded_at)
+            for entry in session.exec(select(SeedManifest))
+        }
+
+
+def test_seed_only_ingests_changed_files(data_dir) -> None:
+    seed()
+    seeded = manifest()
+    uk_rows = generation_rows("UK-GB")
+    assert uk_rows > 0
+
+    seed()
+    assert manifest() == seeded
+
+    elexon = data_dir / "ELEXON" / "generation.csv"
+    lines = elexon.read_text().splitlines(keepends=True)
+    elexon.write_text("".join(lines[:13]))
+    seed()
+
+    reseeded = manifest()
+    assert generation_rows("UK-GB") == uk_rows // 2
+    assert rollup_total("UK-GB") == pytest.approx(generation_total("UK-GB"))
+    assert reseeded["ELEXON/generation.csv"][0] != seeded["ELEXON/generation.csv"][0]
+    assert reseeded["EIA/generation.csv"] == seeded["EIA/generation.csv"]
+
+
+def test_concurrent_seeds_ingest_once(data_dir) -> None:
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(lambda _: seed(), range(3)))
+    uk_rows = generation_rows("UK-GB")
+
+    seed(reset=True)
+    assert generation_rows("UK-GB") == uk_rows
+
+
+def dataset_version() -> tuple[str, datetime]:
+    with Session(db.get_engine()) as session:
+        return session.exec(
+            select(DatasetVersion.version, DatasetVersion.seeded_at)
+        ).one()
+
+
+def test_seed_after_waiting_for_the_lock_keeps_seeded_data(
+    data_dir, monkeypatch
+) -> None:
+    seed()
+    seeded = dataset_version()
+
+    # A worker that found the data stale before another one seeded it
+    read_manifest = seed_module.read_manifest
+    reads = []
+
+    def stale_then_seeded(session):
+        reads.append(session)
+        return {} if len(reads) == 1 else read_manifest(session)
+
+    def fail(session):
+        raise AssertionError("the seeded data was rebuilt")
+
+    monkeypatch.setattr(seed_module, "read_manifest", stale_then_seeded)
+    monkeypatch.setattr(seed_module, "refresh_closure", fail)
+    seed()
+
+    assert len(reads) == 2
+    assert dataset_version() == seeded
+
+
+def test_seed_exports_only_under_the_lock(data_dir, tmp_path, monkeypatch) -> None:
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(settings, "generation_backend", GenerationBackend.parquet)
+    monkeypatch.setattr(settings, "parquet_dir", tmp_path / "parquet")
+    seed()
+    shutil.rmtree(settings.parquet_dir)
+
+    export_parquet = seed_module.export_parquet
+    locked = []
+
+    def export_locked(session, version, *args) -> None:
+        other = sqlite3.connect(settings.db_file, timeout=0)
+        try:
+            other.execute("BEGIN IMMEDIATE")
+            locked.append(False)
+        except sqlite3.OperationalError:
+            locked.append(True)
+        finally:
+            other.close()
+        export_parquet(session, version, *args)
+
+    monkeypatch.setattr(seed_module, "export_parquet", export_locked)
+    seed()
+    assert locked == [True]
+    assert parquet_store.read_version(settings.parquet_dir) is not None
+
+    # Once the copies are current, a seed only reads
+    seed()
+    assert locked == [True]
+
+
+def test_seed_clears_removed_files(data_dir) -> None:
+    seed()
+    assert generation_rows("ES-ALMARAZ-2") == 24
+
+    (data_dir / "ENTSO-E" / "generation_ES-ALMARAZ-UNIT2.csv").unlink()
+    seed()
+
+    assert generation_rows("ES-ALMARAZ-2") == 0
+    assert rollup_total("ES-ALMARAZ-2") is None
+    assert "ENTSO-E/generation_ES-ALMARAZ-UNIT2.csv" not in manifest()
+    assert generation_rows("ES-ALMARAZ-1") == 24
+
+
+def test_seed_refuses_files_writing_the_same_psr(data_dir) -> None:
+    seed()
+    shutil.copy(
+        data_dir / "ENTSO-E" / "generation_ES-ALMARAZ-UNIT1.csv",
+        data_dir / "ENTSO-E" / "generation_ES-ALMARAZ-UNIT3.csv",
+    )
+
+    with pytest.raises(ValueError, match="both write ES-ALMARAZ-1"):
+        seed()
+    assert generation_rows("ES-ALMARAZ-1") == 24
+    assert "ENTSO-E/generation_ES-ALMARAZ-UNIT3.csv" not in manifest()
+
+
+def test_seed_ingests_every_registered_source(data_dir) -> None:
+    seed()
+
+    assert generation_rows("ES") > 0
+    # Per-unit files are stored under their own grid node
+    assert generation_rows("ES-ALMARAZ-1") == 24
+    with Session(db.get_engine()) as session:
+        for table in (LoadForecastTable, ExchangeTable, InstalledCapacityTable):
+            ids = set(session.exec(select(table.id)))
+            assert {"US-WECC-CISO", "ES"} <= ids
+    assert "ENTSO-E/generation_ES-ALMARAZ-UNIT1.csv" in manifest()
+
+
+def test_seed_copies_the_database_to_duckdb(data_dir, tmp_path, monkeypatch) -> None:
+    duckdb = pytest.importorskip("duckdb")
+    monkeypatch.setattr(settings, "query_engine", QueryEngine.duckdb)
+    monkeypatch.setattr(settings, "duckdb_file", tmp_path / "seed.duckdb")
+    seed()
+    version = analytics_db.read_version(settings.duckdb_file)
+    assert version is not None
+
+    elexon = data_dir / "ELEXON" / "generation.csv"
+    lines = elexon.read_text().splitlines(keepends=True)
+    elexon.write_text("".join(lines[:13]))
+    seed()
+
+    assert analytics_db.read_version(settings.duckdb_file) != version
+    with duckdb.connect(str(settings.duckdb_file), read_only=True) as duck:
+        (rows,) = duck.execute(
+            "SELECT count(*) FROM generationbyfuelsourcetable WHERE id = 'UK-GB'"
+        ).fetchone()
+    assert rows == generation_rows("UK-GB")
+
+
+def test_melt_generation_stores_no_parent_rows() -> None:
+    df_generation = pd.DataFrame(
+        {
+            "Grid Node": ["A-1", "A-2", "B-1"],
+            "SOLAR": [1.0, 2.0, 4.0],
+            "WIND": [10.0, 20.0, 40.0],
+            "start_datetime": ["2021-01-01 00:00"] * 3,
+            "end_datetime": ["2021-01-01 01:00"] * 3,
+            "Parent Node": ["A", "A", "B"],
+            "Topology Level": [1, 1, 1],
+            "unit": ["MWh"] * 3,
+        }
+    )
+
+    df_rows = melt_generation(df_generation)
+
+    totals = df_rows.groupby("id")["value"].sum().to_dict()
+    assert totals == {"A-1": 11.0, "A-2": 22.0, "B-1": 44.0}
+    assert len(df_rows) == 6
+    assert set(df_rows["type"]) == {"SOLAR", "WIND"}
+
+
+def test_seed_builds_psr_closure(data_dir) -> None:
+    seed()
+
+    with Session(db.get_engine()) as session:
+        parents = dict(session.exec(select(PSRList.id, PSRList.parent)).all())
+        counted = set(
+            session.exec(
+                select(PSRClosureTable.descendant).where(
+                    PSRClosureTable.ancestor == "ENTSOE", PSRClosureTable.counted
+                )
+            )
+        )
+    assert parents["ES-ALMARAZ-1"] == "ES-ALMARAZ"
+    assert parents["ES"] == "ENTSOE"
+    assert parents["ENTSOE"] is None
+    # The national total already includes the plant and its units
+    assert counted == {"ES"}
+    assert generation_rows("ENTSOE") == 0
+
+
+def test_parse_files_in_workers_matches_inline() -> None:
+    source_files = [
+        seed_file for seed_file in seed_module.seed_files() if seed_file.parse
+    ]
+
+    inline = seed_module.parse_files(source_files, workers=0)
+    pooled = seed_module.parse_files(source_files, workers=2)
+
+    assert inline.keys() == pooled.keys()
+    for path, (rows, _) in inline.items():
+        pooled_rows = pooled[path][0]
+        assert len(rows) > 0
+        for name in rows.columns:
+            assert pooled_rows.tolist(name) == rows.tolist(name)
+
+
+def test_seed_synthetic_data(tmp_path, monkeypatch) -> None:
+    scale = Scale(psrs=2, fuel_types=3, years=2 / 365, units=1)
+    generate(tmp_path / "data", scale)
+    monkeypatch.setattr(settings, "data_dir", tmp_path / "data")
+    monkeypatch.setattr(settings, "db_file", tmp_path / "seed.sqlite3")
+    db.dispose_engine()
+    try:
+        seed()
+        with Session(db.get_engine()) as session:
+            rows = session.exec(
+                select(func.count()).select_from(GenerationByFuelSourceTable)
+            ).one()
+            children = session.exec(
+                select(PSRList.id).where(PSRList.parent == "SYN-EIA")
+            ).all()
+    finally:
+        db.dispose_engine()
+
+    assert rows == scale.generation_rows() == (2 * 3 * 3 + 2) * 48
+    assert children == ["SYN-EIA-0000", "SYN-EIA-0001"]